@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+
+"""Measure the throughput of data frames and data loaders
+
+This benchmark generates a synthetic vlarr dataset, writes it in each of the
+supported formats, and measures rows/s and bytes/s of
+
+- `sequential` : row by row access of `VLDataset` in the order of rows,
+- `shuffled`   : row by row access of `VLDataset` in a random order,
+- `batched`    : batches of `DataLoader` in the order of rows,
+- `batched-shuffled` : batches of `DataLoader` in a random order.
+
+The results are saved as json, and can be compared against the results of
+another commit with `--baseline`.
+
+Example:
+    python benchmarks/bench_loading.py --rows 100000 --output new.json \\
+        --baseline old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from vlndata.data_frame  import select_frame
+from vlndata.data_loader import DataLoader
+from vlndata.dataset     import VLDataset
+from vlndata.funcs       import Spec
+from vlndata.profiling   import get_nbytes
+
+from synthetic import (
+    FORMATS, LENGTH_DISTRIBUTIONS, generate_columns, write_datasets
+)
+
+MODES = [ 'sequential', 'shuffled', 'batched', 'batched-shuffled' ]
+
+def parse_cmdargs():
+    parser = argparse.ArgumentParser(
+        description = 'Measure throughput of vlndata frames and loaders'
+    )
+
+    parser.add_argument('--rows', default = 20000, type = int)
+    parser.add_argument('--scalar-columns', default = 4, type = int)
+    parser.add_argument('--vlarr-columns',  default = 4, type = int)
+    parser.add_argument('--mean-length', default = 16, type = float)
+    parser.add_argument(
+        '--length-dist', default = 'poisson', choices = LENGTH_DISTRIBUTIONS
+    )
+    parser.add_argument(
+        '--formats', default = FORMATS, nargs = '+', choices = FORMATS
+    )
+    parser.add_argument(
+        '--modes', default = MODES, nargs = '+', choices = MODES
+    )
+    parser.add_argument('--batch-size', default = 256, type = int)
+    parser.add_argument('--chunk-size', default = 1024, type = int)
+    parser.add_argument('--prefetch',   default = 0, type = int)
+    parser.add_argument(
+        '--max-rows', default = 10000, type = int,
+        help = 'maximum number of rows to read in the row by row modes'
+    )
+    parser.add_argument('--repeat', default = 3, type = int)
+    parser.add_argument('--seed', default = 0, type = int)
+    parser.add_argument(
+        '--data-dir', default = None,
+        help = 'directory to write datasets into (temporary by default)'
+    )
+    parser.add_argument('--output', default = None, help = 'json output')
+    parser.add_argument(
+        '--baseline', default = None, help = 'json output to compare with'
+    )
+
+    return parser.parse_args()
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            [ 'git', 'rev-parse', 'HEAD' ], capture_output = True,
+            check = True, text = True,
+            cwd = os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def construct_dataset(spec : Spec) -> VLDataset:
+    df = select_frame(spec)
+
+    scalar_columns = [ c for c in df.columns() if c.startswith('scalar') ]
+    vlarr_columns  = [ c for c in df.columns() if c.startswith('vlarr') ]
+
+    return VLDataset(
+        df,
+        { 'scalar' : scalar_columns } if scalar_columns else None,
+        { 'vlarr'  : vlarr_columns  } if vlarr_columns  else None,
+    )
+
+def run_mode(
+    dset       : VLDataset,
+    mode       : str,
+    batch_size : int,
+    prefetch   : int,
+    max_rows   : int,
+    seed       : int,
+) -> Dict[str, float]:
+    """Read `dset` in `mode` and return the number of rows and bytes read"""
+    # pylint: disable=too-many-arguments
+    n_rows = 0
+    nbytes = 0
+
+    if mode in [ 'sequential', 'shuffled' ]:
+        indices = np.arange(len(dset))
+
+        if mode == 'shuffled':
+            indices = np.random.default_rng(seed).permutation(len(dset))
+
+        for index in indices[:max_rows]:
+            nbytes += get_nbytes(dset[index])
+            n_rows += 1
+
+    else:
+        loader = DataLoader(
+            dset, batch_size, shuffle = (mode == 'batched-shuffled'),
+            seed = seed, prefetch = prefetch
+        )
+
+        for batch in loader:
+            nbytes += get_nbytes(batch)
+            n_rows += len(next(iter(batch.values())))
+
+    return { 'rows' : n_rows, 'bytes' : nbytes }
+
+def benchmark_format(
+    fmt : str, spec : Spec, cmdargs : argparse.Namespace
+) -> List[Dict[str, Any]]:
+    result = []
+
+    for mode in cmdargs.modes:
+        times      = []
+        open_times = []
+
+        for _ in range(cmdargs.repeat):
+            time_start = time.perf_counter()
+            dset       = construct_dataset(spec)
+            open_times.append(time.perf_counter() - time_start)
+
+            time_start = time.perf_counter()
+            counts     = run_mode(
+                dset, mode, cmdargs.batch_size, cmdargs.prefetch,
+                cmdargs.max_rows, cmdargs.seed
+            )
+            times.append(time.perf_counter() - time_start)
+
+            del dset
+
+        # the best of the repeats is the least affected by noise
+        best    = int(np.argmin(times))
+        seconds = times[best]
+
+        result.append({
+            'format'      : fmt,
+            'mode'        : mode,
+            'rows'        : counts['rows'],
+            'bytes'       : counts['bytes'],
+            'open_time'   : open_times[best],
+            'seconds'     : seconds,
+            'times'       : times,
+            'rows_per_s'  : counts['rows'] / seconds,
+            'bytes_per_s' : counts['bytes'] / seconds,
+        })
+
+        print(
+            f"{fmt:<12} {mode:<17} {result[-1]['rows_per_s']:>12.0f} rows/s"
+            f" {result[-1]['bytes_per_s'] / 2**20:>10.1f} MB/s"
+        )
+
+    return result
+
+def compare(results : List[Dict[str, Any]], path : str) -> None:
+    """Print ratios of rows/s of `results` to the baseline results at `path`
+    """
+    with open(path, 'rt', encoding = 'utf-8') as f:
+        baseline = json.load(f)
+
+    baseline_rates = {
+        (x['format'], x['mode']) : x['rows_per_s'] for x in baseline['results']
+    }
+
+    print(f"\nComparison with {path} ({baseline['meta'].get('commit')})")
+
+    for x in results:
+        key = (x['format'], x['mode'])
+
+        if key not in baseline_rates:
+            continue
+
+        print(
+            f"{x['format']:<12} {x['mode']:<17}"
+            f" x{x['rows_per_s'] / baseline_rates[key]:.2f}"
+        )
+
+def run_benchmarks(cmdargs : argparse.Namespace, data_dir : str) -> None:
+    scalar_data, vlarr_data = generate_columns(
+        cmdargs.rows, cmdargs.scalar_columns, cmdargs.vlarr_columns,
+        cmdargs.mean_length, cmdargs.length_dist, cmdargs.seed
+    )
+    specs = write_datasets(
+        data_dir, scalar_data, vlarr_data, cmdargs.formats,
+        cmdargs.chunk_size
+    )
+
+    results = []
+
+    for (fmt, spec) in specs.items():
+        results += benchmark_format(fmt, spec, cmdargs)
+
+    output = {
+        'meta' : {
+            'commit'  : get_git_commit(),
+            'time'    : time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python'  : platform.python_version(),
+            'numpy'   : np.__version__,
+            'machine' : platform.machine(),
+            'config'  : {
+                k : v for (k, v) in vars(cmdargs).items()
+                    if k not in [ 'output', 'baseline', 'data_dir' ]
+            },
+        },
+        'results' : results,
+    }
+
+    if cmdargs.output is not None:
+        with open(cmdargs.output, 'wt', encoding = 'utf-8') as f:
+            json.dump(output, f, indent = 4)
+
+    if cmdargs.baseline is not None:
+        compare(results, cmdargs.baseline)
+
+def main():
+    cmdargs = parse_cmdargs()
+
+    if cmdargs.data_dir is not None:
+        run_benchmarks(cmdargs, cmdargs.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            run_benchmarks(cmdargs, tmpdir)
+
+if __name__ == '__main__':
+    main()
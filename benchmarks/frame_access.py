@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+"""Measure per-cell access latency of vlndata data frames.
+
+This benchmark generates a synthetic data frame with scalar and variable
+length columns, stores it in every supported format (CSV, compressed CSV,
+HDF5), opens it with every data frame type, and measures the mean latency
+of a single `get_scalar` and `get_vlarr` call, both for sequential and for
+random row access patterns.
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from vlndata.data_frame import (
+    CSVFrame, CSVMemFrame, DictFrame, HDF5Frame, HDF5ReadAheadFrame,
+    ShardedFrame, ShuffleFrame, export_hdf5
+)
+
+SCALAR_COLUMNS = [ 'scalar_1', 'scalar_2' ]
+VLARR_COLUMNS  = [ 'vlarr_1', 'vlarr_2' ]
+
+def parse_cmdargs():
+    parser = argparse.ArgumentParser(
+        description = 'Benchmark per-cell access latency of data frames'
+    )
+
+    parser.add_argument(
+        '-n', '--rows', default = 20000, dest = 'rows', type = int,
+        help = 'number of rows in the synthetic data frame'
+    )
+
+    parser.add_argument(
+        '-l', '--mean-length', default = 20, dest = 'mean_length',
+        type = float, help = 'mean length of variable length arrays'
+    )
+
+    parser.add_argument(
+        '-s', '--samples', default = 5000, dest = 'samples', type = int,
+        help = 'number of rows to access per measurement'
+    )
+
+    return parser.parse_args()
+
+def generate_data_frame(n_rows, mean_length, seed = 0):
+    prg     = np.random.default_rng(seed)
+    lengths = prg.poisson(mean_length, size = n_rows)
+
+    data_scalar = {
+        'scalar_1' : prg.normal(size = n_rows),
+        'scalar_2' : prg.integers(0, 100, size = n_rows),
+    }
+
+    data_vlarr = {
+        'vlarr_1' : [ prg.normal(size = l) for l in lengths ],
+        'vlarr_2' : [ prg.uniform(size = l) for l in lengths ],
+    }
+
+    return DictFrame(data_scalar, data_vlarr, dtype = 'float32')
+
+def export_csv(df, path, opener = open):
+    with opener(path, 'wt') as f:
+        f.write(','.join(SCALAR_COLUMNS + VLARR_COLUMNS) + '\n')
+
+        for idx in range(len(df)):
+            values  = [ str(df.get_scalar(c, idx)) for c in SCALAR_COLUMNS ]
+            values += [
+                '"[%s]"' % ','.join(str(x) for x in df.get_vlarr(c, idx))
+                    for c in VLARR_COLUMNS
+            ]
+
+            f.write(','.join(values) + '\n')
+
+def measure(getter, columns, indices):
+    time_start = time.perf_counter()
+
+    for idx in indices:
+        for column in columns:
+            getter(column, idx)
+
+    time_total = time.perf_counter() - time_start
+    return time_total / (len(indices) * len(columns))
+
+def benchmark_frame(name, df, n_samples, seed = 0):
+    prg = np.random.default_rng(seed)
+    n_samples = min(n_samples, len(df))
+
+    patterns = {
+        'seq'  : np.arange(n_samples),
+        'rand' : prg.integers(0, len(df), size = n_samples),
+    }
+
+    for (pattern, indices) in patterns.items():
+        latency_scalar = measure(df.get_scalar, SCALAR_COLUMNS, indices)
+        latency_vlarr  = measure(df.get_vlarr,  VLARR_COLUMNS,  indices)
+
+        print(
+            f'{name:30s} {pattern:5s}'
+            f' scalar: {latency_scalar * 1e6:9.2f} us/cell'
+            f' vlarr: {latency_vlarr * 1e6:9.2f} us/cell'
+        )
+
+def main():
+    cmdargs = parse_cmdargs()
+    df      = generate_data_frame(cmdargs.rows, cmdargs.mean_length)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path_csv  = os.path.join(tmpdir, 'data.csv')
+        path_gz   = os.path.join(tmpdir, 'data.csv.gz')
+        path_hdf  = os.path.join(tmpdir, 'data.h5')
+        path_vlen = os.path.join(tmpdir, 'data-vlen.h5')
+
+        export_csv(df, path_csv)
+        export_csv(df, path_gz, opener = gzip.open)
+        export_hdf5(df, path_hdf)
+        export_hdf5(df, path_vlen, ragged = False)
+
+        frames = {
+            'dict-frame'         : lambda : df,
+            'csv-frame'          : lambda : CSVFrame(path_csv),
+            'csv-mem-frame'      : lambda : CSVMemFrame(path_csv),
+            'csv-mem-frame (gz)' : lambda : CSVMemFrame(path_gz),
+            'hdf-frame'          : lambda : HDF5Frame(path_hdf),
+            'hdf-frame (vlen)'   : lambda : HDF5Frame(path_vlen),
+            'hdf-ra-frame'       : lambda : HDF5ReadAheadFrame(
+                path_hdf, read_columns = SCALAR_COLUMNS + VLARR_COLUMNS
+            ),
+            'sharded-frame'      : lambda : ShardedFrame(
+                'csv-frame', [ path_csv, path_csv ]
+            ),
+            'shuffle-frame'      : lambda : ShuffleFrame(CSVFrame(path_csv)),
+        }
+
+        for (name, frame_fn) in frames.items():
+            benchmark_frame(name, frame_fn(), cmdargs.samples)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+"""Compare read throughput of HDF5 layouts produced by `export_hdf5`.
+
+This benchmark generates a synthetic data frame with scalar and variable
+length columns, exports it into HDF5 files with different vlarr
+representations (ragged values + offsets vs h5py vlen) and compressions, and
+measures the sequential read throughput of each file with `HDF5Frame` and
+`HDF5ReadAheadFrame`.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from vlndata.data_frame import (
+    DictFrame, HDF5Frame, HDF5ReadAheadFrame, export_hdf5
+)
+
+def parse_cmdargs():
+    parser = argparse.ArgumentParser(
+        description = 'Benchmark read throughput of HDF5 layouts'
+    )
+
+    parser.add_argument(
+        '-n', '--rows', default = 20000, dest = 'rows', type = int,
+        help = 'number of rows in the synthetic data frame'
+    )
+
+    parser.add_argument(
+        '-l', '--mean-length', default = 20, dest = 'mean_length',
+        type = float, help = 'mean length of variable length arrays'
+    )
+
+    parser.add_argument(
+        '-c', '--chunk-size', default = 1024, dest = 'chunk_size',
+        type = int, help = 'HDF5 chunk size and read-ahead chunk size'
+    )
+
+    parser.add_argument(
+        '--slow', action = 'store_true', dest = 'slow',
+        help = 'also benchmark the unbuffered HDF5Frame'
+    )
+
+    return parser.parse_args()
+
+def generate_data_frame(n_rows, mean_length, seed = 0):
+    prg     = np.random.default_rng(seed)
+    lengths = prg.poisson(mean_length, size = n_rows)
+
+    data_scalar = {
+        'scalar_1' : prg.normal(size = n_rows),
+        'scalar_2' : prg.integers(0, 100, size = n_rows),
+    }
+
+    data_vlarr = {
+        'vlarr_1' : [ prg.normal(size = l) for l in lengths ],
+        'vlarr_2' : [ prg.uniform(size = l) for l in lengths ],
+    }
+
+    return DictFrame(data_scalar, data_vlarr, dtype = 'float32')
+
+def read_all(df):
+    n_bytes = 0
+
+    for idx in range(len(df)):
+        for column in [ 'scalar_1', 'scalar_2' ]:
+            n_bytes += df.get_scalar(column, idx).nbytes
+
+        for column in [ 'vlarr_1', 'vlarr_2' ]:
+            n_bytes += df.get_vlarr(column, idx).nbytes
+
+    return n_bytes
+
+def benchmark_file(name, path, frame_fn):
+    df = frame_fn(path)
+
+    time_start = time.perf_counter()
+    n_bytes    = read_all(df)
+    time_total = time.perf_counter() - time_start
+
+    print(
+        f'{name:40s} {os.path.getsize(path) / 2**20:10.2f} MiB'
+        f' {len(df) / time_total:12.0f} rows/s'
+        f' {n_bytes / 2**20 / time_total:10.2f} MiB/s'
+    )
+
+def main():
+    cmdargs = parse_cmdargs()
+    df      = generate_data_frame(cmdargs.rows, cmdargs.mean_length)
+
+    variants = {
+        'ragged'      : { 'ragged' : True,  'compression' : None   },
+        'ragged-gzip' : { 'ragged' : True,  'compression' : 'gzip' },
+        'ragged-lzf'  : { 'ragged' : True,  'compression' : 'lzf'  },
+        'vlen'        : { 'ragged' : False, 'compression' : None   },
+        'vlen-gzip'   : { 'ragged' : False, 'compression' : 'gzip' },
+        'vlen-lzf'    : { 'ragged' : False, 'compression' : 'lzf'  },
+    }
+
+    frames = {
+        'read-ahead' : lambda path : HDF5ReadAheadFrame(
+            path, chunk_size = cmdargs.chunk_size,
+            read_columns = [ 'scalar_1', 'scalar_2', 'vlarr_1', 'vlarr_2' ]
+        ),
+    }
+
+    if cmdargs.slow:
+        frames['hdf'] = HDF5Frame
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for (name, kwargs) in variants.items():
+            path = os.path.join(tmpdir, name + '.h5')
+            export_hdf5(df, path, chunk_size = cmdargs.chunk_size, **kwargs)
+
+            for (frame_name, frame_fn) in frames.items():
+                benchmark_file(f'{name} / {frame_name}', path, frame_fn)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Generate synthetic vlarr datasets and write them in all supported formats
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from vlndata.data_frame import DictFrame, export_hdf5
+from vlndata.funcs      import Spec
+
+LENGTH_DISTRIBUTIONS = [ 'fixed', 'uniform', 'poisson', 'lognormal' ]
+
+FORMATS = [
+    'dict', 'csv', 'csv-mem', 'csv-gz', 'hdf', 'hdf-ra', 'hdf-ra-gzip'
+]
+
+def generate_lengths(
+    n_rows      : int,
+    mean_length : float,
+    length_dist : str,
+    prg         : np.random.Generator,
+) -> np.ndarray:
+    """Generate vlarr lengths of `n_rows` rows with mean `mean_length`
+
+    The lognormal distribution has a heavy tail (sigma = 1), which is typical
+    for the particle multiplicities.
+    """
+    if length_dist == 'fixed':
+        return np.full(n_rows, int(mean_length), dtype = np.int64)
+
+    if length_dist == 'uniform':
+        return prg.integers(0, 2 * mean_length + 1, size = n_rows)
+
+    if length_dist == 'poisson':
+        return prg.poisson(mean_length, size = n_rows)
+
+    if length_dist == 'lognormal':
+        sigma = 1.0
+        mu    = np.log(max(mean_length, 1e-3)) - sigma**2 / 2
+        return np.round(prg.lognormal(mu, sigma, size = n_rows)).astype(int)
+
+    raise ValueError(f"Unknown length distribution: {length_dist}")
+
+def generate_columns(
+    n_rows        : int,
+    n_scalar      : int   = 4,
+    n_vlarr       : int   = 4,
+    mean_length   : float = 16,
+    length_dist   : str   = 'poisson',
+    seed          : int   = 0,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, List[np.ndarray]]]:
+    """Generate scalar and vlarr columns of a synthetic dataset
+
+    All vlarr columns of a row share the same length, as the columns of
+    particle properties of an event do.
+    """
+    # pylint: disable=too-many-arguments
+    prg     = np.random.default_rng(seed)
+    lengths = generate_lengths(n_rows, mean_length, length_dist, prg)
+    offsets = np.concatenate([ [ 0 ], np.cumsum(lengths) ])
+
+    scalar_data = {
+        f'scalar_{idx}' : prg.normal(size = n_rows).astype(np.float32)
+            for idx in range(n_scalar)
+    }
+
+    vlarr_data = {}
+
+    for idx in range(n_vlarr):
+        values = prg.normal(size = offsets[-1]).astype(np.float32)
+        vlarr_data[f'vlarr_{idx}'] = np.split(values, offsets[1:-1])
+
+    return (scalar_data, vlarr_data)
+
+def format_vlarr(values : np.ndarray) -> str:
+    return '[' + ','.join(f'{x:.7g}' for x in values) + ']'
+
+def write_csv(
+    path        : str,
+    scalar_data : Dict[str, np.ndarray],
+    vlarr_data  : Dict[str, List[np.ndarray]],
+) -> None:
+    """Write columns into a csv file, compressed if `path` ends with .gz"""
+    columns = dict(scalar_data)
+
+    for (name, vlarrs) in vlarr_data.items():
+        columns[name] = [ format_vlarr(x) for x in vlarrs ]
+
+    pd.DataFrame(columns).to_csv(path, index = False, float_format = '%.7g')
+
+def write_datasets(
+    directory   : str,
+    scalar_data : Dict[str, np.ndarray],
+    vlarr_data  : Dict[str, List[np.ndarray]],
+    formats     : List[str],
+    chunk_size  : int = 1024,
+) -> Dict[str, Spec]:
+    """Write columns in all `formats` into `directory`
+
+    Returns
+    -------
+    Dict[str, Spec]
+        Specifications of the data frames reading each format
+        (c.f. `select_frame`).
+    """
+    result : Dict[str, Spec] = {}
+    os.makedirs(directory, exist_ok = True)
+
+    for fmt in formats:
+        if fmt == 'dict':
+            result[fmt] = {
+                'name'             : 'dict-frame',
+                'scalar_data_dict' : scalar_data,
+                'vlarr_data_dict'  : vlarr_data,
+                'dtype'            : 'float32',
+            }
+
+        elif fmt in [ 'csv', 'csv-mem' ]:
+            path = os.path.join(directory, 'data.csv')
+
+            if not os.path.exists(path):
+                write_csv(path, scalar_data, vlarr_data)
+
+            name = 'csv-frame' if fmt == 'csv' else 'csv-mem-frame'
+            result[fmt] = { 'name' : name, 'path' : path }
+
+        elif fmt == 'csv-gz':
+            path = os.path.join(directory, 'data.csv.gz')
+            write_csv(path, scalar_data, vlarr_data)
+            result[fmt] = { 'name' : 'csv-mem-frame', 'path' : path }
+
+        elif fmt in [ 'hdf', 'hdf-ra', 'hdf-ra-gzip' ]:
+            compression = 'gzip' if fmt == 'hdf-ra-gzip' else None
+            path = os.path.join(directory, f'data-{compression}.h5')
+
+            if not os.path.exists(path):
+                export_hdf5(
+                    DictFrame(scalar_data, vlarr_data, dtype = 'float32'),
+                    path,
+                    scalar_columns = list(scalar_data),
+                    vlarr_columns  = list(vlarr_data),
+                    chunk_size     = chunk_size,
+                    compression    = compression,
+                )
+
+            if fmt == 'hdf':
+                result[fmt] = { 'name' : 'hdf-frame', 'path' : path }
+            else:
+                result[fmt] = {
+                    'name'       : 'hdf-ra-frame',
+                    'path'       : path,
+                    'chunk_size' : chunk_size,
+                }
+
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+
+    return result
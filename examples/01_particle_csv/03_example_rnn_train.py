@@ -32,14 +32,10 @@ class KerasSequence(keras.utils.Sequence):
 
 def calc_average_particle_energy(df):
     """A func that calculates average particle energy for each event"""
-    return np.fromiter(
-        (
-            df.get_vlarr(column = 'particle_energy', index = index).mean()
-                for index in range(len(df))
-        ),
-        dtype = np.float32,
-        count = len(df)
-    )
+    # Take all particle energies as a single ragged array and average them
+    # per event in one vectorized pass
+    energy = df.get_ragged('particle_energy')
+    return energy.mean().astype(np.float32)
 
 def load_dataframe(path):
     """Load frame from disc and add a new column of avg particle energies"""
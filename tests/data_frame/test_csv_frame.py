@@ -1,9 +1,15 @@
 """Test correctness of custom csv files parsing with `CSVFrame`"""
 
 import io
+import os
+import pickle
+import tempfile
 import unittest
 
+import numpy as np
+
 from vlndata.data_frame.csv_frame import CSVFrame
+from vlndata.data_frame.ragged    import RaggedArray
 from .tests_data_frame_base       import TestsDataFrameBase
 
 def create_csv_data_str(data_scalar, data_vlarr):
@@ -41,6 +47,147 @@ class TestsCSVFrame(TestsDataFrameBase, unittest.TestCase):
         csv_data = create_csv_data_str(data_scalar, data_vlarr)
         return CSVFrame(csv_data)
 
+class TestsCSVFrameFile(TestsDataFrameBase, unittest.TestCase):
+
+    _kwargs : dict = {}
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        csv_data = create_csv_data_str(data_scalar, data_vlarr)
+        path     = os.path.join(self._tmpdir.name, 'data.csv')
+
+        with open(path, 'wt') as f:
+            f.write(csv_data.read())
+
+        return CSVFrame(path, **self._kwargs)
+
+    def test_pickled_frame(self):
+        df = self._create_data_frame(self._data_scalar, self._data_vlarr)
+        df = pickle.loads(pickle.dumps(df))
+
+        self._compare_vlarr_columns(self._data_vlarr, df, 'vc2')
+        self._compare_scalar_columns_by_index(self._data_scalar, df, 'c3')
+
+class TestsCSVFrameParallel(TestsCSVFrameFile):
+
+    _kwargs = { 'n_workers' : 2 }
+
+class TestsCSVFrameSpillDir(TestsCSVFrameFile):
+
+    def test_spill_dir(self):
+        spill_dir = os.path.join(self._tmpdir.name, 'spill')
+        os.mkdir(spill_dir)
+
+        self._kwargs = { 'spill_dir' : spill_dir }
+        df = self._create_data_frame(self._data_scalar, self._data_vlarr)
+
+        df_copy = pickle.loads(pickle.dumps(df))
+        self.assertGreater(len(os.listdir(spill_dir)), 0)
+
+        self._compare_vlarr_columns(self._data_vlarr, df_copy, 'vc1')
+        self._compare_scalar_columns_by_index(self._data_scalar, df_copy, 'c1')
+
+    def test_shared_spill_dir(self):
+        spill_dir = os.path.join(self._tmpdir.name, 'spill')
+        data_vlarr_other = {
+            k : [ [ 10 * x for x in v ] for v in values ]
+                for (k, values) in self._data_vlarr.items()
+        }
+
+        self._kwargs = { 'spill_dir' : spill_dir }
+        df = self._create_data_frame(self._data_scalar, self._data_vlarr)
+        df_copy = pickle.loads(pickle.dumps(df))
+
+        path = os.path.join(self._tmpdir.name, 'other.csv')
+
+        with open(path, 'wt') as f:
+            f.write(create_csv_data_str(None, data_vlarr_other).read())
+
+        df_other = CSVFrame(path, spill_dir = spill_dir)
+        df_other_copy = pickle.loads(pickle.dumps(df_other))
+
+        df_copy = pickle.loads(pickle.dumps(df_copy))
+
+        # a subdirectory per frame and per copy
+        self.assertEqual(len(os.listdir(spill_dir)), 4)
+        self._compare_vlarr_columns(self._data_vlarr, df_copy, 'vc1')
+        self._compare_scalar_columns_by_index(self._data_scalar, df_copy, 'c1')
+        self._compare_vlarr_columns(data_vlarr_other, df_other_copy, 'vc1')
+
+        del df, df_copy
+        self.assertEqual(len(os.listdir(spill_dir)), 2)
+
+    def test_copies_outlive_frame(self):
+        spill_dir = os.path.join(self._tmpdir.name, 'spill')
+
+        self._kwargs = { 'spill_dir' : spill_dir }
+        df    = self._create_data_frame(self._data_scalar, self._data_vlarr)
+        state = pickle.dumps(df)
+
+        df_copy = pickle.loads(state)
+        del df
+
+        # the copy keeps its own links to the spilled columns
+        df_copy = pickle.loads(pickle.dumps(df_copy))
+        self.assertEqual(len(os.listdir(spill_dir)), 1)
+
+        self._compare_vlarr_columns(self._data_vlarr, df_copy, 'vc1')
+        self._compare_scalar_columns_by_index(self._data_scalar, df_copy, 'c1')
+
+        # the pickled frame is parsed again, once its spill is removed
+        del df_copy
+        self.assertEqual(len(os.listdir(spill_dir)), 0)
+
+        df_copy = pickle.loads(state)
+        self._compare_vlarr_columns(self._data_vlarr, df_copy, 'vc1')
+        self._compare_scalar_columns_by_index(self._data_scalar, df_copy, 'c1')
+
+class TestsCSVFrameStorage(unittest.TestCase):
+
+    def test_typed_columns(self):
+        csv_data = io.StringIO(
+            'a,b,c\n'
+            '1,"[1,2,3]",x\n'
+            '2,"[]",y\n'
+            '3,"4",z\n'
+        )
+        df = CSVFrame(csv_data, dtype = 'float32')
+
+        # pylint: disable=protected-access
+        self.assertEqual(df._data['a'].dtype.kind, 'i')
+        self.assertIsInstance(df._data['b'], RaggedArray)
+        self.assertEqual(df._data['b'].dtype, np.float32)
+        self.assertEqual(df._data['b'].values.tolist(), [ 1, 2, 3, 4 ])
+
+        self.assertEqual(df.get_vlarr('b', 1).tolist(), [])
+        self.assertEqual(df.get_vlarr('b', 2).tolist(), [ 4 ])
+        self.assertEqual(df.get_scalar('a', 2), 3)
+        self.assertEqual(list(df['c']), [ 'x', 'y', 'z' ])
+
+    def test_mixed_chunks(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path  = os.path.join(tmpdir, 'data.csv')
+            lines = [ 'a,b' ]
+
+            # single element vlarrs in the head of the file
+            lines += [ f'{i},{i}' for i in range(100) ]
+            lines += [ f'{i},"[{i},{i}]"' for i in range(100) ]
+
+            with open(path, 'wt') as f:
+                f.write('\n'.join(lines) + '\n')
+
+            df = CSVFrame(path, n_workers = 2)
+
+            self.assertEqual(len(df), 200)
+            self.assertEqual(df.get_vlarr('b', 10).tolist(), [ 10 ])
+            self.assertEqual(df.get_vlarr('b', 110).tolist(), [ 10, 10 ])
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -1,9 +1,18 @@
 """Test correctness of custom csv files parsing with `CSVMemFrame`"""
 
+import gzip
 import io
+import lzma
+import os
+import pickle
+import tempfile
 import unittest
 
+import numpy as np
+
 from vlndata.data_frame.csv_mem_frame import CSVMemFrame
+from vlndata.data_frame.decompressor  import compress_bgzf
+from vlndata.data_frame.funcs import INDEX_SUFFIX, find_line_offsets
 from .tests_data_frame_base import TestsDataFrameBase
 from .test_csv_frame        import create_csv_data_str
 
@@ -15,6 +24,161 @@ class TestsCSVMemFrame(TestsDataFrameBase, unittest.TestCase):
 
         return CSVMemFrame(csv_data)
 
+    def test_batch_lines_parsed_once(self):
+        # pylint: disable=protected-access
+        df = self._create_data_frame(self._data_scalar, self._data_vlarr)
+
+        n_reads   = [ 0 ]
+        read_line = df._read_line
+
+        def counted_read_line(index):
+            n_reads[0] += 1
+            return read_line(index)
+
+        df._read_line = counted_read_line
+        indices = np.array([ 3, 0, 4 ])
+
+        for column in [ 'c1', 'c2', 'c3' ]:
+            df.get_scalar_batch(column, indices)
+
+        for column in [ 'vc1', 'vc2', 'vc3' ]:
+            df.get_vlarr_batch(column, indices)
+
+        self.assertEqual(n_reads[0], len(indices))
+
+class TestsCSVMemFrameFile(TestsDataFrameBase, unittest.TestCase):
+
+    _ext    = '.csv'
+    _opener = open
+    _kwargs : dict = {}
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        csv_data = create_csv_data_str(data_scalar, data_vlarr)
+        path     = os.path.join(self._tmpdir.name, 'data' + self._ext)
+
+        self._write_file(path, csv_data.read())
+
+        return CSVMemFrame(path, **self._kwargs)
+
+    def _write_file(self, path, text):
+        with type(self)._opener(path, 'wt') as f:
+            f.write(text)
+
+    def test_pickled_frame(self):
+        df = self._create_data_frame(self._data_scalar, self._data_vlarr)
+        df = pickle.loads(pickle.dumps(df))
+
+        self._compare_vlarr_columns(self._data_vlarr, df, 'vc2')
+        self._compare_scalar_columns_by_index(self._data_scalar, df, 'c3')
+
+class TestsCSVMemFrameGzipFile(TestsCSVMemFrameFile):
+
+    _ext    = '.csv.gz'
+    _opener = gzip.open
+
+class TestsCSVMemFrameGzipBackground(TestsCSVMemFrameFile):
+
+    _ext    = '.csv.gz'
+    _opener = gzip.open
+    _kwargs = { 'decompress_threads' : 1 }
+
+    def test_released_loader(self):
+        df     = self._create_data_frame(self._data_scalar, self._data_vlarr)
+        loader = df._loader
+
+        # frame released after the decompression, but before using its data
+        loader.wait()
+        del df
+
+        self.assertTrue(loader.done)
+        self.assertIsNone(loader._shmem)
+
+class TestsCSVMemFrameBGZFParallel(TestsCSVMemFrameFile):
+
+    _ext    = '.csv.gz'
+    _kwargs = { 'decompress_threads' : 3 }
+
+    def _write_file(self, path, text):
+        with open(path, 'wb') as f:
+            f.write(compress_bgzf(text.encode('utf-8')))
+
+class TestsCSVMemFrameXZParallel(TestsCSVMemFrameFile):
+
+    _ext    = '.csv.xz'
+    _kwargs = { 'decompress_threads' : 3 }
+
+    def _write_file(self, path, text):
+        data = text.encode('utf-8')
+        half = len(data) // 2
+
+        # multi-stream xz file
+        with open(path, 'wb') as f:
+            f.write(lzma.compress(data[:half]) + lzma.compress(data[half:]))
+
+class TestsCSVMemFrameIndex(unittest.TestCase):
+
+    def test_quoted_line_breaks(self):
+        data = b'a,b\n1,"x\ny"\n"\n",2\n3,4'
+
+        for block_size in [ 1, 2, 3, 5, 1024 ]:
+            for n_threads in [ 1, 3 ]:
+                offsets = find_line_offsets(
+                    data, len(data), block_size, n_threads
+                )
+                self.assertEqual(list(offsets), [ 3, 11, 17, len(data) ])
+
+    def test_unterminated_last_line(self):
+        df = CSVMemFrame(io.BytesIO(b'c1,vc1\n1,"[1,2]"\n2,"[3]"'))
+
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df.get_scalar('c1', 1), 2)
+        self.assertTrue(np.all(df.get_vlarr('vc1', 0) == [ 1, 2 ]))
+
+    def test_sidecar_index(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'data.csv')
+
+            with open(path, 'wt') as f:
+                f.write('c1\n1\n2\n3\n')
+
+            df = CSVMemFrame(path, cache_index = True, index_threads = 2)
+            self.assertEqual(len(df), 3)
+            self.assertTrue(os.path.exists(path + INDEX_SUFFIX))
+
+            df = CSVMemFrame(path, cache_index = True)
+            self.assertEqual(df.get_scalar('c1', 2), 3)
+
+            # modified file invalidates the sidecar index
+            with open(path, 'at') as f:
+                f.write('4\n')
+
+            df = CSVMemFrame(path, cache_index = True)
+            self.assertEqual(len(df), 4)
+
+    def test_pickled_sidecar_index(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'data.csv')
+
+            with open(path, 'wt') as f:
+                f.write('c1\n1\n2\n3\n')
+
+            df = CSVMemFrame(path, cache_index = True)
+            self.assertEqual(len(df), 3)
+
+            state = df.__getstate__()
+            self.assertIsNone(state['offsets'])
+
+            df = pickle.loads(pickle.dumps(df))
+            self.assertIsInstance(df.offsets, np.memmap)
+            self.assertEqual(len(df), 3)
+            self.assertEqual(df.get_scalar('c1', 2), 3)
+
 if __name__ == '__main__':
     unittest.main()
-
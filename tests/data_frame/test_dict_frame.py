@@ -2,6 +2,8 @@
 
 import unittest
 
+import numpy as np
+
 from vlndata.data_frame.dict_frame import DictFrame
 from .tests_data_frame_base        import TestsDataFrameBase
 
@@ -10,6 +12,21 @@ class TestsDictFrame(TestsDataFrameBase, unittest.TestCase):
     def _create_data_frame(self, data_scalar = None, data_vlarr = None):
         return DictFrame(data_scalar, data_vlarr)
 
+class TestsDictFrameNoCast(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        return DictFrame(data_scalar, data_vlarr, cast = False)
+
+    def test_source_precision(self):
+        df = DictFrame(
+            { 'c' : np.arange(3, dtype = 'int16') },
+            { 'v' : [ np.arange(2, dtype = 'int16') ] * 3 },
+            dtype = 'float32', cast = False
+        )
+
+        self.assertEqual(df.get_vlarr('v', 0).dtype, np.int16)
+        self.assertEqual(df.get_scalar('c', 0).dtype, np.int16)
+
 if __name__ == '__main__':
     unittest.main()
 
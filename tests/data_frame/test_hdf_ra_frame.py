@@ -29,6 +29,120 @@ class TestsHDF5ReadAheadFrame3(TestsDataFrameBase, unittest.TestCase):
         hdf_data = create_hdf_data_bytes(data_scalar, data_vlarr)
         return HDF5ReadAheadFrame(hdf_data, chunk_size = 3)
 
+class TestsHDF5ReadAheadFrameColumnSet(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        hdf_data = create_hdf_data_bytes(data_scalar, data_vlarr)
+        columns  = list(data_scalar or {}) + list(data_vlarr or {})
+
+        return HDF5ReadAheadFrame(
+            hdf_data, chunk_size = 2, read_columns = columns
+        )
+
+class TestsHDF5ReadAheadFrameNoDirect(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        hdf_data = create_hdf_data_bytes(data_scalar, data_vlarr)
+        columns  = list(data_scalar or {}) + list(data_vlarr or {})
+
+        return HDF5ReadAheadFrame(
+            hdf_data, chunk_size = 2, read_columns = columns[:1],
+            read_direct = False
+        )
+
+class TestsHDF5ReadAheadFrameNoCast(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        hdf_data = create_hdf_data_bytes(data_scalar, data_vlarr)
+        return HDF5ReadAheadFrame(hdf_data, chunk_size = 2, cast = False)
+
+    def test_read_only_vlarrs(self):
+        df = self._create_data_frame(data_vlarr = self._data_vlarr)
+
+        with self.assertRaises(ValueError):
+            df.get_vlarr('vc1', 0)[0] = -100
+
+        self.assertEqual(df.get_vlarr('vc1', 0).tolist(), [ 1, 2 ])
+
+class TestsHDF5ReadAheadFrameChunkLayout(unittest.TestCase):
+
+    def test_chunk_size_alignment(self):
+        result = io.BytesIO()
+
+        with h5py.File(result, 'w') as f:
+            f.create_dataset('c1', data = np.arange(100), chunks = (8,))
+            f.create_dataset('c2', data = np.arange(100), chunks = (16,))
+
+        result.seek(0)
+
+        df = HDF5ReadAheadFrame(result, chunk_size = 20)
+        self.assertEqual(df.chunk_size, 32)
+
+        for idx in range(len(df)):
+            self.assertEqual(df.get_scalar('c1', idx), idx)
+            self.assertEqual(df.get_scalar('c2', idx), idx)
+
+class TestsHDF5ReadAheadFrameBatchReads(unittest.TestCase):
+
+    def test_read_columns_window_reads(self):
+        # pylint: disable=protected-access
+        result = io.BytesIO()
+        columns = [ 'c1', 'c2', 'c3', 'c4' ]
+
+        with h5py.File(result, 'w') as f:
+            for (idx, column) in enumerate(columns):
+                f.create_dataset(column, data = np.arange(100) + 1000 * idx)
+
+        result.seek(0)
+
+        df = HDF5ReadAheadFrame(
+            result, chunk_size = 10, read_columns = columns
+        )
+
+        n_reads = [ 0 ]
+        read_column_window = df._read_column_window
+
+        def counted_read_column_window(*args):
+            n_reads[0] += 1
+            return read_column_window(*args)
+
+        df._read_column_window = counted_read_column_window
+
+        indices = np.random.default_rng(0).permutation(100)
+
+        for (idx, column) in enumerate(columns):
+            self.assertEqual(
+                df.get_scalar_batch(column, indices).tolist(),
+                (indices + 1000 * idx).tolist()
+            )
+
+        # each of 10 windows is read once for all 4 columns
+        self.assertEqual(n_reads[0], 10 * len(columns))
+
+class TestsHDF5ReadAheadFrameColumnShape(unittest.TestCase):
+
+    def test_scalar_column_n1(self):
+        result = io.BytesIO()
+
+        with h5py.File(result, 'w') as f:
+            f.create_dataset('c1', data = np.arange(10).reshape((10, 1)))
+
+        for read_direct in [ True, False ]:
+            result.seek(0)
+            df = HDF5ReadAheadFrame(
+                result, chunk_size = 4, read_direct = read_direct
+            )
+
+            for idx in range(len(df)):
+                value = df.get_scalar('c1', idx)
+
+                self.assertEqual(np.shape(value), ())
+                self.assertEqual(value, idx)
+
+            self.assertEqual(
+                df.get_scalar_batch('c1', [ 7, 1, 4 ]).tolist(), [ 7, 1, 4 ]
+            )
+
 if __name__ == '__main__':
     unittest.main()
 
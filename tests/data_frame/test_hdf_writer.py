@@ -0,0 +1,76 @@
+"""Test round trip of data frames exported with `export_hdf5`"""
+
+import io
+import unittest
+
+import h5py
+
+from vlndata.data_frame.dict_frame   import DictFrame
+from vlndata.data_frame.hdf_frame    import HDF5Frame
+from vlndata.data_frame.hdf_ra_frame import HDF5ReadAheadFrame
+from vlndata.data_frame.hdf_writer   import export_hdf5
+from .tests_data_frame_base          import TestsDataFrameBase
+
+def export_hdf_data_bytes(data_scalar, data_vlarr, **kwargs):
+    result = io.BytesIO()
+    df     = DictFrame(data_scalar, data_vlarr, dtype = 'float32')
+
+    export_hdf5(df, result, **kwargs)
+
+    result.seek(0)
+    return result
+
+class TestsHDF5WriterRagged(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        hdf_data = export_hdf_data_bytes(
+            data_scalar, data_vlarr, chunk_size = 2
+        )
+        return HDF5Frame(hdf_data)
+
+    def test_ragged_layout(self):
+        hdf_data = export_hdf_data_bytes(
+            self._data_scalar, self._data_vlarr, chunk_size = 2
+        )
+
+        with h5py.File(hdf_data, 'r') as f:
+            self.assertEqual(f['c1'].shape, (5, ))
+            self.assertEqual(f['c1'].chunks, (2, ))
+            self.assertEqual(list(f['vc1']['offsets']), [ 0, 2, 2, 3, 7, 8 ])
+
+    def test_ragged_values_chunks(self):
+        data_vlarr = { 'vc1' : [ [], [], [], [], [ 1, 2, 3 ] * 20 ] * 4 }
+        hdf_data   = export_hdf_data_bytes(None, data_vlarr, chunk_size = 4)
+
+        with h5py.File(hdf_data, 'r') as f:
+            # chunks are sized by the mean length, not the empty first rows
+            self.assertEqual(f['vc1']['values'].chunks, (48, ))
+            self.assertEqual(f['vc1']['offsets'][-1], 240)
+
+class TestsHDF5WriterVlen(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        hdf_data = export_hdf_data_bytes(
+            data_scalar, data_vlarr, chunk_size = 2, ragged = False
+        )
+        return HDF5Frame(hdf_data)
+
+class TestsHDF5WriterGzipReadAhead(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        hdf_data = export_hdf_data_bytes(
+            data_scalar, data_vlarr, chunk_size = 2, compression = 'gzip'
+        )
+        return HDF5ReadAheadFrame(hdf_data, chunk_size = 3)
+
+class TestsHDF5WriterLzfReadAhead(TestsDataFrameBase, unittest.TestCase):
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        hdf_data = export_hdf_data_bytes(
+            data_scalar, data_vlarr, chunk_size = 2, compression = 'lzf',
+            ragged = False
+        )
+        return HDF5ReadAheadFrame(hdf_data, chunk_size = 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Test concatenation of multiple files with `ShardedFrame`"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from vlndata.data_frame import select_frame
+from vlndata.data_frame.sharded_frame import ShardedFrame
+from .tests_data_frame_base import TestsDataFrameBase
+from .test_csv_frame        import create_csv_data_str
+
+SHARD_BOUNDARIES = [ 0, 2, 3, 5 ]
+
+def slice_data(data, start, end):
+    if data is None:
+        return None
+
+    return { k : v[start:end] for (k, v) in data.items() }
+
+class TestsShardedFrame(TestsDataFrameBase, unittest.TestCase):
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _write_shards(self, data_scalar, data_vlarr):
+        for idx in range(len(SHARD_BOUNDARIES) - 1):
+            start = SHARD_BOUNDARIES[idx]
+            end   = SHARD_BOUNDARIES[idx + 1]
+
+            csv_data = create_csv_data_str(
+                slice_data(data_scalar, start, end),
+                slice_data(data_vlarr,  start, end),
+            )
+
+            path = os.path.join(self._tmpdir.name, f'shard_{idx:02d}.csv')
+
+            with open(path, 'wt') as f:
+                f.write(csv_data.read())
+
+    def _create_data_frame(self, data_scalar = None, data_vlarr = None):
+        self._write_shards(data_scalar, data_vlarr)
+
+        return ShardedFrame(
+            'csv-frame', os.path.join(self._tmpdir.name, 'shard_*.csv'),
+            max_open = 1
+        )
+
+    def test_shard_boundaries(self):
+        df = self._create_data_frame(data_scalar = self._data_scalar)
+
+        self.assertEqual(len(df.paths), 3)
+        self.assertTrue(np.all(df.shard_boundaries == SHARD_BOUNDARIES))
+        self.assertEqual(df.locate(2), (1, 0))
+        self.assertEqual(df.locate(4), (2, 1))
+
+    def test_select_frame(self):
+        self._write_shards(self._data_scalar, self._data_vlarr)
+
+        df = select_frame({
+            'name'    : 'sharded-frame',
+            'frame'   : { 'name' : 'csv-mem-frame' },
+            'paths'   : os.path.join(self._tmpdir.name, 'shard_*.csv'),
+            'lengths' : np.diff(SHARD_BOUNDARIES),
+        })
+
+        self._compare_vlarr_columns(self._data_vlarr, df, 'vc1')
+        self._compare_scalar_columns_by_index(self._data_scalar, df, 'c2')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Test train/val/test and k-fold splits of data frames"""
+
+import os
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from vlndata.data_frame            import kfold_split, train_test_split
+from vlndata.data_frame.dict_frame import DictFrame
+from vlndata.data_frame.hdf_frame  import HDF5Frame
+
+N_ROWS = 1000
+
+class CountingFrame(DictFrame):
+    """Dict Frame that counts whole column reads"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_reads = 0
+
+    def __getitem__(self, column):
+        self.n_reads += 1
+        return super().__getitem__(column)
+
+def create_frame():
+    prg = np.random.default_rng(0)
+
+    return CountingFrame({
+        'label' : (prg.uniform(size = N_ROWS) < 0.1).astype(np.int64),
+        'run'   : prg.integers(0, 50, size = N_ROWS),
+        'x'     : prg.normal(size = N_ROWS),
+    })
+
+class TestSplit(unittest.TestCase):
+
+    def _check_partition(self, parts):
+        indices = np.concatenate([ part.indices for part in parts ])
+        self.assertEqual(sorted(indices.tolist()), list(range(N_ROWS)))
+
+    def test_contiguous_split(self):
+        df = create_frame()
+        train, val, test = train_test_split(df, 0.2, 100)
+
+        self.assertEqual(train.indices.tolist(), list(range(700)))
+        self.assertEqual(val.indices.tolist(),   list(range(700, 900)))
+        self.assertEqual(test.indices.tolist(),  list(range(900, N_ROWS)))
+
+    def test_stratified_split(self):
+        df    = create_frame()
+        parts = train_test_split(df, 0.2, 0.2, stratify = 'label', seed = 1)
+
+        self._check_partition(parts)
+        fraction = np.mean(df['label'])
+
+        for (part, size) in zip(parts, [ 600, 200, 200 ]):
+            self.assertAlmostEqual(len(part), size, delta = 2)
+            self.assertAlmostEqual(
+                np.mean(part['label']), fraction, delta = 0.01
+            )
+
+    def test_binned_stratified_split(self):
+        df    = create_frame()
+        parts = train_test_split(df, 0.5, 0, stratify = 'x', bins = 4)
+
+        self._check_partition(parts)
+
+        for part in parts[:2]:
+            self.assertAlmostEqual(np.median(part['x']), 0, delta = 0.1)
+
+    def test_group_split(self):
+        df    = create_frame()
+        parts = train_test_split(df, 0.2, 0.2, groups = 'run')
+
+        self._check_partition(parts)
+
+        runs = [ set(part['run'].tolist()) for part in parts ]
+        self.assertEqual(len(runs[0] & runs[1]), 0)
+        self.assertEqual(len(runs[0] & runs[2]), 0)
+        self.assertEqual(len(runs[1] & runs[2]), 0)
+
+        for (part, size) in zip(parts, [ 600, 200, 200 ]):
+            self.assertAlmostEqual(len(part), size, delta = 60)
+
+    def test_hdf_n1_columns_split(self):
+        df = create_frame()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'data.h5')
+
+            with h5py.File(path, 'w') as f:
+                for column in [ 'run', 'x' ]:
+                    f.create_dataset(
+                        column, data = df[column].reshape((N_ROWS, 1))
+                    )
+
+            hdf = HDF5Frame(path)
+
+            parts = train_test_split(hdf, 0.5, 0, stratify = 'x', bins = 4)
+            self._check_partition(parts)
+
+            parts = train_test_split(hdf, 0.2, 0.2, groups = 'run')
+            self._check_partition(parts)
+
+            runs = [ set(np.ravel(part['run']).tolist()) for part in parts ]
+            self.assertEqual(len(runs[0] & runs[1]), 0)
+            self.assertEqual(len(runs[0] & runs[2]), 0)
+
+    def test_stratified_group_split(self):
+        with self.assertRaises(ValueError):
+            train_test_split(
+                create_frame(), 0.2, 0.2, stratify = 'label', groups = 'run'
+            )
+
+    def test_kfold_split(self):
+        df    = create_frame()
+        folds = kfold_split(df, 5, stratify = 'label')
+
+        self.assertEqual(len(folds), 5)
+        self._check_partition([ val for (_train, val) in folds ])
+
+        for (train, val) in folds:
+            self.assertEqual(len(train) + len(val), N_ROWS)
+            self.assertEqual(
+                len(set(train.indices.tolist()) & set(val.indices.tolist())),
+                0
+            )
+            self.assertAlmostEqual(len(val), 200, delta = 2)
+
+    def test_split_manifest(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'split.npz')
+
+            df     = create_frame()
+            parts1 = train_test_split(
+                df, 0.2, 0.2, groups = 'run', manifest = path
+            )
+            self.assertEqual(df.n_reads, 1)
+            self.assertTrue(os.path.exists(path))
+
+            df     = create_frame()
+            parts2 = train_test_split(
+                df, 0.2, 0.2, groups = 'run', manifest = path
+            )
+            self.assertEqual(df.n_reads, 0)
+
+            for (part1, part2) in zip(parts1, parts2):
+                self.assertTrue(np.array_equal(part1.indices, part2.indices))
+
+            # different split parameters invalidate the manifest
+            df = create_frame()
+            train_test_split(
+                df, 0.2, 0.2, groups = 'run', seed = 1, manifest = path
+            )
+            self.assertEqual(df.n_reads, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,25 @@
 """Test data slicing by a subframe decorator `DataFrame`"""
 
 import unittest
+import numpy as np
 
 from vlndata.data_frame.dict_frame import DictFrame
+from vlndata.data_frame.funcs      import coalesce_indices, scatter_sorted
+from vlndata.data_frame.shuffle_frame import ShuffleFrame
 from vlndata.data_frame.subframe   import SubFrame
 from .tests_data_frame_base        import TestDataFrameFuncs
 
+class RecordingFrame(DictFrame):
+    """Dict Frame that records the requested batches of rows"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def get_scalar_batch(self, column, indices):
+        self.requests.append(list(indices))
+        return super().get_scalar_batch(column, indices)
+
 class TestsDataSlice(unittest.TestCase, TestDataFrameFuncs):
 
     def test_scalar_subframe(self):
@@ -26,6 +40,68 @@ class TestsDataSlice(unittest.TestCase, TestDataFrameFuncs):
         df = SubFrame(DictFrame(None, data), indices)
         self._compare_vlarr_columns(data_vlarr, df, 'var')
 
+    def test_nested_subframes(self):
+        data_scalar = { 'var' : [ 1, 2, 3, 4, -1 ] }
+        data_vlarr  = { 'vl'  : [ [1, 2], [], [3], [4,5,6,7], [-1] ] }
+
+        base    = DictFrame(data_scalar, data_vlarr)
+        shuffle = ShuffleFrame(SubFrame(base, [ 4, 3, 1, 0 ]))
+        df      = SubFrame(shuffle, [ 2, 0 ])
+
+        indices_null = np.array([ 4, 3, 1, 0 ])[
+            np.random.default_rng(0).permutation(4)
+        ][[ 2, 0 ]]
+
+        self.assertIs(shuffle.base, base)
+        self.assertIs(df.base, base)
+        self.assertEqual(df.indices.tolist(), indices_null.tolist())
+
+        for (idx, idx_null) in enumerate(indices_null):
+            self.assertEqual(
+                df.get_scalar('var', idx), base.get_scalar('var', idx_null)
+            )
+            self.assertTrue(np.array_equal(
+                df.get_vlarr('vl', idx), base.get_vlarr('vl', idx_null)
+            ))
+
+    def test_sorted_batch_reads(self):
+        data = { 'var' : [ 10, 11, 12, 13, 14, 15 ] }
+        base = RecordingFrame(data)
+        df   = SubFrame(base, [ 5, 1, 3, 0 ])
+
+        result = df.get_scalar_batch('var', np.array([ 0, 3, 1, 0, 2 ]))
+
+        self.assertEqual(result.tolist(), [ 15, 10, 11, 15, 13 ])
+        self.assertEqual(base.requests, [ [ 0, 1, 3, 5, 5 ] ])
+
+class TestsIndexCoalescing(unittest.TestCase):
+
+    def test_coalesce_indices(self):
+        indices = np.array([ 1, 2, 2, 3, 7, 8, 20 ])
+
+        starts, ends, positions = coalesce_indices(indices)
+        self.assertEqual(starts.tolist(),    [ 1, 7, 20 ])
+        self.assertEqual(ends.tolist(),      [ 4, 9, 21 ])
+        self.assertEqual(positions.tolist(), [ 0, 1, 1, 2, 3, 4, 5 ])
+
+        starts, ends, positions = coalesce_indices(indices, max_gap = 3)
+        self.assertEqual(starts.tolist(),    [ 1, 20 ])
+        self.assertEqual(ends.tolist(),      [ 9, 21 ])
+        self.assertEqual(positions.tolist(), [ 0, 1, 1, 2, 6, 7, 8 ])
+
+    def test_scatter_sorted(self):
+        indices  = np.array([ 4, 0, 3, 0 ])
+        requests = []
+
+        def read_sorted(rows):
+            requests.append(rows.tolist())
+            return [ -x for x in rows ]
+
+        self.assertEqual(
+            scatter_sorted(indices, read_sorted), [ -4, 0, -3, 0 ]
+        )
+        self.assertEqual(requests, [ [ 0, 0, 3, 4 ] ])
+
 if __name__ == '__main__':
     unittest.main()
 
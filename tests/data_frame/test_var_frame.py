@@ -1,11 +1,22 @@
 """VarFrame tests"""
 
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
 import unittest
+
 import numpy as np
 
+from vlndata.data_frame.csv_frame  import CSVFrame
+
 from vlndata.data_frame.dict_frame import DictFrame
-from vlndata.data_frame.var_frame  import VarFrame
+from vlndata.data_frame.ragged     import RaggedArray
+from vlndata.data_frame.sharded_frame import ShardedFrame
+from vlndata.data_frame.var_frame  import VarFrame, get_var_func_signature
 from .tests_data_frame_base import TestDataFrameFuncs
+from .test_csv_frame        import create_csv_data_str
 
 class TestVarFrame(TestDataFrameFuncs, unittest.TestCase):
 
@@ -43,6 +54,195 @@ class TestVarFrame(TestDataFrameFuncs, unittest.TestCase):
             self._compare_scalar_columns(data, df, 'c1')
             self._compare_scalar_columns(data, df, 'var1')
 
+    def test_df_ragged_var(self):
+        variables = {
+            'mean' : lambda df : df.get_ragged('vc1').mean(),
+            'sq'   : lambda df : RaggedArray(
+                df.get_ragged('vc1').values ** 2, df.get_ragged('vc1').offsets
+            ),
+        }
+
+        data_mean = [ np.mean(x) if len(x) > 0 else np.nan
+            for x in self._data_vlarr['vc1'] ]
+        data_sq   = [ [ y**2 for y in x ] for x in self._data_vlarr['vc1'] ]
+
+        for lazy in [ True, False ]:
+            df = self._create_data_frame(variables, lazy)
+
+            for idx in range(len(df)):
+                self.assertTrue(np.allclose(
+                    df.get_scalar('mean', idx), data_mean[idx],
+                    equal_nan = True
+                ))
+
+            self._compare_vlarr_columns({ 'sq' : data_sq }, df, 'sq')
+            self.assertEqual(
+                df.get_ragged('sq').lengths.tolist(),
+                [ len(x) for x in data_sq ]
+            )
+
+    def test_df_dependent_vars(self):
+        variables = {
+            'var1' : lambda df : 2 * df['c1'],
+            'var2' : lambda df : df['var1'] + df['c2'],
+            'var3' : lambda df : df['var2'] * df['var1'],
+        }
+        depends = { 'var2' : [ 'var1' ], 'var3' : [ 'var2', 'var1' ] }
+
+        var1 = 2 * np.array(self._data_scalar['c1'])
+        var2 = var1 + np.array(self._data_scalar['c2'])
+        data = { 'var1' : var1, 'var2' : var2, 'var3' : var2 * var1 }
+
+        for (lazy, n_workers) in [ (True, 1), (False, 1), (False, 3) ]:
+            df = VarFrame(
+                DictFrame(self._data_scalar, self._data_vlarr), variables,
+                lazy, depends = depends, n_workers = n_workers
+            )
+
+            for column in data:
+                self._compare_scalar_columns(data, df, column)
+
+            self.assertEqual(set(df.timings), set(variables))
+
+    def test_df_circular_dependency(self):
+        variables = {
+            'var1' : lambda df : df['var2'],
+            'var2' : lambda df : df['var1'],
+        }
+
+        with self.assertRaises(ValueError):
+            VarFrame(
+                DictFrame(self._data_scalar), variables,
+                depends = { 'var1' : [ 'var2' ], 'var2' : [ 'var1' ] }
+            )
+
+        with self.assertRaises(ValueError):
+            VarFrame(
+                DictFrame(self._data_scalar), variables,
+                depends = { 'var1' : [ 'var3' ] }
+            )
+
+N_CALLS = []
+
+def calc_mean(df):
+    N_CALLS.append('mean')
+    return df.get_ragged('vc1').mean()
+
+def calc_sq(df):
+    N_CALLS.append('sq')
+    ragged = df.get_ragged('vc1')
+    return RaggedArray(ragged.values ** 2, ragged.offsets)
+
+def calc_lengths(df):
+    return np.array([
+        len(df.get_vlarr('vc1', idx)) for idx in range(len(df))
+    ])
+
+class TestVarFrameCache(unittest.TestCase):
+
+    def setUp(self):
+        # pylint: disable=consider-using-with
+        self._tmpdir    = tempfile.TemporaryDirectory()
+        self._path      = os.path.join(self._tmpdir.name, 'data.csv')
+        self._cache_dir = os.path.join(self._tmpdir.name, 'cache')
+        N_CALLS.clear()
+
+        self._write_csv(TestVarFrame._data_scalar, TestVarFrame._data_vlarr)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _write_csv(self, data_scalar, data_vlarr):
+        with open(self._path, 'wt') as f:
+            f.write(create_csv_data_str(data_scalar, data_vlarr).read())
+
+    def _create_data_frame(self):
+        return VarFrame(
+            CSVFrame(self._path),
+            { 'mean' : calc_mean, 'sq' : calc_sq },
+            cache_dir = self._cache_dir
+        )
+
+    def test_cache_reuse(self):
+        df1 = self._create_data_frame()
+        df2 = self._create_data_frame()
+
+        self.assertEqual(len(N_CALLS), 2)
+        self.assertTrue(np.allclose(
+            df1['mean'], df2['mean'], equal_nan = True
+        ))
+        self.assertIsInstance(df2.eval_var('mean'), np.memmap)
+
+        for idx in range(len(df1)):
+            self.assertTrue(np.allclose(
+                df1.get_vlarr('sq', idx), df2.get_vlarr('sq', idx)
+            ))
+
+    def test_cache_invalidation(self):
+        self._create_data_frame()
+
+        data_scalar = { **TestVarFrame._data_scalar }
+        data_vlarr  = { **TestVarFrame._data_vlarr, 'vc1' : [ [ 10 ] ] * 5 }
+        self._write_csv(data_scalar, data_vlarr)
+
+        df = self._create_data_frame()
+
+        self.assertEqual(len(N_CALLS), 4)
+        self.assertTrue(np.allclose(df['mean'], 10))
+
+    def test_pickled_frame(self):
+        df = self._create_data_frame()
+        df = pickle.loads(pickle.dumps(df))
+
+        self.assertEqual(len(N_CALLS), 2)
+        self.assertIsInstance(df.eval_var('mean'), np.memmap)
+
+    def test_concurrent_row_frames(self):
+        prg        = np.random.default_rng(0)
+        data_vlarr = {
+            'vc1' : [ prg.integers(10, size = 5).tolist() for _ in range(300) ]
+        }
+        data_sums  = np.array([ np.sum(x) for x in data_vlarr['vc1'] ])
+
+        self._write_csv(None, data_vlarr)
+        variables = {
+            f'var{idx}' : lambda df : df.get_ragged('vc1').sum()
+                for idx in range(8)
+        }
+
+        # switch threads often to expose races
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+        try:
+            df = VarFrame(
+                ShardedFrame(
+                    'csv-mem-frame', [ self._path ] * 3, max_open = 1
+                ),
+                variables, n_workers = 4
+            )
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        for column in variables:
+            self.assertTrue(np.array_equal(df[column], np.tile(data_sums, 3)))
+
+    def test_signature_across_processes(self):
+        signature = get_var_func_signature(calc_lengths)
+        result    = subprocess.run(
+            [
+                sys.executable, '-c',
+                'from vlndata.data_frame.var_frame import '
+                'get_var_func_signature;'
+                'from tests.data_frame.test_var_frame import calc_lengths;'
+                'print(get_var_func_signature(calc_lengths))'
+            ],
+            capture_output = True, check = True, text = True,
+            cwd = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        )
+
+        self.assertEqual(result.stdout.strip(), signature)
+
 if __name__ == '__main__':
     unittest.main()
 
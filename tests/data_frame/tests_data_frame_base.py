@@ -122,3 +122,48 @@ class TestsDataFrameBase(TestDataFrameFuncs):
         self._compare_scalar_columns(self._data_scalar, df, 'c2')
         self._compare_scalar_columns(self._data_scalar, df, 'c3')
 
+
+    def test_ragged_column(self):
+        df = self._create_data_frame(
+            data_scalar = self._data_scalar, data_vlarr = self._data_vlarr
+        )
+
+        for column in [ 'vc1', 'vc2', 'vc3' ]:
+            data_null = self._data_vlarr[column]
+            ragged    = df.get_ragged(column)
+
+            self.assertEqual(len(ragged), len(data_null))
+            self.assertEqual(
+                ragged.lengths.tolist(), [ len(x) for x in data_null ]
+            )
+
+            for (idx, values) in enumerate(data_null):
+                self.assertTrue(np.all(np.isclose(ragged[idx], values)))
+
+            self.assertTrue(np.allclose(
+                ragged.sum(), [ np.sum(x) for x in data_null ]
+            ))
+
+    def test_batch_accessors(self):
+        df = self._create_data_frame(
+            data_scalar = self._data_scalar, data_vlarr = self._data_vlarr
+        )
+        indices = np.array([ 3, 0, 4, 0, 1 ])
+
+        for column in [ 'c1', 'c2', 'c3' ]:
+            values = df.get_scalar_batch(column, indices)
+
+            self.assertEqual(values.shape, (len(indices), ))
+            self.assertTrue(np.allclose(
+                values, [ df.get_scalar(column, idx) for idx in indices ]
+            ))
+
+        for column in [ 'vc1', 'vc2', 'vc3' ]:
+            values = df.get_vlarr_batch(column, indices)
+
+            self.assertEqual(len(values), len(indices))
+
+            for (value, idx) in zip(values, indices):
+                self.assertTrue(np.array_equal(
+                    value, df.get_vlarr(column, idx)
+                ))
@@ -91,6 +91,44 @@ class TestCollateFunc(TestDataLoaderFuncs, unittest.TestCase):
         data_test = vldata_dict_collate(batch_test, pad = p)
         self._compare_data(data_test, data_null)
 
+    def test_collate_dtype(self):
+        batch_test = [
+            {
+                'scalar' : np.array([ 1, 2 ], dtype = 'int16'),
+                'vlarr'  : np.array([ [1, 2], [3, 4] ], dtype = 'int16'),
+            },
+            {
+                'scalar' : np.array([ 3, 4 ], dtype = 'int16'),
+                'vlarr'  : np.array([ [5, 6] ], dtype = 'int16'),
+            },
+        ]
+        data_null  = {
+            'scalar' : np.array([ [ 1, 2 ], [ 3, 4 ] ], dtype = 'float32'),
+            'vlarr'  : np.array(
+                [ [ [1, 2], [3, 4] ], [ [5, 6], [0, 0] ] ], dtype = 'float32'
+            ),
+        }
+
+        data_test = vldata_dict_collate(batch_test, dtype = 'float32')
+        self._compare_data(data_test, data_null)
+
+        for value in data_test.values():
+            self.assertEqual(value.dtype, np.float32)
+
+    def test_collate_group_dtypes(self):
+        batch_test = [
+            { 'ids' : np.array([ 1, 2 ]), 'x' : np.array([ 0.5, 1.5 ]) },
+            { 'ids' : np.array([ 3, 4 ]), 'x' : np.array([ 2.5, 3.5 ]) },
+        ]
+
+        data_test = vldata_dict_collate(
+            batch_test, dtype = { 'ids' : 'int16', 'x' : 'float16' }
+        )
+
+        self.assertEqual(data_test['ids'].dtype, np.int16)
+        self.assertEqual(data_test['x'].dtype,   np.float16)
+        self.assertEqual(data_test['x'].tolist(), [ [0.5, 1.5], [2.5, 3.5] ])
+
 if __name__ == '__main__':
     unittest.main()
 
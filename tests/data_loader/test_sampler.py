@@ -0,0 +1,379 @@
+"""Test samplers and the epoch plan of the data loader"""
+
+import unittest
+import numpy as np
+
+from vlndata.data_frame.dict_frame import DictFrame
+from vlndata.data_loader import (
+    BatchSampler, BlockShuffleSampler, BucketBatchSampler, DataLoader,
+    DistributedBatchSampler, DistributedSampler, RandomSampler,
+    SequentialSampler, WeightedSampler
+)
+from vlndata.data_loader.sampler import construct_alias_table
+from vlndata.dataset.vldataset import VLDataset
+
+N_ROWS = 50
+
+def create_dataset():
+    prg     = np.random.default_rng(0)
+    lengths = prg.integers(0, 10, size = N_ROWS)
+
+    df = DictFrame(
+        { 'x' : np.arange(N_ROWS) },
+        {
+            'v' : [
+                np.full(length, idx) for (idx, length) in enumerate(lengths)
+            ]
+        }
+    )
+
+    return VLDataset(df, { 'x' : [ 'x' ] }, { 'v' : [ 'v' ] })
+
+class TestSampler(unittest.TestCase):
+
+    def test_sequential_sampler(self):
+        sampler = SequentialSampler(N_ROWS)
+
+        self.assertEqual(len(sampler), N_ROWS)
+        self.assertEqual(sampler.get_indices(3).tolist(), list(range(N_ROWS)))
+
+    def test_random_sampler(self):
+        sampler = RandomSampler(N_ROWS, seed = 1)
+        epoch0  = sampler.get_indices(0)
+
+        self.assertEqual(sorted(epoch0.tolist()), list(range(N_ROWS)))
+        self.assertTrue(np.array_equal(epoch0, sampler.get_indices(0)))
+        self.assertTrue(np.array_equal(
+            epoch0, RandomSampler(N_ROWS, seed = 1).get_indices(0)
+        ))
+        self.assertFalse(np.array_equal(epoch0, sampler.get_indices(1)))
+
+    def test_block_shuffle_sampler(self):
+        sampler = BlockShuffleSampler(N_ROWS, 8)
+        indices = sampler.get_indices(0)
+
+        self.assertEqual(sorted(indices.tolist()), list(range(N_ROWS)))
+
+        blocks = np.split(indices, np.flatnonzero(indices % 8 == 0)[1:])
+
+        for block in blocks:
+            self.assertEqual(block[0] % 8, 0)
+            self.assertEqual(
+                block.tolist(), list(range(block[0], block[0] + len(block)))
+            )
+
+        self.assertFalse(np.array_equal(indices, np.arange(N_ROWS)))
+
+    def test_block_boundaries(self):
+        boundaries = np.array([ 0, 5, 20, 21, N_ROWS ])
+        sampler    = BlockShuffleSampler(N_ROWS, 0, boundaries = boundaries)
+        indices    = sampler.get_indices(2)
+
+        self.assertEqual(sorted(indices.tolist()), list(range(N_ROWS)))
+
+        blocks = np.split(indices, np.flatnonzero(np.diff(indices) != 1) + 1)
+        blocks = sorted((block[0], block[-1] + 1) for block in blocks)
+        edges  = [ edge for block in blocks for edge in block ]
+
+        self.assertTrue(set(edges) <= set(boundaries.tolist()))
+
+    def test_distributed_sampler(self):
+        sampler = RandomSampler(N_ROWS, seed = 3)
+
+        for drop_last in [ False, True ]:
+            for contiguous in [ False, True ]:
+                ranks = [
+                    DistributedSampler(
+                        sampler, rank, 3, drop_last, contiguous
+                    )
+                        for rank in range(3)
+                ]
+                parts = [ rank.get_indices(1) for rank in ranks ]
+
+                for (rank, part) in zip(ranks, parts):
+                    self.assertEqual(len(part), len(rank))
+                    self.assertEqual(len(part), 16 if drop_last else 17)
+
+                indices = np.concatenate(parts)
+
+                if drop_last:
+                    self.assertEqual(len(set(indices.tolist())), 48)
+                else:
+                    self.assertEqual(set(indices.tolist()), set(range(N_ROWS)))
+
+        with self.assertRaises(ValueError):
+            DistributedSampler(sampler, 3, 3)
+
+    def test_distributed_batch_sampler(self):
+        sampler = BucketBatchSampler(np.arange(N_ROWS), 4)
+
+        for (drop_last, n_batches) in [ (False, 5), (True, 4) ]:
+            ranks = [
+                DistributedBatchSampler(sampler, rank, 3, drop_last)
+                    for rank in range(3)
+            ]
+            parts = [ rank.get_batches(0) for rank in ranks ]
+
+            for (rank, part) in zip(ranks, parts):
+                self.assertEqual(len(part), len(rank))
+                self.assertEqual(len(part), n_batches)
+
+            indices = np.concatenate([
+                np.concatenate(part) for part in parts
+            ])
+
+            if not drop_last:
+                self.assertEqual(set(indices.tolist()), set(range(N_ROWS)))
+
+    def test_alias_table(self):
+        weights     = np.array([ 1, 0, 3, 0.5, 5.5 ])
+        prob, alias = construct_alias_table(weights)
+
+        # probability of each row is the sum over the table columns
+        result = prob.copy()
+        np.add.at(result, alias, 1 - prob)
+
+        self.assertTrue(np.allclose(result / len(weights), weights / 10))
+
+    def test_weighted_sampler(self):
+        weights = np.array([ 1, 0, 3, 6 ])
+        sampler = WeightedSampler(weights, 100000, seed = 1)
+        indices = sampler.get_indices(0)
+
+        self.assertEqual(len(indices), len(sampler))
+        self.assertTrue(np.array_equal(indices, sampler.get_indices(0)))
+        self.assertTrue(np.allclose(
+            np.bincount(indices, minlength = 4) / 100000, weights / 10,
+            atol = 0.01
+        ))
+
+        # the row of zero weight is never sampled, so it is not corrected for
+        importance = sampler.importance_weights[indices]
+        self.assertAlmostEqual(np.mean(importance), 0.75, delta = 0.01)
+
+    def test_weighted_sampler_without_replacement(self):
+        weights = np.array([ 1, 0, 3, 6, 0, 2 ])
+        sampler = WeightedSampler(weights, replacement = False, n_samples = 4)
+
+        indices = sampler.get_indices(0)
+        self.assertEqual(sorted(indices.tolist()), [ 0, 2, 3, 5 ])
+
+        firsts = np.bincount(
+            [ sampler.get_indices(epoch)[0] for epoch in range(10000) ],
+            minlength = 6
+        )
+        self.assertTrue(
+            np.allclose(firsts / 10000, weights / 12, atol = 0.02)
+        )
+
+        with self.assertRaises(ValueError):
+            WeightedSampler(weights, replacement = False)
+
+        with self.assertRaises(ValueError):
+            WeightedSampler(np.array([ 1, -1 ]))
+
+    def test_frame_weights(self):
+        df = DictFrame({ 'w' : np.array([ 0, 1, 0, 1 ]) }, None)
+
+        for weights in [ 'w', lambda df : 1 - df['w'] ]:
+            sampler = WeightedSampler.from_frame(df, weights)
+            indices = set(sampler.get_indices(0).tolist())
+
+            if weights == 'w':
+                self.assertEqual(indices, { 1, 3 })
+            else:
+                self.assertEqual(indices, { 0, 2 })
+
+    def test_frame_weights_n1(self):
+        df = DictFrame({ 'w' : np.array([ 0, 1, 0, 2 ]).reshape((4, 1)) })
+
+        for replacement in [ True, False ]:
+            sampler = WeightedSampler.from_frame(
+                df, 'w', n_samples = 2, replacement = replacement
+            )
+            indices = sampler.get_indices(0)
+
+            self.assertEqual(indices.shape, (2, ))
+            self.assertEqual(sampler.importance_weights.shape, (4, ))
+            self.assertTrue(set(indices.tolist()) <= { 1, 3 })
+
+        with self.assertRaises(ValueError):
+            WeightedSampler(np.ones((4, 1)))
+
+    def test_batch_sampler(self):
+        sampler = SequentialSampler(N_ROWS)
+
+        batches = BatchSampler(sampler, 8).get_batches(0)
+        self.assertEqual(len(batches), 7)
+        self.assertEqual(len(BatchSampler(sampler, 8)), 7)
+        self.assertEqual(batches[-1].tolist(), [ 48, 49 ])
+
+        batches = BatchSampler(sampler, 8, drop_last = True).get_batches(0)
+        self.assertEqual(len(batches), 6)
+        self.assertEqual(len(BatchSampler(sampler, 8, drop_last = True)), 6)
+
+    def test_bucket_batch_sampler(self):
+        prg     = np.random.default_rng(0)
+        lengths = prg.integers(0, 100, size = 1000)
+
+        for drop_last in [ False, True ]:
+            sampler = BucketBatchSampler(
+                lengths, 10, pool_batches = 7, drop_last = drop_last
+            )
+            batches = sampler.get_batches(0)
+
+            self.assertEqual(len(batches), len(sampler))
+
+        sampler = BucketBatchSampler(lengths, 10, pool_batches = 10)
+        batches = sampler.get_batches(0)
+        indices = np.concatenate(batches)
+
+        self.assertEqual(sorted(indices.tolist()), list(range(1000)))
+
+        spread_bucket = np.mean([
+            np.ptp(lengths[batch]) for batch in batches
+        ])
+        spread_random = np.mean([
+            np.ptp(lengths[batch])
+                for batch in BatchSampler(RandomSampler(1000), 10)
+                    .get_batches(0)
+        ])
+
+        self.assertLess(spread_bucket, spread_random / 4)
+
+class TestDataLoaderPlan(unittest.TestCase):
+
+    def test_epochs(self):
+        dl = DataLoader(create_dataset(), 8, seed = 1)
+
+        epoch0 = np.concatenate([ batch['x'][:, 0] for batch in dl ])
+        self.assertEqual(dl.cursor, (0, 7))
+
+        epoch1 = np.concatenate([ batch['x'][:, 0] for batch in dl ])
+        self.assertEqual(dl.cursor, (1, 7))
+
+        self.assertEqual(sorted(epoch0.tolist()), list(range(N_ROWS)))
+        self.assertFalse(np.array_equal(epoch0, epoch1))
+        self.assertTrue(
+            np.array_equal(epoch1, np.concatenate(dl.get_plan(1)))
+        )
+
+    def test_resume(self):
+        dset = create_dataset()
+        dl   = DataLoader(dset, 8, seed = 1)
+
+        list(dl)
+        expected = [ batch['x'] for batch in dl ][3:]
+
+        dl = DataLoader(dset, 8, seed = 1)
+        dl.set_cursor(1, 3)
+        result = [ batch['x'] for batch in dl ]
+
+        self.assertEqual(len(result), len(expected))
+
+        for (batch_result, batch_expected) in zip(result, expected):
+            self.assertTrue(np.array_equal(batch_result, batch_expected))
+
+        self.assertEqual(dl.cursor, (1, 7))
+
+    def test_getitem(self):
+        dl = DataLoader(create_dataset(), 8, seed = 1)
+
+        # the dataset order until the first epoch starts
+        self.assertEqual(dl[1]['x'][:, 0].tolist(), list(range(8, 16)))
+
+        iter(dl)
+
+        for (index, indices) in enumerate(dl.plan):
+            self.assertEqual(dl[index]['x'][:, 0].tolist(), indices.tolist())
+
+    def test_next(self):
+        dl = DataLoader(create_dataset(), 8, seed = 1)
+
+        batch = next(dl)
+        self.assertEqual(dl.cursor, (0, 1))
+        self.assertEqual(batch['x'][:, 0].tolist(), dl.plan[0].tolist())
+
+        self.assertIs(iter(dl), dl)
+        batches = [ next(dl) for _ in range(len(dl)) ]
+
+        self.assertEqual(dl.cursor, (1, 7))
+        self.assertEqual(
+            np.concatenate([ batch['x'][:, 0] for batch in batches ]).tolist(),
+            np.concatenate(dl.get_plan(1)).tolist()
+        )
+
+        with self.assertRaises(StopIteration):
+            next(dl)
+
+    def test_prefetch(self):
+        dset = create_dataset()
+
+        for sampler in [ None, BucketBatchSampler(np.arange(N_ROWS), 4) ]:
+            dl_null = DataLoader(dset, 4, sampler = sampler)
+            dl_test = DataLoader(dset, 4, sampler = sampler, prefetch = 3)
+
+            for _epoch in range(2):
+                batches_null = list(dl_null)
+                batches_test = list(dl_test)
+
+                self.assertEqual(len(batches_null), len(batches_test))
+
+                for (batch_null, batch_test) in zip(
+                    batches_null, batches_test
+                ):
+                    for key in batch_null:
+                        self.assertTrue(
+                            np.array_equal(batch_null[key], batch_test[key])
+                        )
+
+    def test_sampler(self):
+        dl = DataLoader(
+            create_dataset(), 8, sampler = SequentialSampler(N_ROWS),
+            drop_last = True
+        )
+
+        self.assertEqual(len(dl), 6)
+        self.assertEqual(
+            np.concatenate([ batch['x'][:, 0] for batch in dl ]).tolist(),
+            list(range(48))
+        )
+
+    def test_weights(self):
+        dset    = create_dataset()
+        sampler = WeightedSampler(np.arange(N_ROWS) + 1, seed = 4)
+        dl      = DataLoader(
+            dset, 8, sampler = sampler, weights = sampler.importance_weights
+        )
+
+        for batch in dl:
+            self.assertTrue(np.allclose(
+                batch['weight'], 25.5 / (batch['x'][:, 0] + 1)
+            ))
+
+    def test_distributed(self):
+        dset    = create_dataset()
+        loaders = [
+            DataLoader(dset, 4, seed = 2, rank = rank, world_size = 3)
+                for rank in range(3)
+        ]
+
+        for _epoch in range(2):
+            indices = []
+
+            for dl in loaders:
+                batches = list(dl)
+                self.assertEqual(len(batches), len(dl))
+                self.assertEqual(len(batches), 5)
+
+                indices.append(
+                    np.concatenate([ batch['x'][:, 0] for batch in batches ])
+                )
+
+            # 50 rows are padded to 51 to divide evenly among the ranks
+            indices = np.concatenate(indices)
+            self.assertEqual(len(indices), 51)
+            self.assertEqual(set(indices.tolist()), set(range(N_ROWS)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""Test saving and restoring the state of data loaders"""
+
+import unittest
+import numpy as np
+
+from vlndata.data_frame.dict_frame import DictFrame
+from vlndata.data_loader import DataLoader
+from vlndata.dataset.dataset_transform import DatasetTransform
+from vlndata.dataset.transform import NoiseTransform, VLArrShuffleTransform
+from vlndata.dataset.vldataset import VLDataset
+
+N_ROWS = 30
+
+def create_dataset():
+    df = DictFrame(
+        { 'x' : np.arange(N_ROWS) },
+        { 'v' : [ np.arange(idx % 7) for idx in range(N_ROWS) ] }
+    )
+    dset = VLDataset(df, { 'x' : [ 'x' ] }, { 'v' : [ 'v' ] })
+
+    return DatasetTransform(dset, [
+        VLArrShuffleTransform('v', seed = 1),
+        NoiseTransform(
+            { 'name' : 'uniform', 'a' : 0, 'b' : 1 },
+            scalar_groups = { 'x' : [ 'x' ] }
+        ),
+    ])
+
+def load_epochs(dl, n_epochs):
+    return [ batch for _epoch in range(n_epochs) for batch in dl ]
+
+class TestDataLoaderState(unittest.TestCase):
+
+    def _compare_batches(self, batches_test, batches_null):
+        self.assertEqual(len(batches_test), len(batches_null))
+
+        for (batch_test, batch_null) in zip(batches_test, batches_null):
+            for key in batch_null:
+                self.assertTrue(
+                    np.array_equal(batch_test[key], batch_null[key])
+                )
+
+    def _test_resume(self, prefetch):
+        batches_null = load_epochs(DataLoader(create_dataset(), 4), 2)
+
+        dl = DataLoader(create_dataset(), 4, prefetch = prefetch)
+        batches_test = load_epochs(dl, 1)
+
+        for batch in dl:
+            batches_test.append(batch)
+
+            if len(batches_test) == 11:
+                break
+
+        state = dl.state_dict()
+        self.assertEqual((state['epoch'], state['batch']), (1, 3))
+
+        # continue in a new process, e.g. after a preemption
+        dl = DataLoader(create_dataset(), 4, prefetch = prefetch)
+        dl.load_state_dict(state)
+
+        batches_test += load_epochs(dl, 1)
+        self._compare_batches(batches_test, batches_null)
+
+        self.assertEqual(dl.cursor, (1, 8))
+
+    def test_resume(self):
+        self._test_resume(0)
+
+    def test_resume_prefetch(self):
+        self._test_resume(3)
+
+    def test_resume_finished_epoch(self):
+        batches_null = load_epochs(DataLoader(create_dataset(), 4), 2)
+
+        dl = DataLoader(create_dataset(), 4)
+        batches_test = load_epochs(dl, 1)
+        state = dl.state_dict()
+
+        dl = DataLoader(create_dataset(), 4)
+        dl.load_state_dict(state)
+
+        batches_test += load_epochs(dl, 1)
+        self._compare_batches(batches_test, batches_null)
+
+    def test_resume_prefetched_iterator(self):
+        batches_null = load_epochs(DataLoader(create_dataset(), 4), 1)
+
+        # checkpoint while the iterator is still alive
+        dl       = DataLoader(create_dataset(), 4, prefetch = 4)
+        iterator = iter(dl)
+        batches_test = [ next(iterator) for _ in range(2) ]
+        state = dl.state_dict()
+
+        dl = DataLoader(create_dataset(), 4)
+        dl.load_state_dict(state)
+
+        batches_test += load_epochs(dl, 1)
+        self._compare_batches(batches_test, batches_null)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,6 +25,24 @@ class TestDatasetBase(TestDatasetFuncs):
     ):
         raise RuntimeError
 
+    def test_get_batch(self):
+        scalar_groups = { 'test1' : [ 'c1', 'c3' ], 'test2' : [ 'c2' ] }
+        vlarr_groups  = { 'v-test1' : [ 'vc1', 'vc3' ], 'v-test2' : [ 'vc2' ] }
+        indices       = np.array([ 3, 1, 0, 3 ])
+
+        dset  = self._construct_dataset(scalar_groups, vlarr_groups)
+        batch = dset.get_batch(indices)
+
+        self.assertEqual(len(batch), len(indices))
+
+        for (sample, index) in zip(batch, indices):
+            sample_null = dset[index]
+            self.assertEqual(set(sample), set(sample_null))
+
+            for (name, value) in sample_null.items():
+                self.assertEqual(sample[name].dtype, value.dtype)
+                self.assertTrue(np.array_equal(sample[name], value))
+
     def test_single_scalar(self):
         scalar_groups = { 'test1' : [ 'c1', ] }
         vlarr_groups  = None
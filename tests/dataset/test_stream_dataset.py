@@ -0,0 +1,96 @@
+import io
+import unittest
+import numpy as np
+
+from vlndata.data_frame.frame_stream import CSVFrameStream, HDF5FrameStream
+from vlndata.data_loader.data_loader import DataLoader
+from vlndata.dataset.stream_dataset  import StreamDataset
+from vlndata.dataset.vldataset       import VLDataset
+
+from ..data_frame.test_csv_frame import create_csv_data_str
+from ..data_frame.test_hdf_frame import create_hdf_data_bytes
+from .test_dataset_base import DATA_SCALAR, DATA_VLARR, TestDatasetBase
+
+SCALAR_GROUPS = { 's-test1' : [ 'c1', 'c3' ], 's-test2' : [ 'c2' ] }
+VLARR_GROUPS  = { 'v-test1' : [ 'vc1', 'vc3' ], 'v-test2' : [ 'vc2' ] }
+
+class TestStreamDataset(unittest.TestCase):
+
+    def _compare_samples(self, samples_test, samples_null):
+        self.assertEqual(len(samples_test), len(samples_null))
+
+        for (test, null) in zip(samples_test, samples_null):
+            self.assertEqual(set(test.keys()), set(null.keys()))
+
+            for key in null:
+                self.assertEqual(test[key].shape, null[key].shape)
+                self.assertTrue(np.all(np.isclose(test[key], null[key])))
+
+    def _get_null_samples(self):
+        dset = VLDataset(TestDatasetBase.df, SCALAR_GROUPS, VLARR_GROUPS)
+        return [ dset[idx] for idx in range(len(dset)) ]
+
+    def test_csv_stream(self):
+        for chunk_size in [ 1, 2, 5 ]:
+            stream = CSVFrameStream(
+                create_csv_data_str(DATA_SCALAR, DATA_VLARR),
+                chunk_size = chunk_size
+            )
+            dset = StreamDataset(stream, SCALAR_GROUPS, VLARR_GROUPS)
+
+            self._compare_samples(list(dset), self._get_null_samples())
+
+    def test_csv_stream_single_element_vlarrs(self):
+        data   = 'c1,vc1\n1,"1,2"\n2,"3"\n3,"4.5"\n4,\n'
+        stream = CSVFrameStream(io.StringIO(data), chunk_size = 2)
+        dset   = StreamDataset(stream, { 's' : [ 'c1' ] }, { 'v' : [ 'vc1' ] })
+
+        vlarrs = [ sample['v'][:, 0].tolist() for sample in dset ]
+        self.assertEqual(vlarrs, [ [ 1, 2 ], [ 3 ], [ 4.5 ], [] ])
+
+    def test_hdf_stream(self):
+        for chunk_size in [ 1, 3 ]:
+            stream = HDF5FrameStream(
+                create_hdf_data_bytes(DATA_SCALAR, DATA_VLARR),
+                chunk_size = chunk_size
+            )
+            dset = StreamDataset(stream, SCALAR_GROUPS, VLARR_GROUPS)
+
+            self._compare_samples(list(dset), self._get_null_samples())
+
+    def test_shuffle_buffer(self):
+        stream = CSVFrameStream(
+            create_csv_data_str(DATA_SCALAR, DATA_VLARR), chunk_size = 2
+        )
+        dset = StreamDataset(
+            stream, SCALAR_GROUPS, VLARR_GROUPS, shuffle_buffer = 3, seed = 1
+        )
+
+        samples      = list(dset)
+        samples_null = self._get_null_samples()
+
+        # c1 is a unique row identifier
+        order = [ int(x['s-test1'][0]) for x in samples ]
+        self.assertEqual(sorted(order), sorted(DATA_SCALAR['c1']))
+
+        samples_null = [
+            samples_null[DATA_SCALAR['c1'].index(x)] for x in order
+        ]
+
+        self._compare_samples(samples, samples_null)
+
+    def test_stream_loader(self):
+        stream = CSVFrameStream(
+            create_csv_data_str(DATA_SCALAR, DATA_VLARR), chunk_size = 2
+        )
+        dset = StreamDataset(stream, SCALAR_GROUPS, VLARR_GROUPS)
+        dl   = DataLoader(dset, batch_size = 2)
+
+        batches = list(dl)
+
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(batches[0]['s-test1'].shape, (2, 2))
+        self.assertEqual(batches[2]['v-test1'].shape, (1, 1, 2))
+
+if __name__ == '__main__':
+    unittest.main()
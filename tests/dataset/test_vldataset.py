@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
 
+from vlndata.data_frame.dict_frame import DictFrame
 from vlndata.dataset.vldataset import VLDataset
 from .test_dataset_base import TestDatasetBase, DATA_VLARR
 
@@ -38,6 +39,32 @@ class TestVLDataset(TestDatasetBase, unittest.TestCase):
 
         self._compare_data(dset, data_null)
 
+    def test_group_dtypes(self):
+        scalar_groups = { 'test1' : [ 'c1', 'c2' ], 'test2' : [ 'c3' ] }
+        vlarr_groups  = { 'v-test1' : [ 'vc1', 'vc3' ], 'v-test2' : [ 'vc2' ] }
+        dtypes = { 'test1' : 'int16', 'v-test1' : 'float16' }
+
+        dset = VLDataset(
+            self.df, scalar_groups, vlarr_groups, dtypes = dtypes
+        )
+        data = dset[0]
+
+        self.assertEqual(data['test1'].dtype,   np.int16)
+        self.assertEqual(data['test2'].dtype,   self.df.dtype)
+        self.assertEqual(data['v-test1'].dtype, np.float16)
+        self.assertEqual(data['v-test2'].dtype, self.df.dtype)
+
+    def test_promoted_vlarr_dtype(self):
+        df = DictFrame(
+            None, { 'ids' : [ [ 1, 2 ] ], 'e' : [ [ 0.5, 1.7 ] ] },
+            cast = False
+        )
+        dset = VLDataset(df, vlarr_groups = { 'v' : [ 'ids', 'e' ] })
+
+        for sample in [ dset[0], dset.get_batch([ 0 ])[0] ]:
+            self.assertEqual(sample['v'].dtype, np.float64)
+            self.assertEqual(sample['v'].tolist(), [ [ 1, 0.5 ], [ 2, 1.7 ] ])
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,115 @@
+"""Test the data loading autotuner"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from vlndata.autotune import (
+    AutoTuner, autotune, find_frame_knob, get_frame_knob, set_frame_knob
+)
+from vlndata.data_frame  import DictFrame, export_hdf5, select_frame
+from vlndata.data_loader import DataLoader
+from vlndata.dataset     import construct_dataset
+
+N_ROWS = 600
+
+def create_frame():
+    prg = np.random.default_rng(0)
+
+    return DictFrame(
+        { 'x' : prg.normal(size = N_ROWS) },
+        { 'v' : [ prg.normal(size = idx % 9) for idx in range(N_ROWS) ] },
+        dtype = 'float32'
+    )
+
+GROUPS = {
+    'scalar_groups' : { 'x' : [ 'x' ] },
+    'vlarr_groups'  : { 'v' : [ 'v' ] },
+}
+
+class TestAutoTune(unittest.TestCase):
+
+    def test_frame_knobs(self):
+        frame = {
+            'name'  : 'sharded-frame',
+            'frame' : 'hdf-ra-frame',
+            'paths' : [],
+        }
+
+        self.assertEqual(find_frame_knob(frame, 'max_open'), ('max_open', ))
+        self.assertEqual(
+            find_frame_knob(frame, 'chunk_size'), ('frame', 'chunk_size')
+        )
+        self.assertIsNone(find_frame_knob(frame, 'index_threads'))
+
+        path   = ('frame', 'chunk_size')
+        result = set_frame_knob(frame, path, 64)
+
+        self.assertEqual(get_frame_knob(frame,  path), 1024)
+        self.assertEqual(get_frame_knob(result, path), 64)
+        self.assertEqual(frame['frame'], 'hdf-ra-frame')
+
+    def test_autotune_hdf(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'data.h5')
+            export_hdf5(create_frame(), path, chunk_size = 64)
+
+            knobs = {
+                'chunk_size' : [ 32, 256 ],
+                'batch_size' : [ 16, 64 ],
+                'prefetch'   : [ 0, 1 ],
+            }
+            tuner = AutoTuner(
+                { 'frame' : { 'name' : 'hdf-ra-frame', 'path' : path },
+                  **GROUPS },
+                knobs, batch_size = 16, cache_budget = 2**30,
+                trial_rows = 200
+            )
+            config = tuner.tune()
+
+            # initial + 2 chunk sizes + 2 caches + 2 batch sizes + 2 prefetch
+            # trials, some of which are repeated and not run again
+            self.assertLessEqual(len(tuner.trials), 9)
+            self.assertGreaterEqual(len(tuner.trials), 5)
+            self.assertIn(True, [ t['knobs']['cache'] for t in tuner.trials ])
+
+            self.assertEqual(
+                config['rows_per_s'],
+                max(t['rows_per_s'] for t in tuner.trials)
+            )
+
+            frame = config['dataset']['frame']
+            self.assertIn(frame.get('chunk_size', 1024), [ 1024, 32, 256 ])
+            self.assertIn(config['loader']['batch_size'], [ 16, 64 ])
+
+            select_frame(frame)
+            dset   = construct_dataset(**config['dataset'])
+            loader = DataLoader(dset, **config['loader'])
+
+            self.assertEqual(
+                sum(len(batch['x']) for batch in loader), N_ROWS
+            )
+
+    def test_autotune_without_frame_knobs(self):
+        df = create_frame()
+
+        config = autotune(
+            { 'frame' : {
+                'name'             : 'dict-frame',
+                'scalar_data_dict' : { 'x' : df['x'] },
+                'vlarr_data_dict'  : {
+                    'v' : [ df.get_vlarr('v', idx) for idx in range(N_ROWS) ]
+                },
+              },
+              **GROUPS },
+            knobs = { 'batch_size' : [ 8, 32 ], 'prefetch' : [] },
+            trial_rows = 100
+        )
+
+        self.assertFalse(config['dataset']['cache'])
+        self.assertEqual(config['loader']['prefetch'], 0)
+        self.assertIn(config['loader']['batch_size'], [ 8, 32, 256 ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Test profiling of the data loading stages"""
+
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from vlndata import profiling
+from vlndata.data_frame.dict_frame import DictFrame
+from vlndata.data_loader import DataLoader
+from vlndata.dataset.dataset_transform import DatasetTransform
+from vlndata.dataset.transform import NoiseTransform
+from vlndata.dataset.vldataset import VLDataset
+
+N_ROWS = 20
+
+def create_dataset():
+    df = DictFrame(
+        { 'x' : np.arange(N_ROWS) },
+        { 'v' : [ np.arange(idx % 5) for idx in range(N_ROWS) ] }
+    )
+    dset = VLDataset(df, { 'x' : [ 'x' ] }, { 'v' : [ 'v' ] })
+
+    return DatasetTransform(dset, [
+        NoiseTransform(
+            { 'name' : 'uniform', 'a' : 0, 'b' : 1 },
+            scalar_groups = { 'x' : [ 'x' ] }
+        ),
+    ])
+
+class TestProfiling(unittest.TestCase):
+
+    def test_disabled(self):
+        self.assertIsNone(profiling.get_profiler())
+
+        profiler = profiling.Profiler()
+        dl       = DataLoader(create_dataset(), 4)
+        list(dl)
+
+        self.assertEqual(profiler.summary(), {})
+
+    def test_loader_stages(self):
+        dl = DataLoader(create_dataset(), 4, prefetch = 2)
+
+        with profiling.profile() as profiler:
+            list(dl)
+            list(dl)
+
+        self.assertIsNone(profiling.get_profiler())
+        self.assertEqual(
+            [ epoch['epoch'] for epoch in profiler.epochs ], [ 0, 1 ]
+        )
+
+        stages = profiler.epochs[0]['stages']
+
+        self.assertEqual(set(stages), {
+            'loader.batch', 'collate', 'dataset.VLDataset',
+            'frame.DictFrame.scalar', 'frame.DictFrame.vlarr',
+            'transform.NoiseTransform',
+        })
+
+        self.assertEqual(stages['loader.batch']['count'], 5)
+        self.assertEqual(stages['dataset.VLDataset']['count'], 5)
+        self.assertEqual(stages['transform.NoiseTransform']['count'], N_ROWS)
+
+        for stats in stages.values():
+            self.assertLessEqual(stats['self_time'], stats['total_time'])
+            self.assertLessEqual(stats['p50_time'], stats['p99_time'])
+
+        nbytes = sum(
+            array.nbytes for batch in dl for array in batch.values()
+        )
+        self.assertEqual(stages['collate']['bytes'], nbytes)
+        self.assertLess(
+            stages['loader.batch']['self_time'],
+            stages['loader.batch']['total_time']
+        )
+
+    def test_row_stages(self):
+        dset = create_dataset()
+
+        with profiling.profile() as profiler:
+            dset[0]
+            dset[1]
+
+        stages = profiler.summary()
+
+        self.assertEqual(stages['dataset.VLDataset']['count'], 2)
+        self.assertEqual(stages['frame.DictFrame.scalar']['count'], 2)
+        self.assertEqual(stages['frame.DictFrame.vlarr']['count'], 2)
+
+    def test_bounded_stats(self):
+        stats     = profiling.StageStats(reservoir_size = 100)
+        durations = np.random.default_rng(0).uniform(size = 10000)
+
+        for duration in durations:
+            stats.add(duration, duration, 0)
+
+        summary = stats.summary()
+
+        self.assertEqual(len(stats.reservoir), 100)
+        self.assertEqual(summary['count'], 10000)
+        self.assertAlmostEqual(summary['total_time'], np.sum(durations))
+        self.assertEqual(summary['min_time'], np.min(durations))
+        self.assertEqual(summary['max_time'], np.max(durations))
+        self.assertAlmostEqual(summary['p50_time'], 0.5, delta = 0.15)
+
+    def test_report(self):
+        with profiling.profile() as profiler:
+            list(DataLoader(create_dataset(), 4))
+
+        report = profiler.report(profiler.epochs[0]['stages'])
+        self.assertIn('transform.NoiseTransform', report)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'profile.json')
+            profiler.save(path)
+
+            with open(path, 'rt', encoding = 'utf-8') as f:
+                result = json.load(f)
+
+        self.assertEqual(len(result['epochs']), 1)
+        self.assertEqual(result['current'], {})
+
+if __name__ == '__main__':
+    unittest.main()
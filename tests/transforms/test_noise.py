@@ -270,6 +270,27 @@ class TestNoiseTransform(TestDatasetFuncs, unittest.TestCase):
 
         self._compare_data(dset, data_null)
 
+    def test_noise_state(self):
+        scalar_groups = { 'group1' : [ 'c1', 'c2' ] }
+        transform     = NoiseTransform(
+            { 'name' : 'normal', 'mu' : 0, 'sigma' : 1 },
+            scalar_groups = scalar_groups
+        )
+        dset = self._construct_dataset(scalar_groups, None, transform)
+
+        dset[0]
+        state = dset.state_dict()
+        data1 = [ dset[idx]['group1'] for idx in range(5) ]
+
+        dset.load_state_dict(state)
+        data2 = [ dset[idx]['group1'] for idx in range(5) ]
+
+        for (array1, array2) in zip(data1, data2):
+            self.assertTrue(np.array_equal(array1, array2))
+
+        with self.assertRaises(ValueError):
+            dset.load_state_dict({ 'dset' : {}, 'transforms' : [] })
+
 if __name__ == '__main__':
     unittest.main()
 
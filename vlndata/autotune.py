@@ -0,0 +1,310 @@
+import inspect
+import time
+
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+from vlndata.data_frame  import FRAMES_DICT
+from vlndata.data_loader import DataLoader, SubsetRandomSampler
+from vlndata.dataset     import construct_dataset
+from vlndata.funcs       import Spec, unpack_name_args
+from vlndata.profiling   import get_nbytes
+
+Knobs = Dict[str, List[Any]]
+
+# Knobs of the frames are tuned only if the frame accepts them
+FRAME_KNOBS : Knobs = {
+    'chunk_size'         : [ 256, 1024, 4096, 16384 ],
+    'n_workers'          : [ 1, 2, 4 ],
+    'index_threads'      : [ 1, 2, 4 ],
+    'decompress_threads' : [ 0, 1, 2, 4 ],
+    'max_open'           : [ 1, 4, 16 ],
+}
+
+LOADER_KNOBS : Knobs = {
+    'batch_size' : [ 64, 256, 1024 ],
+    'prefetch'   : [ 0, 2, 8 ],
+}
+
+def normalize_frame_spec(frame : Spec) -> Dict[str, Any]:
+    name, args = unpack_name_args(frame)
+    return { 'name' : name, **args }
+
+def get_frame_defaults(frame : Dict[str, Any]) -> Dict[str, Any]:
+    """Get default values of the constructor arguments of `frame` spec"""
+    signature = inspect.signature(FRAMES_DICT[frame['name']].__init__)
+
+    return {
+        name : param.default
+            for (name, param) in signature.parameters.items()
+                if name != 'self'
+    }
+
+def find_frame_knob(
+    frame : Dict[str, Any], knob : str
+) -> Optional[Tuple[str, ...]]:
+    """Find the path of `knob` in the (possibly nested) `frame` spec
+
+    E.g. the `chunk_size` of the HDF5 shards of a `sharded-frame` is found
+    at the path ('frame', 'chunk_size').
+    """
+    defaults = get_frame_defaults(frame)
+
+    if knob in defaults:
+        return (knob, )
+
+    if isinstance(frame.get('frame'), (str, dict)):
+        path = find_frame_knob(normalize_frame_spec(frame['frame']), knob)
+
+        if path is not None:
+            return ('frame', ) + path
+
+    return None
+
+def get_frame_knob(frame : Dict[str, Any], path : Tuple[str, ...]) -> Any:
+    if len(path) == 1:
+        return frame.get(path[0], get_frame_defaults(frame)[path[0]])
+
+    return get_frame_knob(normalize_frame_spec(frame[path[0]]), path[1:])
+
+def set_frame_knob(
+    frame : Dict[str, Any], path : Tuple[str, ...], value : Any
+) -> Dict[str, Any]:
+    """Get a copy of `frame` spec with `knob` at `path` set to `value`"""
+    result = dict(frame)
+
+    if len(path) == 1:
+        result[path[0]] = value
+    else:
+        result[path[0]] = set_frame_knob(
+            normalize_frame_spec(frame[path[0]]), path[1:], value
+        )
+
+    return result
+
+class AutoTuner:
+    # pylint: disable=too-many-instance-attributes
+    """Tuner of the data loading knobs for the maximum throughput
+
+    The tuner runs short timed trials of loading shuffled batches from the
+    dataset with `DataLoader`, and searches the knobs one by one (coordinate
+    descent), keeping the best values of the other knobs. It tunes
+
+    - the knobs of the data frame that it accepts (c.f. `FRAME_KNOBS`),
+      e.g. `chunk_size` of `HDF5ReadAheadFrame`, `n_workers` of
+      `CSVFrame`, or `max_open` shards of `ShardedFrame`,
+    - whether to `cache` the dataset (c.f. `DatasetCache`), if the
+      estimated size of the cached samples fits into `cache_budget`,
+    - the `batch_size` and `prefetch` depth of `DataLoader`.
+
+    Each trial reads the same random subset of `trial_rows` rows for
+    `n_epochs` epochs, so that the cache can pay off within a trial.
+
+    Parameters
+    ----------
+    dataset : Dict[str, Any]
+        Keyword arguments of `construct_dataset`, including the `frame` spec.
+    knobs : Dict[str, List[Any]], optional
+        Candidate values of the knobs to tune. The knobs that are not
+        specified take the candidates of `FRAME_KNOBS` and `LOADER_KNOBS`.
+        Knobs with an empty list of candidates are not tuned.
+        Default: None.
+    batch_size : int, optional
+        Initial batch size. Default: 256.
+    cache_budget : int, optional
+        Memory budget (in bytes) of the dataset cache. If None, the cache is
+        not tuned. Default: None.
+    trial_rows : int, optional
+        Number of rows to read in each epoch of a trial. Default: 8192.
+    n_epochs : int, optional
+        Number of epochs of each trial. Default: 2.
+    n_rounds : int, optional
+        Number of passes over all knobs. Default: 1.
+    seed : int, optional
+        Seed of the trial subset and shuffle. Default: 0.
+    """
+
+    def __init__(
+        self,
+        dataset      : Dict[str, Any],
+        knobs        : Optional[Knobs] = None,
+        batch_size   : int = 256,
+        cache_budget : Optional[int] = None,
+        trial_rows   : int = 8192,
+        n_epochs     : int = 2,
+        n_rounds     : int = 1,
+        seed         : int = 0,
+    ):
+        # pylint: disable=too-many-arguments
+        self._dataset      = dict(dataset)
+        self._knobs        = { **FRAME_KNOBS, **LOADER_KNOBS, **(knobs or {}) }
+        self._cache_budget = cache_budget
+        self._trial_rows   = trial_rows
+        self._n_epochs     = n_epochs
+        self._n_rounds     = n_rounds
+        self._seed         = seed
+        self._trials       : List[Dict[str, Any]] = []
+        self._results      : Dict[str, Dict[str, Any]] = {}
+
+        self._dataset['frame'] = normalize_frame_spec(dataset['frame'])
+        self._loader = { 'batch_size' : batch_size, 'prefetch' : 0 }
+
+        if 'cache' not in self._dataset:
+            self._dataset['cache'] = False
+
+    @property
+    def trials(self) -> List[Dict[str, Any]]:
+        """Knob values and throughputs of all trials run so far"""
+        return self._trials
+
+    def get_knob_values(
+        self, dataset : Dict[str, Any], loader : Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Get values of all tuned knobs of configuration (dataset, loader)
+
+        The values identify the configuration, unlike the specs, which may
+        hold whole arrays (e.g. of a `dict-frame`).
+        """
+        result = { 'cache' : dataset['cache'] }
+
+        for knob in self._knobs:
+            if knob in LOADER_KNOBS:
+                continue
+
+            path = find_frame_knob(dataset['frame'], knob)
+
+            if path is not None:
+                result[knob] = get_frame_knob(dataset['frame'], path)
+
+        return { **result, **loader }
+
+    def run_trial(
+        self, dataset : Dict[str, Any], loader : Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Measure the throughput of loading `dataset` with `loader` args"""
+        knobs = self.get_knob_values(dataset, loader)
+        key   = repr(sorted(knobs.items()))
+
+        if key in self._results:
+            return self._results[key]
+
+        time_start = time.perf_counter()
+        dset       = construct_dataset(**dataset)
+        time_open  = time.perf_counter() - time_start
+
+        prg     = np.random.default_rng(self._seed)
+        n_rows  = min(len(dset), self._trial_rows)
+        sampler = SubsetRandomSampler(
+            prg.choice(len(dset), n_rows, replace = False), self._seed
+        )
+        dl = DataLoader(dset, sampler = sampler, **loader)
+
+        rows   = 0
+        nbytes = 0
+        time_start = time.perf_counter()
+
+        for _epoch in range(self._n_epochs):
+            for batch in dl:
+                rows   += len(next(iter(batch.values())))
+                nbytes += get_nbytes(batch)
+
+        duration = time.perf_counter() - time_start
+
+        result = {
+            'knobs'         : knobs,
+            'open_time'     : time_open,
+            'rows_per_s'    : rows / max(duration, 1e-9),
+            'bytes_per_row' : nbytes / max(rows, 1),
+            'n_rows'        : len(dset),
+        }
+
+        self._results[key] = result
+        self._trials.append(result)
+
+        return result
+
+    def get_candidates(
+        self, dataset : Dict[str, Any], knob : str, reference : Dict[str, Any]
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Get configurations (dataset, loader) that vary `knob`"""
+        result = []
+        loader = self._loader
+
+        if knob in LOADER_KNOBS:
+            for value in self._knobs[knob]:
+                result.append((dataset, { **loader, knob : value }))
+
+        elif knob == 'cache':
+            cache_size = reference['bytes_per_row'] * reference['n_rows']
+
+            if (
+                    (self._cache_budget is not None)
+                and (cache_size <= self._cache_budget)
+            ):
+                for value in [ False, True ]:
+                    result.append(({ **dataset, 'cache' : value }, loader))
+
+        else:
+            path = find_frame_knob(dataset['frame'], knob)
+
+            if path is not None:
+                for value in self._knobs[knob]:
+                    frame = set_frame_knob(dataset['frame'], path, value)
+                    result.append(({ **dataset, 'frame' : frame }, loader))
+
+        return result
+
+    def tune(self) -> Dict[str, Any]:
+        """Search the knobs and return the best configuration
+
+        Returns
+        -------
+        Dict[str, Any]
+            The best configuration with the keys: `dataset` -- keyword
+            arguments of `construct_dataset` (its `frame` is a spec accepted
+            by `select_frame`), `loader` -- keyword arguments of `DataLoader`,
+            and `rows_per_s` -- the throughput of the configuration.
+        """
+        dataset = self._dataset
+        best    = self.run_trial(dataset, self._loader)
+        knobs   = [ k for k in self._knobs if k not in LOADER_KNOBS ]
+        knobs  += [ 'cache' ] + list(LOADER_KNOBS)
+
+        for _round in range(self._n_rounds):
+            for knob in knobs:
+                if (knob != 'cache') and (len(self._knobs[knob]) == 0):
+                    continue
+
+                for (dset_args, loader) in self.get_candidates(
+                    dataset, knob, best
+                ):
+                    result = self.run_trial(dset_args, loader)
+
+                    if result['rows_per_s'] > best['rows_per_s']:
+                        best         = result
+                        dataset      = dset_args
+                        self._loader = loader
+
+        return {
+            'dataset'    : dataset,
+            'loader'     : dict(self._loader),
+            'rows_per_s' : best['rows_per_s'],
+        }
+
+def autotune(dataset : Dict[str, Any], **kwargs : Any) -> Dict[str, Any]:
+    """Find the fastest configuration of loading `dataset`
+
+    C.f. `AutoTuner` for the description of the parameters and of the
+    returned configuration.
+
+    Examples
+    --------
+    >>> config = autotune(
+    ...     { 'frame' : { 'name' : 'hdf-ra-frame', 'path' : 'data.h5' },
+    ...       'vlarr_groups' : { 'particles' : [ 'energy', 'dir_z' ] } },
+    ...     cache_budget = 2**30
+    ... )
+    >>> dset   = construct_dataset(**config['dataset'])
+    >>> loader = DataLoader(dset, **config['loader'])
+    """
+    return AutoTuner(dataset, **kwargs).tune()
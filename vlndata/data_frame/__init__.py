@@ -1,4 +1,4 @@
-from typing import Dict, Optional, List, Tuple, Union
+from typing import Any, Dict, Optional, List, Tuple, Union
 
 import numpy as np
 from vlndata.funcs import Spec, unpack_name_args
@@ -6,9 +6,15 @@ from vlndata.funcs import Spec, unpack_name_args
 from .csv_frame       import CSVFrame
 from .csv_mem_frame   import CSVMemFrame
 from .dict_frame      import DictFrame
+from .frame_stream    import (
+    FrameStream, CSVFrameStream, HDF5FrameStream, select_frame_stream
+)
 from .data_frame_base import DataFrameBase
 from .hdf_frame       import HDF5Frame
 from .hdf_ra_frame    import HDF5ReadAheadFrame
+from .hdf_writer      import export_hdf5
+from .sharded_frame   import ShardedFrame
+from .split           import kfold_split, split_frame
 from .shuffle_frame   import ShuffleFrame
 from .subframe        import SubFrame
 from .var_frame       import VarFrame, VarFunc
@@ -19,6 +25,7 @@ FRAMES_DICT = {
     'dict-frame'    : DictFrame,
     'hdf-frame'     : HDF5Frame,
     'hdf-ra-frame'  : HDF5ReadAheadFrame,
+    'sharded-frame' : ShardedFrame,
 }
 
 def select_frame(data_frame : Spec) -> DataFrameBase:
@@ -48,12 +55,29 @@ def train_test_split(
     frame     : DataFrameBase,
     val_size  : Optional[Union[int, float]],
     test_size : Optional[Union[int, float]],
+    stratify  : Optional[str] = None,
+    bins      : Optional[Union[int, List[float]]] = None,
+    groups    : Optional[str] = None,
+    seed      : int           = 0,
+    manifest  : Optional[str] = None,
 ) -> Tuple[DataFrameBase, DataFrameBase, DataFrameBase]:
     """Split Data Frame into train/val/test parts
 
-    The split performed contiguously, where the first part of the dataset
-    goes to the `train` set, the second part to the `val` set and the last part
-    to the `test` set.
+    By default, the split performed contiguously, where the first part of
+    the dataset goes to the `train` set, the second part to the `val` set
+    and the last part to the `test` set.
+
+    If `stratify` is given, the rows are assigned to the parts randomly,
+    such that each stratum of the column `stratify` is split in the same
+    proportions. If `groups` is given, the rows are assigned to the parts
+    by random groups, such that all rows with the same value of the column
+    `groups` (e.g. a run or an event group id) end up in the same part. In
+    both cases, the sizes of the parts are approximate. The columns are
+    read as whole arrays (c.f. `DataFrameBase.__getitem__`).
+
+    The parts are `SubFrame`s with the row indices in the original order.
+    They can be saved into a `manifest` file, so that repeated jobs do not
+    need to read the columns and recompute the split.
 
     Parameters
     ----------
@@ -64,33 +88,29 @@ def train_test_split(
         number of samples to be assigned to the validation dataset.
     test_size : Union[int, float], optional
         Size of the test set. Follows the same rules as `val_size`.
+    stratify : str, optional
+        Scalar column to stratify the split by. Default: None.
+    bins : int or List[float], optional
+        Binning of the `stratify` column. If None, each unique value is
+        a separate stratum. If int, the column is binned into `bins` quantile
+        bins. Otherwise, `bins` are the bin edges. Default: None.
+    groups : str, optional
+        Column of group ids of the rows. Default: None.
+    seed : int, optional
+        Seed of the random assignment of rows to the parts. Default: 0.
+    manifest : str, optional
+        Path of an `.npz` file to save the split into, or to load it from if
+        it was saved for the same frame (c.f. `DataFrameBase.fingerprint`)
+        and the same split parameters. Default: None.
 
     Returns
     -------
     (train_frame, val_frame, test_frame)
         Train, validation, and test datasets.
     """
-
-    indices = np.arange(len(frame))
-
-    if isinstance(val_size, float):
-        val_size = int(len(frame) * val_size)
-
-    if isinstance(test_size, float):
-        test_size = int(len(frame) * test_size)
-
-    val_size   = val_size or 0
-    test_size  = test_size or 0
-    train_size = max(0, len(frame) - test_size - val_size)
-
-    train_indices = indices[:train_size]
-    val_indices   = indices[train_size:train_size+val_size]
-    test_indices  = indices[train_size+val_size:]
-
-    return tuple(
-        SubFrame(frame, indices) \
-            for indices in [ train_indices, val_indices, test_indices ]
-    ) # type: ignore
+    return split_frame(
+        frame, val_size, test_size, stratify, bins, groups, seed, manifest
+    )
 
 def construct_data_frame(
     data_frame : Spec,
@@ -99,6 +119,8 @@ def construct_data_frame(
     test_size  : Optional[Union[int, float]] = None,
     extra_vars : Optional[Dict[str, VarFunc]] = None,
     seed       : int = 0,
+    var_cache_dir : Optional[str] = None,
+    split_args    : Optional[Dict[str, Any]] = None,
 ) -> Union[DataFrameBase, Tuple[DataFrameBase, DataFrameBase, DataFrameBase]]:
     """Convenience function to construct a standard DataFrame
 
@@ -132,6 +154,14 @@ def construct_data_frame(
         Default: None
     seed : int, optional
         A seed for shuffle rng. Default: 0.
+    var_cache_dir : str, optional
+        A directory to cache the values of `extra_vars` in.
+        C.f. `VarFrame` documentation for the details. Default: None.
+    split_args : Dict[str, Any], optional
+        Additional arguments of the train/val/test split, e.g. `stratify`,
+        `groups` or `manifest`. The split is seeded by `seed`.
+        Please refer to the `train_test_split` for the details.
+        Default: None.
 
     Returns
     -------
@@ -144,19 +174,22 @@ def construct_data_frame(
     result = select_frame(data_frame)
 
     if extra_vars is not None:
-        result = VarFrame(result, extra_vars)
+        result = VarFrame(result, extra_vars, cache_dir = var_cache_dir)
 
     if shuffle:
         result = ShuffleFrame(result, seed = seed)
 
     if (test_size is not None) or (val_size is not None):
-        return train_test_split(result, val_size, test_size)
+        split_args = { 'seed' : seed, **(split_args or {}) }
+        return train_test_split(result, val_size, test_size, **split_args)
     else:
         return result
 
 __all__ = [
     'CSVFrame', 'CSVMemFrame', 'HDF5Frame', 'DictFrame', 'DataFrameBase',
-    'SubFrame', 'ShuffleFrame', 'VarFrame', 'construct_data_frame',
-    'select_frame'
+    'SubFrame', 'ShuffleFrame', 'ShardedFrame', 'VarFrame',
+    'construct_data_frame', 'select_frame', 'export_hdf5',
+    'train_test_split', 'kfold_split',
+    'FrameStream', 'CSVFrameStream', 'HDF5FrameStream', 'select_frame_stream'
 ]
 
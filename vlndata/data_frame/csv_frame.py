@@ -1,12 +1,230 @@
-from typing import Any, List, Union
+import io
+import os
+import shutil
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 import numpy  as np
 
 from .data_frame_base import DataFrameBase
+from .funcs import (
+    find_line_offsets, fingerprint_file, is_compressed_path,
+    link_spilled_arrays, load_spilled_arrays, map_file, spill_arrays
+)
+from .ragged import RaggedArray
+
+ColumnData = Union[np.ndarray, RaggedArray]
+
+def is_str_column(data : ColumnData) -> bool:
+    """Check whether `data` is a ragged column of utf-8 encoded strings"""
+    return isinstance(data, RaggedArray) and (data.dtype.kind == 'S')
+
+def encode_str_column(values : Any) -> RaggedArray:
+    """Encode a column of strings into a ragged array of utf-8 bytes
+
+    Missing (NaN) values are encoded as empty strings.
+    """
+    encoded = []
+
+    for value in values:
+        if isinstance(value, str):
+            encoded.append(value.encode('utf-8'))
+        elif isinstance(value, float) and np.isnan(value):
+            encoded.append(b'')
+        elif isinstance(value, np.ndarray):
+            encoded.append(','.join(str(x) for x in value).encode('utf-8'))
+        else:
+            encoded.append(str(value).encode('utf-8'))
+
+    offsets = np.zeros(len(encoded) + 1, dtype = np.int64)
+    np.cumsum([ len(x) for x in encoded ], out = offsets[1:])
+
+    return RaggedArray(
+        np.frombuffer(b''.join(encoded), dtype = 'S1'), offsets
+    )
+
+def parse_vlarr_column(values : np.ndarray, dtype : Any) -> RaggedArray:
+    """Parse a column of serialized vlarrays into a numeric ragged array
+
+    Raises ValueError if any of the `values` is not a serialized vlarray.
+    C.f. `CSVFrame.deserialize_vlarr` for the serialization format.
+    """
+    strings = []
+    lengths = np.zeros(len(values), dtype = np.int64)
+
+    for (idx, value) in enumerate(values):
+        if isinstance(value, float) and np.isnan(value):
+            continue
+
+        if not isinstance(value, str):
+            raise ValueError(f"Not a serialized vlarray: '{value}'")
+
+        value = value.strip()
+
+        if value.startswith('['):
+            if not value.endswith(']'):
+                raise ValueError(f"Not a serialized vlarray: '{value}'")
+
+            value = value[1:-1]
+
+        if value.strip() == '':
+            continue
+
+        strings.append(value)
+        lengths[idx] = value.count(',') + 1
+
+    offsets = np.zeros(len(values) + 1, dtype = np.int64)
+    np.cumsum(lengths, out = offsets[1:])
+
+    if len(strings) == 0:
+        return RaggedArray(np.empty((0, ), dtype = dtype), offsets)
+
+    flat = np.array(','.join(strings).split(','), dtype = np.float64)
+    return RaggedArray(flat.astype(dtype), offsets)
+
+def parse_csv_columns(
+    df : pd.DataFrame, dtype : Any = 'float32'
+) -> Dict[str, ColumnData]:
+    """Convert pandas DataFrame into a compact columnar storage
+
+    Numeric columns are stored as typed numpy arrays. Columns of serialized
+    vlarrays are parsed into numeric ragged arrays of type `dtype`, and the
+    other columns are stored as ragged arrays of utf-8 encoded strings.
+    """
+    result : Dict[str, ColumnData] = {}
+
+    for column in df.columns:
+        values = df[column].values
+
+        if values.dtype.kind in [ 'b', 'i', 'u', 'f' ]:
+            result[column] = values
+            continue
+
+        try:
+            result[column] = parse_vlarr_column(values, dtype)
+        except ValueError:
+            result[column] = encode_str_column(values)
+
+    return result
+
+def scalar_to_ragged(values : np.ndarray) -> RaggedArray:
+    """Convert a scalar column into a ragged column of single element arrays
+    """
+    lengths = np.ones(len(values), dtype = np.int64)
+
+    if values.dtype.kind == 'f':
+        lengths[np.isnan(values)] = 0
+
+    offsets = np.zeros(len(values) + 1, dtype = np.int64)
+    np.cumsum(lengths, out = offsets[1:])
+
+    return RaggedArray(values[lengths > 0], offsets)
+
+def merge_csv_columns(
+    chunks : List[Dict[str, ColumnData]]
+) -> Dict[str, ColumnData]:
+    """Concatenate columnar storages of consecutive chunks of a CSV file
+
+    The chunks of a column may have been parsed into different kinds
+    (e.g. pandas may infer a numeric type for a vlarr column in the chunks
+    where all vlarrs have a single element). Such chunks are converted into
+    the most generic kind of the column before the concatenation.
+    """
+    result : Dict[str, ColumnData] = {}
+
+    for column in chunks[0]:
+        parts = [ chunk[column] for chunk in chunks ]
+
+        if any(is_str_column(x) for x in parts):
+            parts = [
+                x if is_str_column(x) else encode_str_column(
+                    x.to_object_array() if isinstance(x, RaggedArray) else x
+                )
+                    for x in parts
+            ]
+            result[column] = RaggedArray.concatenate(parts)
+
+        elif any(isinstance(x, RaggedArray) for x in parts):
+            parts = [
+                x if isinstance(x, RaggedArray) else scalar_to_ragged(x)
+                    for x in parts
+            ]
+            result[column] = RaggedArray.concatenate(parts)
+
+        else:
+            result[column] = np.concatenate(parts)
+
+    return result
+
+def parse_csv_chunk(
+    path : str, start : int, end : int, header : bytes, dtype : Any
+) -> Dict[str, ColumnData]:
+    """Parse bytes [start, end) of a CSV file `path` with a `header` line"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    return parse_csv_columns(pd.read_csv(io.BytesIO(header + data)), dtype)
+
+def split_csv_chunks(path : str, n_chunks : int) -> Tuple[bytes, List[Tuple]]:
+    """Split CSV file at line boundaries into chunks of similar byte size
+
+    Returns
+    -------
+    (header, chunks)
+        Header line of the CSV file and a list of (start, end) byte ranges
+        of the chunks.
+    """
+    with map_file(path) as buffer:
+        offsets = find_line_offsets(buffer, len(buffer))
+        header  = buffer[:offsets[0] + 1] if len(offsets) > 0 else b''
+        size    = len(buffer)
+
+    if len(offsets) < 2:
+        return (header, [])
+
+    targets = np.linspace(offsets[0], offsets[-1], n_chunks + 1)
+    bounds  = np.unique(np.searchsorted(offsets, targets))
+    bounds  = np.unique(np.concatenate(([ 0 ], bounds, [ len(offsets) - 1 ])))
+
+    chunks = [
+        (int(offsets[r0]) + 1, min(int(offsets[r1]) + 1, size))
+            for (r0, r1) in zip(bounds[:-1], bounds[1:])
+    ]
+
+    return (header, chunks)
+
+def read_csv_columns(
+    path : Any, dtype : Any = 'float32', n_workers : int = 1
+) -> Dict[str, ColumnData]:
+    """Read CSV file into a columnar storage, optionally in parallel"""
+    if (
+           (n_workers < 2)
+        or (not isinstance(path, str))
+        or is_compressed_path(path)
+    ):
+        return parse_csv_columns(pd.read_csv(path), dtype)
+
+    header, chunks = split_csv_chunks(path, 4 * n_workers)
+
+    if len(chunks) == 0:
+        return parse_csv_columns(pd.read_csv(path), dtype)
+
+    with ProcessPoolExecutor(n_workers) as executor:
+        results = list(executor.map(
+            parse_csv_chunk,
+            *zip(*(
+                (path, start, end, header, dtype) for (start, end) in chunks
+            ))
+        ))
+
+    return merge_csv_columns(results)
 
 class CSVFrame(DataFrameBase):
-    """Data Frame to parse csv files that uses pandas DataFrame as a backed
+    """Data Frame to parse csv files into an in-memory columnar storage
 
     The CSV file is expected to have the standard format with the first
     line being the header describing column names.
@@ -18,45 +236,191 @@ class CSVFrame(DataFrameBase):
         "[a0,a2,a2,a3,...,aN]"
     where ak -- scalar values.
 
+    The file is parsed with pandas. Uncompressed files can be split at line
+    boundaries and parsed in parallel by a pool of `n_workers` processes.
+    At load time, each column is converted into a compact typed storage:
+    scalar columns into numpy arrays, and vlarr columns into ragged arrays
+    (flat values of type `dtype` and row offsets, c.f. `RaggedArray`). Other
+    string columns are kept as ragged arrays of utf-8 bytes. Therefore, the
+    memory usage of this frame is proportional to the numeric payload.
+    Scalar columns are also cast to `dtype` once, at load time, so that
+    `get_scalar` is a plain array lookup.
+
+    When this frame is pickled (e.g. to be sent to data loader workers), the
+    parsed columns are spilled once into `.npy` files in a new subdirectory
+    of `spill_dir`, and the unpickled copies memory map them instead of
+    parsing the file again. Therefore, all copies share the same physical
+    memory. The subdirectory is unique to this frame, so several frames
+    (e.g. the shards of a `ShardedFrame`) can share the same `spill_dir`.
+    Each unpickled copy hard links the spilled files into a subdirectory of
+    its own, so that the files stay on disk until the last copy is deleted,
+    and the copies keep working (and can be pickled again) after the
+    original frame is deleted.
+
     Parameters
     ----------
     path : str
         Input CSV file path.
-
-    Warnings
-    --------
-    Pandas backend is very inefficient memory-wise, especially when str columns
-    are present. If you run out of RAM using this CSVFrame, try using
-    CSVMemFrame instead, which is more memory efficient, but less performant.
+    n_workers : int, optional
+        Number of processes to parse the file with. Default: 1.
+    spill_dir : str, optional
+        Directory to spill parsed columns to when the frame is pickled.
+        The columns are spilled into a temporary subdirectory of `spill_dir`
+        (or of the system temporary directory if None), which is removed
+        together with this frame. Default: None.
     """
 
-    def __init__(self, path : str, dtype : Any = 'float32'):
+    def __init__(
+        self,
+        path      : str,
+        dtype     : Any = 'float32',
+        n_workers : int = 1,
+        spill_dir : Optional[str] = None,
+    ):
         super().__init__(dtype)
 
-        self._df = pd.read_csv(path)
+        self._data = read_csv_columns(path, self._dtype, n_workers)
+
+        self._columns   = list(self._data.keys())
+        self._len       = len(self._data[self._columns[0]]) \
+            if len(self._columns) > 0 else 0
+        self._path      = path
+        self._spill_dir = spill_dir
+        self._tmp_dir   : Optional[str] = None
+        self._spilled   = False
+        self._spill_names : List[str] = []
+
+        self._scalars : Dict[str, np.ndarray] = {}
+        self._cast_scalars()
+
+    def __del__(self):
+        if getattr(self, '_tmp_dir', None) is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors = True)
+
+    def _cast_scalars(self) -> None:
+        """Cast whole scalar columns to the frame dtype at once"""
+        for (column, data) in self._data.items():
+            if (
+                    (column not in self._scalars)
+                and (not isinstance(data, RaggedArray))
+            ):
+                self._scalars[column] = data.astype(self._dtype, copy = False)
+
+    def _spill(self) -> str:
+        """Spill parsed columns into `.npy` files once, and return their dir
+        """
+        if self._spill_dir is not None:
+            os.makedirs(self._spill_dir, exist_ok = True)
+
+        self._tmp_dir = tempfile.mkdtemp(
+            prefix = 'vlndata-csv-', dir = self._spill_dir
+        )
+
+        arrays = {}
+
+        for (idx, column) in enumerate(self._columns):
+            data = self._data[column]
+
+            if isinstance(data, RaggedArray):
+                arrays[f'{idx}.values']  = data.values
+                arrays[f'{idx}.offsets'] = data.offsets
+            else:
+                arrays[f'{idx}'] = data
+
+                if self._scalars[column] is not data:
+                    arrays[f'{idx}.scalar'] = self._scalars[column]
+
+        spill_arrays(arrays, self._tmp_dir)
+        self._spilled     = True
+        self._spill_dir   = self._tmp_dir
+        self._spill_names = list(arrays)
 
-        self._columns = list(self._df.columns)
-        self._len     = len(self._df)
-        self._path    = path
+        return self._spill_dir
 
     def __getstate__(self) -> dict:
+        spill_dir = self._spill_dir
+
+        if not self._spilled:
+            spill_dir = self._spill()
+
         return {
+            'names' : self._spill_names,
             'cols'  : self._columns,
             'dtype' : self._dtype,
             'len'   : self._len,
-            'path'  : self._path,
+            'path'  : self._path if isinstance(self._path, str) else None,
+            'spill' : spill_dir,
         }
 
+    def _link_spill(self, spill_dir : str) -> bool:
+        """Link the columns spilled into `spill_dir` into a new subdirectory
+
+        Returns False if the spilled columns have already been removed.
+        """
+        try:
+            self._tmp_dir = tempfile.mkdtemp(
+                prefix = 'vlndata-csv-', dir = os.path.dirname(spill_dir)
+            )
+            link_spilled_arrays(spill_dir, self._spill_names, self._tmp_dir)
+        except FileNotFoundError:
+            if self._tmp_dir is not None:
+                shutil.rmtree(self._tmp_dir, ignore_errors = True)
+
+            self._tmp_dir = None
+            return False
+
+        self._spill_dir = self._tmp_dir
+        return True
+
     def __setstate__(self, state : dict):
-        self._columns = state['cols']
-        self._dtype   = state['dtype']
-        self._len     = state['len']
-        self._path    = state['path']
-        self._df      = pd.read_csv(self._path)
+        self._columns   = state['cols']
+        self._dtype     = state['dtype']
+        self._len       = state['len']
+        self._path      = state['path']
+        self._spill_dir = state['spill']
+        self._tmp_dir   = None
+        self._spilled   = True
+
+        self._spill_names = state['names']
+        self._scalars     = {}
+
+        if not self._link_spill(state['spill']):
+            # the frame that spilled the columns is gone, parse the file again
+            if self._path is None:
+                raise FileNotFoundError(
+                    f"Spilled columns '{state['spill']}' have been removed"
+                )
+
+            self._data      = read_csv_columns(self._path, self._dtype, 1)
+            self._spill_dir = os.path.dirname(state['spill'])
+            self._spilled   = False
+            self._cast_scalars()
+
+            return
+
+        arrays = load_spilled_arrays(self._spill_dir, self._spill_names)
+
+        self._data = {}
+
+        for (idx, column) in enumerate(self._columns):
+            if f'{idx}' in arrays:
+                self._data[column] = arrays[f'{idx}']
+
+                if f'{idx}.scalar' in arrays:
+                    self._scalars[column] = arrays[f'{idx}.scalar']
+            else:
+                self._data[column] = RaggedArray(
+                    arrays[f'{idx}.values'], arrays[f'{idx}.offsets']
+                )
+
+        self._cast_scalars()
 
     def columns(self) -> List[str]:
         return self._columns
 
+    def fingerprint(self) -> Optional[str]:
+        return fingerprint_file(self._path, type(self).__name__, self._dtype)
+
     @staticmethod
     def deserialize_vlarr(
         vlarr_str : Union[str, float], dtype : Any = None
@@ -88,15 +452,58 @@ class CSVFrame(DataFrameBase):
         column : str,
         index  : int
     ) -> np.ndarray:
-        vlarr_str = self._df.loc[index, column]
-        return CSVFrame.deserialize_vlarr(vlarr_str, self._dtype)
+        data = self._data[column]
+
+        if is_str_column(data):
+            vlarr_str = data[index].tobytes().decode('utf-8')
+            return CSVFrame.deserialize_vlarr(vlarr_str, self._dtype)
+
+        if isinstance(data, RaggedArray):
+            return np.array(data[index], dtype = self._dtype)
+
+        # vlarrs of a single element may be parsed as scalars
+        value = self._scalars[column][index]
+
+        if (data.dtype.kind == 'f') and np.isnan(value):
+            return np.empty((0, ), dtype = self._dtype)
+
+        return np.array([ value, ], dtype = self._dtype)
 
     def get_scalar(self, column : str, index : int) -> float:
-        return self._df.loc[index, column].astype(self._dtype)
+        return self._scalars[column][index]
+
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        return self._scalars[column][indices]
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        data = self._data[column]
+
+        if is_str_column(data):
+            return super().get_ragged(column)
+
+        if isinstance(data, RaggedArray):
+            return data.astype(self._dtype, copy = False)
+
+        return scalar_to_ragged(self._scalars[column])
 
     def __getitem__(self, column : str) -> np.ndarray:
-        return self._df[column].values
+        data = self._data[column]
+
+        if is_str_column(data):
+            return np.array(
+                [
+                    data[idx].tobytes().decode('utf-8')
+                        for idx in range(len(data))
+                ],
+                dtype = object
+            )
+
+        if isinstance(data, RaggedArray):
+            return data.to_object_array()
+
+        return data
 
     def __len__(self):
         return self._len
-
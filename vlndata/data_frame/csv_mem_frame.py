@@ -2,64 +2,222 @@
 # mistaken lint for shmem
 
 import csv
+import io
+import mmap
 from collections import namedtuple
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 import numpy  as np
 
 from .data_frame_base import DataFrameBase
 from .csv_frame import CSVFrame
-from .funcs import load_file_into_shmem
+from .decompressor import BackgroundDecompressor
+from .funcs import (
+    SharedMemory, find_line_offsets, fingerprint_file, is_compressed_path,
+    load_file_into_shmem, load_line_offsets, map_file, save_line_offsets
+)
 
-CachedLine = namedtuple('CachedLine', [ 'index', 'tokens' ])
+CachedLine  = namedtuple('CachedLine',  [ 'index', 'tokens' ])
+CachedBatch = namedtuple('CachedBatch', [ 'key', 'tokens' ])
 
 class CSVMemFrame(DataFrameBase):
-    """Data Frame to read a CSV file that caches all data into shared memory
+    """Data Frame to read a CSV file that keeps raw file contents in memory
 
     This Data Frame is a more memory efficient version of the `CSVFrame`, but
     uses more CPU to parse data on demand. Please refer to the `CSVFrame`
     documentation about the CSV data format.
 
+    Uncompressed files are memory mapped directly, so their contents are
+    shared with the OS page cache and between the processes that use this
+    frame. Compressed files (and file-like objects) are decompressed into
+    a shared memory block.
+
+    Compressed files can also be decompressed in the background by
+    `decompress_threads` threads (c.f. `BackgroundDecompressor`). In this
+    case, the rows that have already been decompressed can be read right away,
+    while the calls that need the whole file (e.g. `len`) wait for the
+    decompression to finish.
+
+    The byte offsets of the CSV lines are indexed lazily, on the first row
+    access. The index is built with a vectorized scan of the file contents
+    and can be saved into a sidecar file `path + '.index.npy'`, which is
+    reused when the frame is opened again (as long as the size and
+    modification time of the CSV file are unchanged). Pickled copies of the
+    frame memory map the sidecar file instead of copying the index.
+
+    The batch accessors (c.f. `DataFrameBase.get_scalar_batch`) parse the
+    lines of a batch once, and keep the parsed lines for the accessors of the
+    other columns of the same batch.
+
     Parameters
     ----------
     path : str
         Input CSV file path.
+    index_threads : int, optional
+        Number of threads to scan the file for line offsets. Default: 1.
+    cache_index : bool, optional
+        Whether to save and reuse the sidecar line offsets index file.
+        Default: False.
+    decompress_threads : int, optional
+        If positive, compressed files are decompressed in the background by
+        this number of threads. Otherwise, they are decompressed during the
+        frame construction. Default: 0.
     """
 
-    def __init__(self, path : str, dtype : Any = 'float32'):
+    def __init__(
+        self,
+        path          : str,
+        dtype         : Any  = 'float32',
+        index_threads : int  = 1,
+        cache_index   : bool = False,
+        decompress_threads : int = 0,
+    ):
         super().__init__(dtype)
 
-        self._shmem = load_file_into_shmem(path)
+        self._path  = path
+        self._shmem : Optional[SharedMemory] = None
+        self._owner = True
+
+        self._loader : Optional[BackgroundDecompressor] = None
+
+        if (
+                isinstance(path, str) and is_compressed_path(path)
+            and (decompress_threads > 0)
+        ):
+            self._loader = BackgroundDecompressor(path, decompress_threads)
+
+        self._index_threads = index_threads
+        self._cache_index   = cache_index and isinstance(path, str)
 
-        self._offsets : List[int] = []
+        self._open_buffer()
+
+        self._offsets : Optional[np.ndarray] = None
         self._columns : List[str] = []
         self._colmap  : Dict[str, int] = {}
 
         self._infer_csv_columns()
-        self._infer_line_offsets()
 
-        self._cached_line = CachedLine(-1, [])
+        self._cached_line  = CachedLine(-1, [])
+        self._cached_batch = CachedBatch(None, [])
+
+    def _open_buffer(self) -> None:
+        path = self._path
+
+        if self._loader is not None:
+            self._buffer = None
+        elif isinstance(path, str) and (not is_compressed_path(path)):
+            self._buffer = map_file(path)
+        else:
+            if self._shmem is None:
+                self._shmem = load_file_into_shmem(self._path)
+
+            self._buffer = self._shmem.buf.obj
+
+    def _adopt_loader(self) -> None:
+        """Switch to the buffer and index of the finished background loader
+        """
+        self._shmem   = self._loader.shmem
+        self._offsets = self._loader.offsets
+        self._loader  = None
+
+        self._open_buffer()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if self._loader is not None:
+            self._adopt_loader()
+
+        offsets = self._offsets
+        sidecar = (
+                self._cache_index and (offsets is not None)
+            and (load_line_offsets(self._path) is not None)
+        )
+
+        if sidecar:
+            # the copies re-map the sidecar index instead
+            offsets = None
+
+        return {
+            'path'    : self._path if isinstance(self._path, str) else None,
+            'shmem'   : self._shmem,
+            'dtype'   : self._dtype,
+            'offsets' : offsets,
+            'sidecar' : sidecar,
+            'cols'    : self._columns,
+            'index_threads' : self._index_threads,
+            'cache_index'   : self._cache_index,
+        }
+
+    def __setstate__(self, state : Dict[str, Any]):
+        self._path    = state['path']
+        self._shmem   = state['shmem']
+        self._dtype   = state['dtype']
+        self._offsets = state['offsets']
+        self._columns = state['cols']
+        self._owner   = False
+        self._loader  = None
+
+        self._index_threads = state['index_threads']
+        self._cache_index   = state['cache_index']
+
+        if state['sidecar']:
+            # the offsets are re-indexed lazily if the sidecar is outdated
+            self._offsets = load_line_offsets(self._path)
+
+        self._colmap  = {
+            col : idx for (idx, col) in enumerate(self._columns)
+        }
+
+        self._cached_line  = CachedLine(-1, [])
+        self._cached_batch = CachedBatch(None, [])
+        self._open_buffer()
 
     def __del__(self):
-        self._shmem.unlink()
+        if getattr(self, '_loader', None) is not None:
+            self._loader.close()
+
+        if self._shmem is not None:
+            if self._owner:
+                self._shmem.unlink()
+        elif isinstance(getattr(self, '_buffer', None), mmap.mmap):
+            self._buffer.close()
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Byte offsets of the line breaks of the csv file"""
+        if self._loader is not None:
+            self._adopt_loader()
+
+        if self._offsets is None:
+            self._offsets = self._infer_line_offsets()
 
-    def _infer_line_offsets(self):
+        return self._offsets
+
+    def _infer_line_offsets(self) -> np.ndarray:
         """Find byte offsets of lines in the csv file"""
-        self._offsets = []
-        idx = -1
+        if self._cache_index:
+            result = load_line_offsets(self._path)
+
+            if result is not None:
+                return result
 
-        while True:
-            idx = self._shmem.buf.obj.find(b'\n', idx + 1)
-            if idx == -1:
-                break
+        result = find_line_offsets(
+            self._buffer, len(self._buffer), n_threads = self._index_threads
+        )
 
-            self._offsets.append(idx)
+        if self._cache_index:
+            save_line_offsets(self._path, result)
+
+        return result
 
     def _infer_csv_columns(self):
         """Parse header of a csv file and infer columns"""
-        self._shmem.buf.obj.seek(0, 0)
-        df = pd.read_csv(self._shmem.buf.obj, nrows = 1)
+        if self._loader is not None:
+            header = self._loader.read(0, self._loader.get_line_break(0))
+            df     = pd.read_csv(io.BytesIO(header), nrows = 1)
+        else:
+            self._buffer.seek(0, 0)
+            df = pd.read_csv(self._buffer, nrows = 1)
 
         self._columns = list(df.columns)
         self._colmap  = {
@@ -69,14 +227,29 @@ class CSVMemFrame(DataFrameBase):
     def columns(self) -> List[str]:
         return self._columns
 
+    def fingerprint(self) -> Optional[str]:
+        return fingerprint_file(self._path, type(self).__name__, self._dtype)
+
+    def _read_line(self, index : int) -> bytes:
+        if (self._loader is not None) and self._loader.done:
+            self._adopt_loader()
+
+        if self._loader is not None:
+            idx_start = self._loader.get_line_break(index) + 1
+            idx_end   = self._loader.get_line_break(index + 1)
+
+            return self._loader.read(idx_start, idx_end)
+
+        offsets   = self.offsets
+        idx_start = offsets[index] + 1
+        idx_end   = offsets[index + 1]
+
+        return self._buffer[idx_start:idx_end]
+
     def get_value(self, column : str, index : int) -> str:
         """Get raw unparsed str value for column `column` and row `index`"""
         if self._cached_line.index != index:
-            idx_start = self._offsets[index] + 1
-            idx_end   = self._offsets[index + 1]
-
-            line = self._shmem.buf[idx_start:idx_end].tobytes()
-            line = line.decode('utf-8')
+            line = self._read_line(index).decode('utf-8')
 
             reader = csv.reader([ line, ])
             tokens = next(reader)
@@ -85,6 +258,19 @@ class CSVMemFrame(DataFrameBase):
 
         return self._cached_line.tokens[self._colmap[column]]
 
+    def get_batch_tokens(self, indices : np.ndarray) -> List[List[str]]:
+        """Get parsed lines `indices`, parsing them once per batch"""
+        indices = np.asarray(indices, dtype = np.int64)
+        key     = indices.tobytes()
+
+        if self._cached_batch.key != key:
+            lines  = [ self._read_line(x).decode('utf-8') for x in indices ]
+            tokens = list(csv.reader(lines))
+
+            self._cached_batch = CachedBatch(key, tokens)
+
+        return self._cached_batch.tokens
+
     def get_vlarr(self, column : str, index  : int) -> np.ndarray:
         vlarr_str = self.get_value(column, index)
         return CSVFrame.deserialize_vlarr(vlarr_str, self._dtype)
@@ -92,13 +278,34 @@ class CSVMemFrame(DataFrameBase):
     def get_scalar(self, column : str, index : int) -> float:
         return float(self.get_value(column, index))
 
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        col_idx = self._colmap[column]
+
+        return np.array([
+            float(tokens[col_idx]) for tokens in self.get_batch_tokens(indices)
+        ]).reshape(len(indices))
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        col_idx = self._colmap[column]
+
+        return [
+            CSVFrame.deserialize_vlarr(tokens[col_idx], self._dtype)
+                for tokens in self.get_batch_tokens(indices)
+        ]
+
     def __getitem__(self, column : str) -> np.ndarray:
-        self._shmem.buf.obj.seek(0, 0)
+        if self._loader is not None:
+            self._adopt_loader()
+
+        self._buffer.seek(0, 0)
 
         return pd.read_csv(
-            self._shmem.buf.obj, usecols = [ column, ], squeeze = True
+            self._buffer, usecols = [ column, ], squeeze = True
         )
 
     def __len__(self):
-        return len(self._offsets) - 1
-
+        return len(self.offsets) - 1
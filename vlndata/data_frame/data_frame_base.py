@@ -1,8 +1,15 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, List, Optional
 
 import numpy as np
 
+from .ragged import RaggedArray
+
+# Serializes the row by row `get_ragged` fallbacks, which use row accessors
+# that are not thread safe (e.g. frames that cache the last read row)
+ROW_ACCESS_LOCK = threading.RLock()
+
 class DataFrameBase(ABC):
     """Base Class for vlndata Data Frames
 
@@ -19,10 +26,16 @@ class DataFrameBase(ABC):
     ----------
     dtype
         Numpy compatible data type of the returned data.
+    cast : bool, optional
+        Whether to cast the returned data to `dtype`. If False, the data is
+        returned in its source precision, and is expected to be cast later,
+        e.g. at collate time. Frames that do not support this option always
+        cast the data. Default: True.
     """
 
-    def __init__(self, dtype : Any = 'float32'):
+    def __init__(self, dtype : Any = 'float32', cast : bool = True):
         self._dtype = np.dtype(dtype)
+        self._cast  = cast
 
     @abstractmethod
     def columns(self) -> List[str]:
@@ -39,6 +52,58 @@ class DataFrameBase(ABC):
         """Get a vlarray value at column `column` and row `index`"""
         raise NotImplementedError
 
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        """Get scalar values at column `column` and rows `indices`
+
+        The batch accessors remap and read whole batches of rows at once,
+        which allows frames and frame decorators (e.g. `SubFrame`) to avoid
+        the per-row overhead of `get_scalar`. This default implementation
+        collects the values row by row.
+        """
+        return np.array(
+            [ self.get_scalar(column, idx) for idx in indices ]
+        ).reshape(len(indices))
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        """Get vlarray values at column `column` and rows `indices`
+
+        C.f. `get_scalar_batch`.
+        """
+        return [ self.get_vlarr(column, idx) for idx in indices ]
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        """Get all vlarrays of column `column` as a single ragged array
+
+        The ragged array allows to evaluate derived quantities of the whole
+        column (e.g. per row means) with vectorized numpy operations, c.f.
+        `RaggedArray`. This default implementation collects the ragged array
+        row by row. Subclasses override it with more efficient versions.
+
+        The row by row collection holds `ROW_ACCESS_LOCK`, so this method can
+        be called concurrently (c.f. `VarFrame` with `n_workers`).
+        """
+        with ROW_ACCESS_LOCK:
+            return RaggedArray.from_arrays(
+                ( self.get_vlarr(column, idx) for idx in range(len(self)) ),
+                dtype = self._dtype if self.cast else None
+            )
+
+    def fingerprint(self) -> Optional[str]:
+        """Get a fingerprint of the contents of this data frame
+
+        Two frames with the same fingerprint are expected to hold the same
+        data. File based frames fingerprint the location, size and
+        modification time of their files. The fingerprint is used to
+        invalidate persistent caches of derived data (c.f. `VarFrame`).
+
+        Returns None if the contents of the frame cannot be fingerprinted.
+        """
+        return None
+
     @abstractmethod
     def __len__(self):
         raise NotImplementedError
@@ -52,3 +117,8 @@ class DataFrameBase(ABC):
     def dtype(self):
         return self._dtype
 
+    @property
+    def cast(self) -> bool:
+        """Whether the returned data is cast to `dtype`"""
+        return getattr(self, '_cast', True)
+
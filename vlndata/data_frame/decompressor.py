@@ -0,0 +1,453 @@
+import bisect
+import gzip
+import lzma
+import os
+import struct
+import threading
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .funcs import (
+    GZIP_EXTENSIONS, LZMA_EXTENSIONS, SharedMemory, find_block_line_breaks,
+    map_file
+)
+
+GZIP_MAGIC   = b'\x1f\x8b'
+XZ_MAGIC     = b'\xfd7zXZ\x00'
+XZ_FOOTER    = b'YZ'
+BGZF_MAX_BLOCK = 2**16 - 256
+
+XZBlock = Tuple[bytes, int, int, int]
+
+def split_bgzf_members(data : Any) -> Optional[List[Tuple[int, int]]]:
+    """Find (start, end) spans of members of a blocked gzip (BGZF) file
+
+    Blocked gzip files (e.g. produced by `bgzip` or `compress_bgzf`) store
+    the compressed size of each member in the 'BC' extra field of the member
+    header, which allows to split the file into independent members without
+    decompressing it. Returns None if `data` is not a blocked gzip file.
+    """
+    result = []
+    pos    = 0
+    size   = len(data)
+
+    while pos < size:
+        header = bytes(data[pos:pos + 18])
+
+        if (
+               (len(header) < 18)
+            or (header[:2] != GZIP_MAGIC)
+            or (not header[3] & 0x04)
+            or (header[12:14] != b'BC')
+        ):
+            return None
+
+        member_size = struct.unpack('<H', header[16:18])[0] + 1
+        result.append((pos, pos + member_size))
+        pos += member_size
+
+    return result
+
+def compress_bgzf(data : bytes, compresslevel : int = 6) -> bytes:
+    """Compress `data` into a blocked gzip (BGZF) file readable by `gzip`"""
+    result = []
+
+    for start in range(0, len(data), BGZF_MAX_BLOCK):
+        chunk = data[start:start + BGZF_MAX_BLOCK]
+
+        compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+        payload    = compressor.compress(chunk) + compressor.flush()
+        bsize      = 18 + len(payload) + 8 - 1
+
+        result.append(
+              GZIP_MAGIC + b'\x08\x04' + b'\x00' * 4 + b'\x00\xff'
+            + struct.pack('<HBBHH', 6, ord('B'), ord('C'), 2, bsize)
+            + payload
+            + struct.pack('<II', zlib.crc32(chunk), len(chunk))
+        )
+
+    return b''.join(result)
+
+def read_xz_varint(data : Any, pos : int) -> Tuple[int, int]:
+    result = 0
+    shift  = 0
+
+    while True:
+        byte    = data[pos]
+        result |= (byte & 0x7F) << shift
+        shift  += 7
+        pos    += 1
+
+        if not byte & 0x80:
+            return (result, pos)
+
+def encode_xz_varint(value : int) -> bytes:
+    result = bytearray()
+
+    while value >= 0x80:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    result.append(value)
+    return bytes(result)
+
+def ceil4(value : int) -> int:
+    return (value + 3) & ~3
+
+def split_xz_blocks(data : Any) -> Optional[List[XZBlock]]:
+    """Find independent blocks of a (multi-stream, multi-block) xz file
+
+    Returns a list of (stream header, block start, unpadded block size,
+    uncompressed block size), or None if the file cannot be parsed.
+    """
+    result : List[XZBlock] = []
+    pos = len(data)
+
+    while pos > 0:
+        while (pos >= 4) and (bytes(data[pos - 4:pos]) == b'\x00' * 4):
+            pos -= 4
+
+        footer = bytes(data[pos - 12:pos])
+
+        if (len(footer) != 12) or (footer[-2:] != XZ_FOOTER):
+            return None
+
+        index_size  = (struct.unpack('<I', footer[4:8])[0] + 1) * 4
+        index_start = pos - 12 - index_size
+
+        if data[index_start] != 0:
+            return None
+
+        n_records, idx = read_xz_varint(data, index_start + 1)
+        records = []
+
+        for _ in range(n_records):
+            unpadded, idx     = read_xz_varint(data, idx)
+            uncompressed, idx = read_xz_varint(data, idx)
+            records.append((unpadded, uncompressed))
+
+        blocks_size  = sum(ceil4(unpadded) for (unpadded, _) in records)
+        stream_start = index_start - blocks_size - 12
+        header       = bytes(data[stream_start:stream_start + 12])
+
+        if header[:6] != XZ_MAGIC:
+            return None
+
+        stream_blocks = []
+        block_start   = stream_start + 12
+
+        for (unpadded, uncompressed) in records:
+            stream_blocks.append((header, block_start, unpadded, uncompressed))
+            block_start += ceil4(unpadded)
+
+        result = stream_blocks + result
+        pos    = stream_start
+
+    return result
+
+def decompress_xz_block(data : Any, block : XZBlock) -> bytes:
+    """Decompress a single xz block by wrapping it into a standalone stream"""
+    header, start, unpadded, uncompressed = block
+
+    index = (
+          b'\x00' + encode_xz_varint(1)
+        + encode_xz_varint(unpadded) + encode_xz_varint(uncompressed)
+    )
+    index += b'\x00' * (ceil4(len(index)) - len(index))
+    index += struct.pack('<I', zlib.crc32(index))
+
+    footer = struct.pack('<I', len(index) // 4 - 1) + header[6:8]
+    footer = struct.pack('<I', zlib.crc32(footer)) + footer + XZ_FOOTER
+
+    stream = (
+          header + bytes(data[start:start + ceil4(unpadded)])
+        + index + footer
+    )
+
+    return lzma.decompress(stream, format = lzma.FORMAT_XZ)
+
+class BackgroundDecompressor:
+    # pylint: disable=too-many-instance-attributes
+    """Decompress a file in background threads while indexing its lines
+
+    This object decompresses a gzip or xz compressed CSV file in the
+    background and incrementally builds an index of byte offsets of its lines
+    (c.f. `find_line_offsets`). The lines that have already been decompressed
+    and indexed can be read before the decompression finishes.
+
+    Blocked gzip (BGZF) files and multi-block (e.g. produced by `xz -T0`) or
+    multi-stream xz files are decompressed in parallel by `n_threads`
+    threads. Other files are decompressed sequentially by a single background
+    thread.
+
+    Once the decompression is finished, the decompressed contents are moved
+    into a shared memory block. The block is owned by the caller that takes
+    it via `shmem`. Otherwise, it is unlinked by `close`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the compressed file.
+    n_threads : int, optional
+        Number of decompression threads. Default: 1.
+    block_size : int, optional
+        Size of blocks (in bytes) to decompress at once. Default: 16 MiB.
+    """
+
+    def __init__(
+        self, path : str, n_threads : int = 1, block_size : int = 2**24
+    ):
+        self._path       = path
+        self._n_threads  = max(1, n_threads)
+        self._block_size = block_size
+
+        self._cond   = threading.Condition()
+        self._blocks : List[Any] = []
+        self._starts : List[int] = []
+        self._size   = 0
+        self._done   = False
+        self._closed = False
+        self._error  : Optional[BaseException] = None
+        self._shmem  : Optional[SharedMemory]  = None
+
+        self._offsets   = np.empty((1024, ), dtype = np.int64)
+        self._n_offsets = 0
+        self._n_quotes  = 0
+
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+    def _iter_serial_blocks(self) -> Iterator[bytes]:
+        _basename, ext = os.path.splitext(self._path)
+
+        if ext in LZMA_EXTENSIONS:
+            f = lzma.open(self._path, mode = 'rb')
+        else:
+            f = gzip.open(self._path, mode = 'rb')
+
+        with f:
+            while True:
+                block = f.read(self._block_size)
+
+                if len(block) == 0:
+                    break
+
+                yield block
+
+    def _group_bgzf_members(
+        self, members : List[Tuple[int, int]]
+    ) -> List[Tuple[int, int]]:
+        # members are small (< 64 KiB), decompress them in groups
+        group_size = max(1, self._block_size // (4 * BGZF_MAX_BLOCK))
+
+        return [
+            (members[idx][0], members[idx:idx + group_size][-1][1])
+                for idx in range(0, len(members), group_size)
+        ]
+
+    def _iter_blocks(self) -> Iterator[bytes]:
+        _basename, ext = os.path.splitext(self._path)
+
+        if self._n_threads == 1:
+            yield from self._iter_serial_blocks()
+            return
+
+        with map_file(self._path) as data:
+            if ext in GZIP_EXTENSIONS:
+                members = split_bgzf_members(data)
+
+                if members is not None:
+                    spans = self._group_bgzf_members(members)
+
+                    with ThreadPoolExecutor(self._n_threads) as executor:
+                        yield from executor.map(
+                            lambda span : gzip.decompress(data[slice(*span)]),
+                            spans
+                        )
+
+                    return
+
+            elif ext in LZMA_EXTENSIONS:
+                blocks = split_xz_blocks(data)
+
+                if (blocks is not None) and (len(blocks) > 1):
+                    with ThreadPoolExecutor(self._n_threads) as executor:
+                        yield from executor.map(
+                            lambda block : decompress_xz_block(data, block),
+                            blocks
+                        )
+
+                    return
+
+        yield from self._iter_serial_blocks()
+
+    def _index_block(self, block : bytes, start : int) -> None:
+        breaks, n_quotes_before, n_quotes = find_block_line_breaks(
+            block, 0, len(block)
+        )
+
+        breaks = breaks[(self._n_quotes + n_quotes_before) % 2 == 0] + start
+        self._n_quotes += n_quotes
+
+        self._append_offsets(breaks)
+
+    def _append_offsets(self, offsets : np.ndarray) -> None:
+        n_offsets = self._n_offsets + len(offsets)
+
+        if n_offsets > len(self._offsets):
+            buffer = np.empty(
+                (max(n_offsets, 2 * len(self._offsets)), ), dtype = np.int64
+            )
+            buffer[:self._n_offsets] = self._offsets[:self._n_offsets]
+            self._offsets = buffer
+
+        self._offsets[self._n_offsets:n_offsets] = offsets
+        self._n_offsets = n_offsets
+
+    def _move_into_shmem(self) -> None:
+        shmem = SharedMemory(create = True, size = max(1, self._size))
+
+        for (idx, start) in enumerate(self._starts):
+            block = self._blocks[idx]
+            end   = start + len(block)
+            shmem.buf[start:end] = block
+
+            with self._cond:
+                self._blocks[idx] = shmem.buf[start:end]
+
+        self._shmem = shmem
+
+    def _read_last_byte(self) -> bytes:
+        return self.read(self._size - 1, self._size)
+
+    def _run(self) -> None:
+        try:
+            for block in self._iter_blocks():
+                if self._closed:
+                    break
+
+                if len(block) == 0:
+                    continue
+
+                with self._cond:
+                    self._index_block(block, self._size)
+
+                    self._blocks.append(block)
+                    self._starts.append(self._size)
+                    self._size += len(block)
+
+                    self._cond.notify_all()
+
+            if self._closed:
+                raise RuntimeError("Decompressor is closed")
+
+            if (self._size > 0) and (self._read_last_byte() != b'\n'):
+                with self._cond:
+                    self._append_offsets(np.array([ self._size, ]))
+
+            self._move_into_shmem()
+
+        except BaseException as e: # pylint: disable=broad-except
+            self._error = e
+
+        with self._cond:
+            self._done = True
+            self._cond.notify_all()
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(
+                f"Failed to decompress '{self._path}'"
+            ) from self._error
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def wait(self) -> None:
+        """Wait for the decompression to finish"""
+        with self._cond:
+            self._cond.wait_for(lambda : self._done)
+
+        self._check_error()
+
+    def wait_for_line_break(self, index : int) -> bool:
+        """Wait until the line break number `index` is indexed
+
+        Returns False if the file has fewer line breaks than `index + 1`.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda : self._done or (self._n_offsets > index)
+            )
+            self._check_error()
+
+            return self._n_offsets > index
+
+    def get_line_break(self, index : int) -> int:
+        if not self.wait_for_line_break(index):
+            raise IndexError(f"Line break {index} is out of range")
+
+        return int(self._offsets[index])
+
+    def read(self, start : int, end : int) -> bytes:
+        """Read decompressed bytes [start, end), waiting for them if needed"""
+        with self._cond:
+            self._cond.wait_for(lambda : self._done or (self._size >= end))
+            self._check_error()
+
+            end = min(end, self._size)
+            idx = bisect.bisect_right(self._starts, start) - 1
+
+            result = []
+
+            while start < end:
+                block_start = self._starts[idx]
+                block       = self._blocks[idx]
+                block_end   = min(end, block_start + len(block))
+
+                result.append(
+                    bytes(block[start - block_start:block_end - block_start])
+                )
+
+                start = block_end
+                idx  += 1
+
+            return b''.join(result)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Byte offsets of all line breaks. Waits for the decompression"""
+        self.wait()
+        return self._offsets[:self._n_offsets]
+
+    @property
+    def shmem(self) -> SharedMemory:
+        """Shared memory with the decompressed data. Waits for decompression
+
+        The caller takes the ownership of the shared memory block and is
+        responsible for unlinking it.
+        """
+        self.wait()
+
+        result      = self._shmem
+        self._shmem = None
+
+        return result
+
+    def close(self) -> None:
+        """Stop the decompression and release the shared memory block"""
+        self._closed = True
+        self._thread.join()
+
+        # release the views of the shared memory before closing it
+        self._blocks = []
+
+        if self._shmem is not None:
+            self._shmem.close()
+            self._shmem.unlink()
+            self._shmem = None
@@ -3,17 +3,25 @@ from typing import Any, Dict, List, Optional
 
 import numpy as np
 from .data_frame_base import DataFrameBase
+from .funcs           import hash_parts
+from .ragged          import RaggedArray
 
 class DictFrame(DataFrameBase):
-    """Data Frame that extracts data from a python dictionary"""
+    """Data Frame that extracts data from a python dictionary
+
+    The variable length arrays are cast to `dtype` once, during the
+    construction, and `get_vlarr` returns read-only views of them. If `cast`
+    is False, the arrays are kept in their source precision.
+    """
 
     def __init__(
         self,
         scalar_data_dict : Optional[Dict[str, Any]] = None,
         vlarr_data_dict  : Optional[Dict[str, Any]] = None,
-        dtype : Any = None
+        dtype : Any  = None,
+        cast  : bool = True,
     ):
-        super().__init__(dtype)
+        super().__init__(dtype, cast)
 
         scalar_data_dict = scalar_data_dict or {}
         vlarr_data_dict  = vlarr_data_dict or {}
@@ -41,18 +49,56 @@ class DictFrame(DataFrameBase):
         self, scalar_data : Dict[str, Any], vlarr_data : Dict[str, Any]
     ):
         for (k, v) in scalar_data.items():
-            self._data_scalar[k] = v
+            self._data_scalar[k] = np.asarray(v)
 
         for (k, v) in vlarr_data.items():
-            self._data_vlarr[k] = np.array(
-                [ np.array(x) for x in v ], dtype = object
-            )
+            column = np.empty(len(v), dtype = object)
+
+            for (idx, x) in enumerate(v):
+                x = np.array(x, dtype = self._dtype if self._cast else None)
+                x.flags.writeable = False
+                column[idx] = x
+
+            self._data_vlarr[k] = column
 
     def get_scalar(self, column : str, index : int) -> Any:
-        return self._dtype.type(self._data_scalar[column][index])
+        if self._cast:
+            return self._dtype.type(self._data_scalar[column][index])
+
+        return self._data_scalar[column][index]
 
     def get_vlarr(self, column : str, index : int) -> np.ndarray:
-        return self._data_vlarr[column][index].astype(self._dtype)
+        return self._data_vlarr[column][index]
+
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        result = self._data_scalar[column][indices]
+
+        if self._cast:
+            return result.astype(self._dtype, copy = False)
+
+        return result
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        return list(self._data_vlarr[column][indices])
+
+    def fingerprint(self) -> Optional[str]:
+        parts : List[Any] = [ self._dtype, self._cast ]
+
+        for (k, v) in self._data_scalar.items():
+            parts += [ k, np.asarray(v) ]
+
+        for (k, v) in self._data_vlarr.items():
+            ragged = self.get_ragged(k)
+            parts += [ k, ragged.values, ragged.offsets ]
+
+        return hash_parts(*parts)
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        return RaggedArray.from_arrays(self._data_vlarr[column])
 
     def columns(self) -> List[str]:
         return self._columns
@@ -0,0 +1,136 @@
+from abc import ABC, abstractmethod
+from typing import Any, Iterator, List
+
+import h5py
+import pandas as pd
+
+from vlndata.funcs import Spec, unpack_name_args
+
+from .csv_frame       import parse_vlarr_column
+from .data_frame_base import DataFrameBase
+from .dict_frame      import DictFrame
+from .hdf_frame       import get_column_length, is_ragged_column, \
+    read_ragged_rows
+
+class FrameStream(ABC):
+    """Interface for a sequential stream of data frame chunks
+
+    Unlike data frames, a frame stream does not provide random access to the
+    rows. Instead, it reads the input file sequentially in chunks of a fixed
+    number of rows, and returns each chunk as a small in-memory data frame.
+    Therefore, the memory usage of the stream does not depend on the size of
+    the input file.
+
+    Parameters
+    ----------
+    path : str
+        Input file path.
+    dtype : optional
+        Data type of the returned data. Default: 'float32'.
+    chunk_size : int, optional
+        Number of rows per chunk. Default: 65536.
+    """
+
+    def __init__(
+        self, path : str, dtype : Any = 'float32', chunk_size : int = 65536
+    ):
+        self._path       = path
+        self._dtype      = dtype
+        self._chunk_size = chunk_size
+
+    @abstractmethod
+    def iter_chunks(
+        self, scalar_columns : List[str], vlarr_columns : List[str]
+    ) -> Iterator[DataFrameBase]:
+        """Iterate over chunks holding `scalar_columns` and `vlarr_columns`"""
+        raise NotImplementedError
+
+class CSVFrameStream(FrameStream):
+    """Frame stream that reads a CSV file in chunks
+
+    Compressed files are decompressed on the fly. Please refer to the
+    `CSVFrame` documentation for the details of the CSV format.
+    """
+
+    def iter_chunks(
+        self, scalar_columns : List[str], vlarr_columns : List[str]
+    ) -> Iterator[DataFrameBase]:
+        # Read vlarrs as strings, otherwise pandas infers a numeric type
+        # in the chunks where all vlarrs have a single element
+        reader = pd.read_csv(
+            self._path,
+            usecols   = list(scalar_columns) + list(vlarr_columns),
+            dtype     = { column : str for column in vlarr_columns },
+            chunksize = self._chunk_size
+        )
+
+        with reader:
+            for chunk in reader:
+                data_scalar = {
+                    column : chunk[column].values for column in scalar_columns
+                }
+
+                data_vlarr = {}
+
+                for column in vlarr_columns:
+                    ragged = parse_vlarr_column(
+                        chunk[column].values, self._dtype
+                    )
+                    data_vlarr[column] = [
+                        ragged[idx] for idx in range(len(ragged))
+                    ]
+
+                yield DictFrame(data_scalar, data_vlarr, self._dtype)
+
+class HDF5FrameStream(FrameStream):
+    """Frame stream that reads an HDF5 file in chunks
+
+    Please refer to the `HDF5Frame` documentation for the details of the
+    file format.
+    """
+
+    def iter_chunks(
+        self, scalar_columns : List[str], vlarr_columns : List[str]
+    ) -> Iterator[DataFrameBase]:
+        with h5py.File(self._path, 'r') as f:
+            columns = list(scalar_columns) + list(vlarr_columns)
+            length  = 0
+
+            if len(columns) > 0:
+                length = get_column_length(f[columns[0]])
+
+            for start in range(0, length, self._chunk_size):
+                end = min(start + self._chunk_size, length)
+
+                data_scalar = {
+                    column : f[column][start:end] for column in scalar_columns
+                }
+
+                data_vlarr = {}
+
+                for column in vlarr_columns:
+                    node = f[column]
+
+                    if is_ragged_column(node):
+                        ragged = read_ragged_rows(node, start, end)
+                        data_vlarr[column] = [
+                            ragged[idx] for idx in range(len(ragged))
+                        ]
+                    else:
+                        data_vlarr[column] = list(node[start:end])
+
+                yield DictFrame(data_scalar, data_vlarr, self._dtype)
+
+STREAMS_DICT = {
+    'csv-stream' : CSVFrameStream,
+    'hdf-stream' : HDF5FrameStream,
+}
+
+def select_frame_stream(stream : Spec) -> FrameStream:
+    """Select frame stream based on its specification
+
+    C.f. `select_frame` for the format of the specification and
+    `STREAMS_DICT` for the names of the supported streams.
+    """
+    name, args = unpack_name_args(stream)
+    return STREAMS_DICT[name](**args)
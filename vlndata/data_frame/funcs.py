@@ -1,10 +1,16 @@
 import gzip
+import hashlib
 import lzma
+import mmap
 import os
+import shutil
 import sys
 
+from concurrent.futures import ThreadPoolExecutor
 from io import BufferedReader, BytesIO
-from typing import Any, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
 
 if sys.version_info[:2] >= (3,8):
     from multiprocessing.shared_memory import SharedMemory
@@ -24,13 +30,25 @@ def read_into_shmem(f : BufferedReader) -> SharedMemory:
 
     return result
 
+LZMA_EXTENSIONS = [ '.xz', '.lz', '.lzip' ]
+GZIP_EXTENSIONS = [ '.gz', '.gzip' ]
+
+def is_compressed_path(path : str) -> bool:
+    _basename, ext = os.path.splitext(path)
+    return ext in (LZMA_EXTENSIONS + GZIP_EXTENSIONS)
+
+def map_file(path : str) -> mmap.mmap:
+    """Memory map an uncompressed file `path` for reading"""
+    with open(path, mode = 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+
 def load_file_into_shmem(path : Union[str, BufferedReader]) -> SharedMemory:
     if isinstance(path, str):
         _basename, ext = os.path.splitext(path)
 
-        if ext in [ '.xz', '.lz', '.lzip' ]:
+        if ext in LZMA_EXTENSIONS:
             f = lzma.open(path, mode = 'rb')
-        elif ext in [ '.gz', '.gzip' ]:
+        elif ext in GZIP_EXTENSIONS:
             f = gzip.open(path, mode = 'rb')
         else:
             f = open(path, mode = 'rb')
@@ -45,3 +63,227 @@ def load_file_into_shmem(path : Union[str, BufferedReader]) -> SharedMemory:
 def make_buffer_from_shmem(shmem : SharedMemory) -> BytesIO:
     return BytesIO(shmem.buf)
 
+
+LineBreaks = Tuple[np.ndarray, np.ndarray, int]
+
+INDEX_SUFFIX = '.index.npy'
+
+def find_block_line_breaks(
+    buffer : Any, start : int, end : int
+) -> LineBreaks:
+    """Find line breaks and quotes in bytes [start, end) of `buffer`
+
+    Returns
+    -------
+    (breaks, n_quotes_before, n_quotes)
+        Offsets of all newline bytes in the block, number of quote bytes
+        preceding each newline within the block, and the total number of
+        quote bytes in the block.
+    """
+    data   = np.frombuffer(
+        buffer, dtype = np.uint8, count = end - start, offset = start
+    )
+    breaks = np.flatnonzero(data == ord('\n'))
+    quotes = np.flatnonzero(data == ord('"'))
+
+    n_quotes_before = np.searchsorted(quotes, breaks)
+
+    return (breaks + start, n_quotes_before, len(quotes))
+
+def find_line_offsets(
+    buffer     : Any,
+    size       : int,
+    block_size : int = 2**26,
+    n_threads  : int = 1,
+) -> np.ndarray:
+    """Find byte offsets of the line breaks of a CSV file in `buffer`
+
+    The buffer is scanned in blocks of `block_size` bytes with vectorized
+    numpy operations, optionally across `n_threads` threads. Newlines inside
+    quoted CSV fields are not considered to be line breaks.
+
+    If the buffer does not end with a newline, then `size` is appended to the
+    result, such that the last line is always terminated.
+    """
+    blocks = [
+        (start, min(start + block_size, size))
+            for start in range(0, size, block_size)
+    ]
+
+    def find_breaks(block):
+        return find_block_line_breaks(buffer, *block)
+
+    if n_threads > 1:
+        with ThreadPoolExecutor(n_threads) as executor:
+            block_breaks = list(executor.map(find_breaks, blocks))
+    else:
+        block_breaks = [ find_breaks(block) for block in blocks ]
+
+    result   = []
+    n_quotes = 0
+
+    for (breaks, n_quotes_before, n_block_quotes) in block_breaks:
+        is_unquoted = ((n_quotes + n_quotes_before) % 2 == 0)
+        result.append(breaks[is_unquoted])
+
+        n_quotes += n_block_quotes
+
+    if (size > 0) and (buffer[size - 1:size] != b'\n'):
+        result.append(np.array([ size, ]))
+
+    if len(result) == 0:
+        return np.empty((0, ), dtype = np.int64)
+
+    return np.concatenate(result).astype(np.int64, copy = False)
+
+def get_file_signature(path : str) -> np.ndarray:
+    stat = os.stat(path)
+    return np.array([ stat.st_size, stat.st_mtime_ns ], dtype = np.int64)
+
+def load_line_offsets(path : str) -> Optional[np.ndarray]:
+    """Load line offsets of `path` saved by `save_line_offsets` if valid"""
+    index_path = path + INDEX_SUFFIX
+
+    if not os.path.exists(index_path):
+        return None
+
+    index = np.load(index_path, mmap_mode = 'r')
+
+    if (len(index) < 2) or np.any(index[:2] != get_file_signature(path)):
+        return None
+
+    return index[2:]
+
+def save_line_offsets(path : str, offsets : np.ndarray) -> None:
+    """Save line offsets of `path` into a sidecar index file"""
+    index = np.concatenate((get_file_signature(path), offsets))
+
+    try:
+        np.save(path + INDEX_SUFFIX, index)
+    except OSError:
+        pass
+
+def spill_arrays(arrays : Dict[str, np.ndarray], directory : str) -> None:
+    """Save `arrays` into `directory` to be loaded with `load_spilled_arrays`
+    """
+    os.makedirs(directory, exist_ok = True)
+
+    for (name, array) in arrays.items():
+        np.save(os.path.join(directory, name + '.npy'), array)
+
+def link_spilled_arrays(
+    directory : str, names : List[str], target : str
+) -> None:
+    """Hard link arrays `names` saved by `spill_arrays` into `target`
+
+    The links share the data (and the page cache) of the saved arrays, which
+    stay on disk until their last link is removed. The arrays are copied if
+    the file system does not support hard links.
+    """
+    os.makedirs(target, exist_ok = True)
+
+    for name in names:
+        src = os.path.join(directory, name + '.npy')
+        dst = os.path.join(target,    name + '.npy')
+
+        try:
+            os.link(src, dst)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # the file system does not support hard links
+            shutil.copyfile(src, dst)
+
+def load_spilled_arrays(
+    directory : str, names : List[str]
+) -> Dict[str, np.ndarray]:
+    """Memory map arrays `names` saved by `spill_arrays`"""
+    return {
+        name : np.load(os.path.join(directory, name + '.npy'), mmap_mode = 'r')
+            for name in names
+    }
+
+def scatter_sorted(
+    indices : np.ndarray, read_sorted : Callable[[np.ndarray], Any]
+) -> Any:
+    """Read rows `indices` in the sorted order, and return them in order
+
+    The `read_sorted` function is called with the sorted `indices`, so that
+    the rows are read in their physical (on-disk) order. Its results (an
+    array or a list of values) are scattered back into the order of
+    `indices`.
+    """
+    indices = np.asarray(indices, dtype = np.int64)
+    order   = np.argsort(indices, kind = 'stable')
+    values  = read_sorted(indices[order])
+
+    if isinstance(values, np.ndarray):
+        result = np.empty_like(values)
+        result[order] = values
+
+        return result
+
+    result = [ None ] * len(values)
+
+    for (pos, value) in zip(order, values):
+        result[pos] = value
+
+    return result
+
+def coalesce_indices(
+    indices : np.ndarray, max_gap : int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Coalesce sorted row `indices` into ranges of contiguous rows
+
+    Consecutive indices that are at most `max_gap` rows apart are merged
+    into the same range. Returns (starts, ends, positions), where the rows
+    [starts[k], ends[k]) are the ranges to read, and `positions` are the
+    positions of `indices` in the concatenation of all ranges.
+    """
+    indices = np.asarray(indices, dtype = np.int64)
+
+    if len(indices) == 0:
+        empty = np.empty((0, ), dtype = np.int64)
+        return (empty, empty, empty)
+
+    breaks = np.flatnonzero(np.diff(indices) > max_gap + 1) + 1
+    starts = indices[np.concatenate(([ 0 ], breaks))]
+    ends   = indices[np.concatenate((breaks - 1, [ len(indices) - 1 ]))] + 1
+
+    range_offsets = np.concatenate(([ 0 ], np.cumsum(ends - starts)[:-1]))
+    range_ids     = np.searchsorted(starts, indices, side = 'right') - 1
+    positions     = range_offsets[range_ids] + (indices - starts[range_ids])
+
+    return (starts, ends, positions)
+
+def hash_parts(*parts : Any) -> str:
+    """Hash a sequence of str, bytes, numpy arrays or other objects (by repr)
+    """
+    result = hashlib.sha1()
+
+    for part in parts:
+        if isinstance(part, np.ndarray) and (part.dtype.kind == 'O'):
+            result.update(repr(part.tolist()).encode('utf-8'))
+        elif isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            result.update(str((part.dtype, part.shape)).encode('utf-8'))
+            result.update(part.tobytes())
+        elif isinstance(part, bytes):
+            result.update(part)
+        else:
+            result.update(repr(part).encode('utf-8'))
+
+        result.update(b'\x00')
+
+    return result.hexdigest()
+
+def fingerprint_file(path : Any, *parts : Any) -> Optional[str]:
+    """Fingerprint file `path` by its location, size and modification time
+
+    Returns None if `path` is not a path of an existing file (e.g. a
+    file-like object).
+    """
+    if (not isinstance(path, str)) or (not os.path.isfile(path)):
+        return None
+
+    return hash_parts(os.path.abspath(path), get_file_signature(path), *parts)
@@ -1,9 +1,54 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Union
 
 import h5py
 import numpy as np
 
 from .data_frame_base import DataFrameBase
+from .funcs           import (
+    coalesce_indices, fingerprint_file, scatter_sorted
+)
+from .ragged          import RaggedArray
+
+HDFNode = Union[h5py.Dataset, h5py.Group]
+
+def is_ragged_column(node : HDFNode) -> bool:
+    """Check whether an HDF5 node is a ragged (values + offsets) column"""
+    return isinstance(node, h5py.Group)
+
+def get_column_length(node : HDFNode) -> int:
+    if is_ragged_column(node):
+        return len(node['offsets']) - 1
+
+    return len(node)
+
+def read_ragged_rows(
+    node : h5py.Group, start : int, end : int, dtype : Any = None
+) -> RaggedArray:
+    """Read rows [start, end) of a ragged column
+
+    If `dtype` is not None, the values are converted to `dtype` by the HDF5
+    library during the read.
+    """
+    offsets = node['offsets'][start:end+1]
+    values  = node['values']
+
+    if dtype is not None:
+        values = values.astype(dtype)
+
+    values = values[offsets[0]:offsets[-1]]
+
+    return RaggedArray(values, offsets - offsets[0])
+
+def read_ragged_column(df : DataFrameBase, node : HDFNode) -> RaggedArray:
+    """Read the whole vlarr column `node` of an HDF5 frame `df` at once"""
+    if is_ragged_column(node):
+        return read_ragged_rows(
+            node, 0, len(df), df.dtype if df.cast else None
+        )
+
+    return RaggedArray.from_arrays(
+        node[:len(df)], dtype = df.dtype if df.cast else None
+    )
 
 class HDF5Frame(DataFrameBase):
     """Data Frame that reads data from an HDF5 file
@@ -19,8 +64,23 @@ class HDF5Frame(DataFrameBase):
     /column_k
     ```
 
-    where each column is either a scalar array of the shape (N, 1), where N is
-    a number of rows, or a variable length array of the shape (N, None).
+    where each column is either a scalar array of the shape (N, ) or (N, 1),
+    where N is a number of rows, or a variable length array of the shape
+    (N, None).
+
+    Alternatively, a variable length column can be stored in a ragged form,
+    as a group `/column_k` holding two datasets: `/column_k/values` -- a flat
+    array of the concatenated vlarr values, and `/column_k/offsets` -- an
+    array of N + 1 offsets of each row in `values`. Such files can be produced
+    with `export_hdf5`.
+
+    The values are converted to `dtype` by the HDF5 library during the read,
+    without an intermediate copy in the source precision. If `cast` is
+    False, the values are returned in their source precision.
+
+    The batch accessors (c.f. `DataFrameBase.get_scalar_batch`) sort the
+    requested rows and coalesce them into ranges of contiguous rows, which
+    are read with a single call each.
 
     Parameters
     ----------
@@ -37,8 +97,10 @@ class HDF5Frame(DataFrameBase):
     performance.
     """
 
-    def __init__(self, path : str, dtype : Any = 'float32'):
-        super().__init__(dtype)
+    def __init__(
+        self, path : str, dtype : Any = 'float32', cast : bool = True
+    ):
+        super().__init__(dtype, cast)
 
         self._path    = path
         self._len     = 0
@@ -46,17 +108,21 @@ class HDF5Frame(DataFrameBase):
         self._columns = list(self._file.keys())
 
         if len(self._columns) > 0:
-            self._len = len(self._file[self._columns[0]])
+            self._len = get_column_length(self._file[self._columns[0]])
 
     def __getstate__(self) -> Dict[str, Any]:
         return {
-            'path' : self._path,
-            'cols' : self._columns,
-            'len'  : self._len,
+            'path'  : self._path,
+            'cols'  : self._columns,
+            'dtype' : self._dtype,
+            'cast'  : self._cast,
+            'len'   : self._len,
         }
 
     def __setstate__(self, state : Dict[str, Any]):
         self._columns = state['cols']
+        self._dtype   = state['dtype']
+        self._cast    = state['cast']
         self._len     = state['len']
         self._path    = state['path']
         self._file    = h5py.File(self._path, 'r')
@@ -64,15 +130,96 @@ class HDF5Frame(DataFrameBase):
     def columns(self) -> List[str]:
         return self._columns
 
+    def fingerprint(self) -> Optional[str]:
+        return fingerprint_file(
+            self._path, type(self).__name__, self._dtype, self._cast
+        )
+
     def __len__(self):
         return self._len
 
     def get_scalar(self, column : str, index : int) -> Any:
-        return self._file[column][index].astype(self._dtype)
+        # a plain read and a cast of the value is much faster than a read
+        # through an `astype` wrapper of the dataset for a single cell
+        result = self._file[column][index]
+
+        if self._cast:
+            result = result.astype(self._dtype, copy = False)
+
+        return result
 
     def get_vlarr(self, column : str, index : int) -> np.ndarray:
-        return self._file[column][index].astype(self._dtype)
+        node  = self._file[column]
+        dtype = self._dtype if self._cast else None
+
+        if is_ragged_column(node):
+            return read_ragged_rows(node, index, index + 1, dtype)[0]
+
+        result = node[index]
+
+        if self._cast:
+            result = result.astype(self._dtype, copy = False)
+
+        return result
+
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        dset = self._file[column]
+
+        if self._cast:
+            dset = dset.astype(self._dtype)
+
+        def read_sorted(rows : np.ndarray) -> np.ndarray:
+            if len(rows) == 0:
+                return np.empty((0, ), dtype = dset.dtype)
+
+            starts, ends, positions = coalesce_indices(rows)
+
+            values = np.concatenate([
+                dset[start:end] for (start, end) in zip(starts, ends)
+            ])
+
+            return values[positions].reshape(len(rows))
+
+        return scatter_sorted(indices, read_sorted)
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        node  = self._file[column]
+        dtype = self._dtype if self._cast else None
+
+        def read_sorted(rows : np.ndarray) -> List[np.ndarray]:
+            if len(rows) == 0:
+                return []
+
+            starts, ends, positions = coalesce_indices(rows)
+
+            if is_ragged_column(node):
+                values = RaggedArray.concatenate([
+                    read_ragged_rows(node, start, end, dtype)
+                        for (start, end) in zip(starts, ends)
+                ])
+            else:
+                values = [
+                    x if dtype is None else x.astype(dtype, copy = False)
+                        for (start, end) in zip(starts, ends)
+                            for x in node[start:end]
+                ]
+
+            return [ values[pos] for pos in positions ]
+
+        return scatter_sorted(indices, read_sorted)
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        return read_ragged_column(self, self._file[column])
 
     def __getitem__(self, column):
-        return self._file[column]
+        node = self._file[column]
+
+        if is_ragged_column(node):
+            return read_ragged_rows(node, 0, len(self)).to_object_array()
+
+        return node
 
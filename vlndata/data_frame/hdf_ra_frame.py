@@ -1,14 +1,21 @@
 from collections import namedtuple
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import h5py
 import numpy as np
 
 from .data_frame_base import DataFrameBase
+from .funcs import fingerprint_file, scatter_sorted
+from .hdf_frame import (
+    HDFNode, get_column_length, is_ragged_column, read_ragged_column,
+    read_ragged_rows
+)
+from .ragged import RaggedArray
 
 Chunk = namedtuple('Chunk', [ 'start_idx', 'end_idx', 'data' ])
 
 class HDF5ReadAheadFrame(DataFrameBase):
+    # pylint: disable=too-many-instance-attributes
     """Data Frame that reads data from an HDF5 file in chunks
 
     This data frame is analogous to `HDF5Frame`, except that it implements a
@@ -22,6 +29,23 @@ class HDF5ReadAheadFrame(DataFrameBase):
     the access pattern is random, then this frame is no better than
     `HDF5Frame`.
 
+    A typical consumer (e.g. `VLDataset`) requests the same set of columns for
+    every row. If this set of columns is passed as `read_columns`, then a
+    cache miss on any of these columns fills the chunks of all of them for the
+    same row window at once, instead of issuing a separate read per column
+    whenever its own chunk runs out.
+
+    The batch accessors (c.f. `DataFrameBase.get_scalar_batch`) visit the
+    requested rows in the sorted order, so that each chunk is read at most
+    once per batch, even if the batch is shuffled. The batch rows of all
+    `read_columns` are gathered window by window on the first access, and
+    are reused by the accessors of the other columns of the same batch.
+
+    Each chunk is cast to `dtype` once, when it is read (scalar columns are
+    converted by the HDF5 library directly into the chunk buffers), and
+    `get_scalar`/`get_vlarr` return views of the cached chunks. If `cast` is
+    False, the chunks are kept in their source precision.
+
     Please refer to the `HDF5Frame` doc strings for the file format details.
 
     Parameters
@@ -29,45 +53,185 @@ class HDF5ReadAheadFrame(DataFrameBase):
     path : str
         Input HDF5 file path.
     chunk_size : int, optional
-        Number of contiguous rows to read for each column. Default 1024.
+        Number of contiguous rows to read for each column. If the HDF5
+        datasets are chunked, then `chunk_size` is rounded up to a multiple
+        of the largest dataset chunk (along rows), so that the reads do not
+        decompress partial HDF5 chunks. Default 1024.
+    read_columns : List[str], optional
+        A set of columns that are read together for the same row window.
+        Columns outside of this set are read individually. Default: None.
+    read_direct : bool, optional
+        Whether to read fixed length (scalar) columns with `read_direct` into
+        preallocated buffers, avoiding an intermediate allocation per read.
+        Default: True.
+    cast : bool, optional
+        Whether to cast the chunks to `dtype`. Default: True.
     """
 
     def __init__(
-        self, path : str, dtype : Any = 'float32', chunk_size : int = 1024
+        self,
+        path         : str,
+        dtype        : Any  = 'float32',
+        chunk_size   : int  = 1024,
+        read_columns : Optional[List[str]] = None,
+        read_direct  : bool = True,
+        cast         : bool = True,
     ):
-
-        super().__init__(dtype)
+        super().__init__(dtype, cast)
 
         self._path    = path
         self._len     = 0
         self._file    = h5py.File(path, 'r')
         self._columns = list(self._file.keys())
 
-        self._chunk_size = chunk_size
-        self._chunks : Dict[str, Chunk] = { }
+        self._read_columns = list(read_columns or [])
+        self._read_direct  = read_direct
+        self._req_chunk_size = chunk_size
+
+        self._init_chunks()
 
         if len(self._columns) > 0:
-            self._len = len(self._file[self._columns[0]])
+            self._len = get_column_length(self._file[self._columns[0]])
+
+    def _init_chunks(self) -> None:
+        self._chunk_size = self.align_chunk_size(
+            self._req_chunk_size,
+            ( self._file[c] for c in (self._read_columns or self._columns) )
+        )
+
+        self._chunks  : Dict[str, Chunk] = { }
+        self._buffers : Dict[str, np.ndarray] = { }
+
+        # (sorted batch indices, batch rows of each read column per window)
+        self._batch_parts : Optional[Tuple[bytes, Dict[str, List[Any]]]] = None
 
     def __getstate__(self) -> Dict[str, Any]:
         return {
-            'path' : self._path,
-            'cols' : self._columns,
-            'len'  : self._len,
+            'path'         : self._path,
+            'cols'         : self._columns,
+            'dtype'        : self._dtype,
+            'len'          : self._len,
+            'chunk_size'   : self._req_chunk_size,
+            'read_columns' : self._read_columns,
+            'read_direct'  : self._read_direct,
+            'cast'         : self._cast,
         }
 
     def __setstate__(self, state : Dict[str, Any]):
         self._columns = state['cols']
+        self._dtype   = state['dtype']
         self._len     = state['len']
         self._path    = state['path']
         self._file    = h5py.File(self._path, 'r')
 
+        self._read_columns   = state['read_columns']
+        self._read_direct    = state['read_direct']
+        self._cast           = state['cast']
+        self._req_chunk_size = state['chunk_size']
+
+        self._init_chunks()
+
+    @staticmethod
+    def align_chunk_size(chunk_size : int, nodes : Iterable[HDFNode]) -> int:
+        """Round `chunk_size` up to a multiple of HDF5 chunks of `nodes`"""
+        datasets = (
+            node['offsets'] if is_ragged_column(node) else node
+                for node in nodes
+        )
+
+        hdf_chunk_rows = max(
+            ( dset.chunks[0] for dset in datasets if dset.chunks ),
+            default = 1
+        )
+
+        n_hdf_chunks = max(1, -(-chunk_size // hdf_chunk_rows))
+        return n_hdf_chunks * hdf_chunk_rows
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
     def columns(self) -> List[str]:
         return self._columns
 
+    def fingerprint(self) -> Optional[str]:
+        return fingerprint_file(
+            self._path, type(self).__name__, self._dtype, self._cast
+        )
+
     def __len__(self):
         return self._len
 
+    def _read_column_window(
+        self, column : str, start_idx : int, end_idx : int
+    ) -> np.ndarray:
+        dset  = self._file[column]
+        dtype = self._dtype if self._cast else None
+
+        if is_ragged_column(dset):
+            return read_ragged_rows(dset, start_idx, end_idx, dtype)
+
+        if dset.dtype.kind == 'O':
+            return self._cast_vlen_rows(dset[start_idx:end_idx])
+
+        if not self._read_direct:
+            if dtype is not None:
+                dset = dset.astype(dtype)
+
+            result = dset[start_idx:end_idx]
+
+            if result.shape[1:] == (1, ):
+                # (N, 1) scalar columns hold scalars, as with `read_direct`
+                return result[:, 0]
+
+            return result
+
+        buffer = self._buffers.get(column, None)
+
+        if buffer is None:
+            buffer = np.empty(
+                (self._chunk_size, ) + dset.shape[1:],
+                dtype = dset.dtype if dtype is None else dtype
+            )
+            self._buffers[column] = buffer
+
+        length = end_idx - start_idx
+        dset.read_direct(
+            buffer,
+            source_sel = np.s_[start_idx:end_idx],
+            dest_sel   = np.s_[0:length]
+        )
+
+        if buffer.shape[1:] == (1, ):
+            # return scalars instead of views of the reused buffer
+            return buffer[:length, 0]
+
+        return buffer[:length]
+
+    def _cast_vlen_rows(self, rows : np.ndarray) -> np.ndarray:
+        if not self._cast:
+            return rows
+
+        for (idx, row) in enumerate(rows):
+            rows[idx] = row.astype(self._dtype, copy = False)
+
+        return rows
+
+    def read_window(self, columns : List[str], index : int) -> None:
+        """Fill chunks of all `columns` for the row window containing `index`
+        """
+        start_idx = (index // self._chunk_size) * self._chunk_size
+        end_idx   = min(start_idx + self._chunk_size, len(self))
+
+        for column in columns:
+            self._chunks[column] = Chunk(
+                data      = self._read_column_window(
+                    column, start_idx, end_idx
+                ),
+                start_idx = start_idx,
+                end_idx   = end_idx
+            )
+
     def read_chunk(self, column : str, index : int) -> Chunk:
         if column in self._chunks:
             chunk = self._chunks[column]
@@ -76,26 +240,120 @@ class HDF5ReadAheadFrame(DataFrameBase):
             if (index >= chunk.start_idx) and (index < chunk.end_idx):
                 return chunk
 
-        start_idx = (index // self._chunk_size) * self._chunk_size
-        end_idx   = min(start_idx + self._chunk_size, len(self))
-
-        chunk = Chunk(
-            data      = self._file[column][start_idx:end_idx],
-            start_idx = start_idx,
-            end_idx   = end_idx
-        )
+        if column in self._read_columns:
+            self.read_window(self._read_columns, index)
+        else:
+            self.read_window([ column, ], index)
 
-        self._chunks[column] = chunk
-        return chunk
+        return self._chunks[column]
 
     def get_scalar(self, column : str, index : int) -> Any:
         chunk = self.read_chunk(column, index)
-        return chunk.data[index - chunk.start_idx].astype(self._dtype)
+        return chunk.data[index - chunk.start_idx]
 
     def get_vlarr(self, column : str, index : int) -> np.ndarray:
         chunk = self.read_chunk(column, index)
-        return chunk.data[index - chunk.start_idx].astype(self._dtype)
+
+        # read-only view, the chunk rows are shared by all calls
+        result = chunk.data[index - chunk.start_idx].view()
+        result.flags.writeable = False
+
+        return result
+
+    def split_windows(self, indices : np.ndarray) -> List[np.ndarray]:
+        """Split sorted `indices` into the groups of the same row window"""
+        if len(indices) == 0:
+            return []
+
+        windows = indices // self._chunk_size
+        breaks  = np.flatnonzero(np.diff(windows)) + 1
+
+        return np.split(indices, breaks)
+
+    def iter_batch_chunks(
+        self, column : str, indices : np.ndarray
+    ) -> Iterator[Tuple[Chunk, np.ndarray]]:
+        """Iterate over chunks of column `column` holding sorted `indices`
+
+        Yields (chunk, indices of rows in that chunk). Each chunk is read
+        only once.
+        """
+        for rows in self.split_windows(indices):
+            chunk = self.read_chunk(column, int(rows[0]))
+            yield (chunk, rows - chunk.start_idx)
+
+    @staticmethod
+    def take_rows(data : Any, local : np.ndarray) -> Any:
+        """Copy rows `local` out of chunk `data`, which may be overwritten"""
+        if isinstance(data, np.ndarray):
+            return data[local]
+
+        return [ data[idx] for idx in local ]
+
+    def read_batch_parts(
+        self, column : str, indices : np.ndarray
+    ) -> List[Any]:
+        """Read rows of `column` at sorted `indices`, one part per window
+
+        The rows of all `read_columns` are read together, visiting each
+        window once, and are kept for the calls of the other read columns
+        with the same `indices`.
+        """
+        if column not in self._read_columns:
+            chunks = self.iter_batch_chunks(column, indices)
+            return [ self.take_rows(c.data, local) for (c, local) in chunks ]
+
+        key = indices.tobytes()
+
+        if (self._batch_parts is None) or (self._batch_parts[0] != key):
+            parts = { c : [] for c in self._read_columns }
+
+            for rows in self.split_windows(indices):
+                for c in self._read_columns:
+                    chunk = self.read_chunk(c, int(rows[0]))
+                    parts[c].append(
+                        self.take_rows(chunk.data, rows - chunk.start_idx)
+                    )
+
+            self._batch_parts = (key, parts)
+
+        return self._batch_parts[1][column]
+
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        if len(indices) == 0:
+            return super().get_scalar_batch(column, indices)
+
+        def read_sorted(rows : np.ndarray) -> np.ndarray:
+            parts = self.read_batch_parts(column, rows)
+            return np.concatenate(parts).reshape(len(rows))
+
+        return scatter_sorted(indices, read_sorted)
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        def read_sorted(rows : np.ndarray) -> List[np.ndarray]:
+            result = []
+
+            for part in self.read_batch_parts(column, rows):
+                for row in part:
+                    vlarr = row.view()
+                    vlarr.flags.writeable = False
+                    result.append(vlarr)
+
+            return result
+
+        return scatter_sorted(indices, read_sorted)
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        return read_ragged_column(self, self._file[column])
 
     def __getitem__(self, column):
-        return self._file[column]
+        node = self._file[column]
+
+        if is_ragged_column(node):
+            return read_ragged_rows(node, 0, len(self)).to_object_array()
 
+        return node
@@ -0,0 +1,237 @@
+from io import IOBase
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import h5py
+import numpy as np
+
+from .data_frame_base import DataFrameBase
+
+def infer_column_kinds(df : DataFrameBase) -> Tuple[List[str], List[str]]:
+    """Split columns of a data frame into scalar and vlarr columns
+
+    A column is considered to be a vlarr column if its raw values
+    (as returned by `df[column]`) are not numeric.
+    """
+    scalar_columns = []
+    vlarr_columns  = []
+
+    for column in df.columns():
+        values = df[column]
+
+        if isinstance(values, h5py.Dataset):
+            kind = values.dtype.kind
+        else:
+            kind = np.asarray(values).dtype.kind
+
+        if kind in [ 'O', 'S', 'U' ]:
+            vlarr_columns.append(column)
+        else:
+            scalar_columns.append(column)
+
+    return (scalar_columns, vlarr_columns)
+
+def get_dataset_kwargs(
+    chunk_size       : int,
+    compression      : Optional[str],
+    compression_opts : Optional[Any],
+    shuffle          : bool,
+) -> Dict[str, Any]:
+    result : Dict[str, Any] = {
+        'chunks'   : (chunk_size, ),
+        'maxshape' : (None, ),
+    }
+
+    if compression is not None:
+        result['compression']      = compression
+        result['compression_opts'] = compression_opts
+        result['shuffle']          = shuffle
+
+    return result
+
+def write_scalar_column(
+    f          : h5py.File,
+    df         : DataFrameBase,
+    column     : str,
+    dtype      : np.dtype,
+    chunk_size : int,
+    dset_kwargs : Dict[str, Any],
+) -> None:
+    dset = f.create_dataset(
+        column, shape = (len(df), ), dtype = dtype, **dset_kwargs
+    )
+
+    for start in range(0, len(df), chunk_size):
+        end = min(start + chunk_size, len(df))
+
+        dset[start:end] = np.fromiter(
+            ( df.get_scalar(column, idx) for idx in range(start, end) ),
+            dtype = dtype, count = end - start
+        )
+
+def write_vlen_column(
+    f          : h5py.File,
+    df         : DataFrameBase,
+    column     : str,
+    dtype      : np.dtype,
+    chunk_size : int,
+    dset_kwargs : Dict[str, Any],
+) -> None:
+    dset = f.create_dataset(
+        column, shape = (len(df), ), dtype = h5py.vlen_dtype(dtype),
+        **dset_kwargs
+    )
+
+    for start in range(0, len(df), chunk_size):
+        end    = min(start + chunk_size, len(df))
+        values = np.empty((end - start, ), dtype = object)
+
+        for idx in range(start, end):
+            values[idx - start] = np.asarray(
+                df.get_vlarr(column, idx), dtype = dtype
+            )
+
+        if len(values) == 1:
+            # h5py mishandles object arrays of a single vlarr
+            dset[start] = values[0]
+        else:
+            dset[start:end] = values
+
+def estimate_values_chunk(
+    df : DataFrameBase, column : str, chunk_size : int, n_samples : int = 1024
+) -> int:
+    """Estimate the number of values in `chunk_size` rows of vlarr `column`
+
+    The mean length of vlarrs is estimated from up to `n_samples` rows
+    spread evenly over the whole data frame. The estimate is at least
+    `chunk_size`, so that empty or short leading rows do not produce tiny
+    chunks.
+    """
+    if len(df) == 0:
+        return chunk_size
+
+    indices = np.unique(np.linspace(
+        0, len(df) - 1, num = min(len(df), n_samples)
+    ).astype(np.int64))
+
+    mean_length = np.mean([
+        len(df.get_vlarr(column, idx)) for idx in indices
+    ])
+
+    return max(chunk_size, int(np.ceil(mean_length * chunk_size)))
+
+def write_ragged_column(
+    f          : h5py.File,
+    df         : DataFrameBase,
+    column     : str,
+    dtype      : np.dtype,
+    chunk_size : int,
+    dset_kwargs : Dict[str, Any],
+) -> None:
+    group   = f.create_group(column)
+    offsets = group.create_dataset(
+        'offsets', shape = (len(df) + 1, ), dtype = np.int64, **dset_kwargs
+    )
+    offsets[0] = 0
+
+    # Align chunks of values to the average length of `chunk_size` rows,
+    # so that reading a row window touches only a few chunks.
+    values = group.create_dataset(
+        'values', shape = (0, ), dtype = dtype,
+        **{
+            **dset_kwargs,
+            'chunks' : (estimate_values_chunk(df, column, chunk_size), )
+        }
+    )
+
+    offset = 0
+
+    for start in range(0, len(df), chunk_size):
+        end    = min(start + chunk_size, len(df))
+        arrays = [
+            np.asarray(df.get_vlarr(column, idx), dtype = dtype)
+                for idx in range(start, end)
+        ]
+
+        chunk_offsets = offset + np.cumsum([ len(x) for x in arrays ])
+        offsets[start+1:end+1] = chunk_offsets
+
+        values.resize((int(chunk_offsets[-1]), ))
+        values[offset:] = np.concatenate(arrays)
+
+        offset = int(chunk_offsets[-1])
+
+def export_hdf5(
+    df               : DataFrameBase,
+    path             : Union[str, IOBase],
+    scalar_columns   : Optional[List[str]] = None,
+    vlarr_columns    : Optional[List[str]] = None,
+    dtype            : Any           = None,
+    chunk_size       : int           = 1024,
+    compression      : Optional[str] = None,
+    compression_opts : Optional[Any] = None,
+    shuffle          : bool          = True,
+    ragged           : bool          = True,
+) -> None:
+    """Export a data frame into an HDF5 file readable by `HDF5Frame`
+
+    Each column of the data frame `df` is written as a separate dataset in the
+    root of the HDF5 file. Scalar columns are written as arrays of shape
+    (N, ). Variable length columns are written either in a ragged form (a
+    group with flat `values` and `offsets` datasets) or as h5py vlen datasets.
+    C.f. `HDF5Frame` for the details of the file format.
+
+    All datasets are chunked along rows in chunks of `chunk_size`. This chunk
+    size should match the `chunk_size` of the `HDF5ReadAheadFrame` used to
+    read the file, so that each read-ahead window decompresses exactly one
+    HDF5 chunk.
+
+    Parameters
+    ----------
+    df : DataFrameBase
+        Data frame to export.
+    path : str or file-like object
+        Output HDF5 file path.
+    scalar_columns : List[str], optional
+        Scalar columns to export. If both `scalar_columns` and
+        `vlarr_columns` are None, then all columns of `df` will be exported
+        and their kinds will be inferred by `infer_column_kinds`.
+        Default: None.
+    vlarr_columns : List[str], optional
+        Variable length columns to export. Default: None.
+    dtype : optional
+        Data type of the exported values. If None, then `df.dtype` is used.
+        Default: None.
+    chunk_size : int, optional
+        Number of rows per HDF5 chunk. Default: 1024.
+    compression : str, optional
+        HDF5 compression filter, e.g. 'gzip' or 'lzf'. Default: None.
+    compression_opts : optional
+        Options of the compression filter, e.g. gzip compression level.
+        Default: None.
+    shuffle : bool, optional
+        Whether to enable the HDF5 byte shuffle filter together with the
+        compression. Default: True.
+    ragged : bool, optional
+        Whether to write variable length columns in the ragged form (values +
+        offsets) instead of h5py vlen datasets. Default: True.
+    """
+    if (scalar_columns is None) and (vlarr_columns is None):
+        scalar_columns, vlarr_columns = infer_column_kinds(df)
+
+    dtype       = np.dtype(dtype or df.dtype)
+    dset_kwargs = get_dataset_kwargs(
+        chunk_size, compression, compression_opts, shuffle
+    )
+
+    write_vlarr_column = write_ragged_column if ragged else write_vlen_column
+
+    with h5py.File(path, 'w') as f:
+        for column in (scalar_columns or []):
+            write_scalar_column(
+                f, df, column, dtype, chunk_size, dset_kwargs
+            )
+
+        for column in (vlarr_columns or []):
+            write_vlarr_column(
+                f, df, column, dtype, chunk_size, dset_kwargs
+            )
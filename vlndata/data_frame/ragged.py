@@ -0,0 +1,150 @@
+from typing import Any, Iterable, List, Optional
+import numpy as np
+
+class RaggedArray:
+    """A column of variable length arrays stored as flat values and offsets
+
+    The k-th variable length array of this column is stored as
+        values[offsets[k]:offsets[k+1]]
+    such that `offsets` has N + 1 elements, where N is a number of rows.
+
+    Besides the row access, a ragged array supports segmented (per row)
+    reductions, e.g. `mean`, which are evaluated in a single vectorized pass
+    over the flat values.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Concatenated values of all variable length arrays. Shape (M, ).
+    offsets : np.ndarray
+        Offsets of the variable length arrays in `values`. Shape (N + 1, ).
+    """
+
+    def __init__(self, values : np.ndarray, offsets : np.ndarray):
+        self._values  = values
+        self._offsets = offsets
+
+    @staticmethod
+    def from_arrays(
+        arrays : Iterable[Any], dtype : Any = None
+    ) -> 'RaggedArray':
+        """Construct a ragged array from a sequence of vlarrays"""
+        arrays  = [ np.asarray(x, dtype = dtype).ravel() for x in arrays ]
+        offsets = np.zeros(len(arrays) + 1, dtype = np.int64)
+
+        if len(arrays) > 0:
+            np.cumsum([ len(x) for x in arrays ], out = offsets[1:])
+            values = np.concatenate(arrays)
+        else:
+            values = np.empty((0, ), dtype = dtype)
+
+        if dtype is not None:
+            values = values.astype(dtype, copy = False)
+
+        return RaggedArray(values, offsets)
+
+    @staticmethod
+    def concatenate(arrays : List['RaggedArray']) -> 'RaggedArray':
+        """Concatenate rows of ragged arrays"""
+        offsets = [ np.zeros((1, ), dtype = np.int64) ]
+        values  = []
+        shift   = 0
+
+        for array in arrays:
+            values.append(array.values[array.offsets[0]:array.offsets[-1]])
+            offsets.append(array.offsets[1:] - array.offsets[0] + shift)
+            shift += array.offsets[-1] - array.offsets[0]
+
+        return RaggedArray(np.concatenate(values), np.concatenate(offsets))
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._offsets
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self._offsets)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._values.dtype
+
+    def astype(self, dtype : Any, copy : bool = True) -> 'RaggedArray':
+        return RaggedArray(
+            self._values.astype(dtype, copy = copy), self._offsets
+        )
+
+    def take(self, indices : np.ndarray) -> 'RaggedArray':
+        """Select rows `indices` of this array"""
+        indices = np.asarray(indices, dtype = np.int64)
+        starts  = self._offsets[indices]
+        lengths = self._offsets[indices + 1] - starts
+
+        offsets = np.zeros(len(indices) + 1, dtype = np.int64)
+        np.cumsum(lengths, out = offsets[1:])
+
+        # position of each selected value in the flat `values`
+        positions = (
+              np.arange(offsets[-1], dtype = np.int64)
+            - np.repeat(offsets[:-1] - starts, lengths)
+        )
+
+        return RaggedArray(self._values[positions], offsets)
+
+    def reduce(self, ufunc : np.ufunc, empty : Any = np.nan) -> np.ndarray:
+        """Reduce each row with a numpy `ufunc` (e.g. `np.add`)
+
+        The reduction of empty rows is set to `empty`.
+        """
+        nonempty = self.lengths > 0
+        dtype    = np.result_type(
+            self._values.dtype, np.min_scalar_type(empty)
+        )
+        result   = np.full(len(self), empty, dtype = dtype)
+
+        if np.any(nonempty):
+            values = self._values[self._offsets[0]:self._offsets[-1]]
+            starts = self._offsets[:-1][nonempty] - self._offsets[0]
+            result[nonempty] = ufunc.reduceat(values, starts)
+
+        return result
+
+    def sum(self) -> np.ndarray:
+        """Sum of each row"""
+        return self.reduce(np.add, 0)
+
+    def mean(self) -> np.ndarray:
+        """Mean of each row. NaN for empty rows"""
+        lengths = self.lengths
+        result  = self.reduce(np.add, np.nan)
+
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            return result / lengths
+
+    def min(self) -> np.ndarray:
+        """Minimum of each row. NaN for empty rows"""
+        return self.reduce(np.minimum)
+
+    def max(self) -> np.ndarray:
+        """Maximum of each row. NaN for empty rows"""
+        return self.reduce(np.maximum)
+
+    def to_object_array(self, dtype : Optional[Any] = None) -> np.ndarray:
+        """Convert ragged array into a numpy array of vlarr objects"""
+        result = np.empty(len(self), dtype = object)
+
+        for idx in range(len(self)):
+            result[idx] = self[idx] if dtype is None else \
+                self[idx].astype(dtype)
+
+        return result
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index : int) -> np.ndarray:
+        return self._values[self._offsets[index]:self._offsets[index + 1]]
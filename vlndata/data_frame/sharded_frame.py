@@ -0,0 +1,255 @@
+import bisect
+import glob
+import threading
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from vlndata.funcs import Spec, unpack_name_args
+from .data_frame_base import DataFrameBase
+from .funcs           import fingerprint_file, hash_parts
+from .ragged          import RaggedArray
+
+def expand_shard_paths(paths : Union[str, List[str]]) -> List[str]:
+    """Expand glob patterns in `paths` into a sorted list of file paths"""
+    if isinstance(paths, str):
+        paths = [ paths, ]
+
+    result = []
+
+    for path in paths:
+        if glob.has_magic(path):
+            matches = sorted(glob.glob(path))
+
+            if len(matches) == 0:
+                raise ValueError(f"No shards match pattern '{path}'")
+
+            result += matches
+        else:
+            result.append(path)
+
+    return result
+
+class ShardedFrame(DataFrameBase):
+    """Data Frame that concatenates rows of many files (shards)
+
+    Each shard is a data frame of the same type, constructed from the
+    specification `frame` (c.f. `select_frame`) with its `path` argument
+    substituted by the shard path. Rows of all shards are concatenated into a
+    single frame in the order of `paths`.
+
+    Shards are opened lazily on the first access and at most `max_open` shards
+    are kept open simultaneously. The least recently used shard is closed when
+    this limit is exceeded. Therefore, an access pattern that reads rows of the
+    same shard together is much more efficient than a random one. The shard
+    boundaries are exposed via the `shard_boundaries` property to allow
+    samplers to favor shard-local reads.
+
+    Parameters
+    ----------
+    frame : Spec
+        A specification of the shard data frames. C.f. `select_frame`.
+    paths : str or List[str]
+        Shard paths. Paths can contain glob patterns, which are expanded and
+        sorted.
+    dtype : optional
+        Data type of the returned data. It is passed to the shard frames,
+        unless `frame` specifies its own dtype. Default: 'float32'.
+    max_open : int, optional
+        Maximum number of simultaneously open shards. Default: 16.
+    lengths : List[int], optional
+        Number of rows in each shard. If None, each shard is opened once
+        during construction to find out its length. Default: None.
+    """
+
+    def __init__(
+        self,
+        frame    : Spec,
+        paths    : Union[str, List[str]],
+        dtype    : Any = 'float32',
+        max_open : int = 16,
+        lengths  : Optional[List[int]] = None,
+    ):
+        super().__init__(dtype)
+
+        self._frame    = frame
+        self._paths    = expand_shard_paths(paths)
+        self._max_open = max(1, max_open)
+        self._shards   : Dict[int, DataFrameBase] = OrderedDict()
+        self._lock     = threading.Lock()
+        self._columns  : List[str] = []
+
+        if lengths is None:
+            lengths = [ len(self.get_shard(idx)) for idx in self._shard_ids() ]
+
+        assert len(lengths) == len(self._paths)
+
+        self._offsets = [ 0, ] + list(np.cumsum(lengths, dtype = np.int64))
+
+        if len(self._paths) > 0:
+            self._columns = self.get_shard(0).columns()
+            self._cast    = self.get_shard(0).cast
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            'frame'    : self._frame,
+            'paths'    : self._paths,
+            'dtype'    : self._dtype,
+            'max_open' : self._max_open,
+            'offsets'  : self._offsets,
+            'cols'     : self._columns,
+            'cast'     : self._cast,
+        }
+
+    def __setstate__(self, state : Dict[str, Any]):
+        self._frame    = state['frame']
+        self._paths    = state['paths']
+        self._dtype    = state['dtype']
+        self._max_open = state['max_open']
+        self._offsets  = state['offsets']
+        self._columns  = state['cols']
+        self._cast     = state['cast']
+        self._shards   = OrderedDict()
+        self._lock     = threading.Lock()
+
+    def _shard_ids(self) -> range:
+        return range(len(self._paths))
+
+    def _open_shard(self, shard : int) -> DataFrameBase:
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from . import select_frame
+
+        name, args = unpack_name_args(self._frame)
+        args = { 'dtype' : self._dtype, **args, 'path' : self._paths[shard] }
+
+        return select_frame({ 'name' : name, **args })
+
+    def get_shard(self, shard : int) -> DataFrameBase:
+        """Get data frame of the shard number `shard`, opening it if needed
+
+        This method is thread safe (c.f. `VarFrame` with `n_workers`).
+        """
+        with self._lock:
+            result = self._shards.get(shard, None)
+
+            if result is not None:
+                self._shards.move_to_end(shard)
+                return result
+
+            result = self._open_shard(shard)
+            self._shards[shard] = result
+
+            while len(self._shards) > self._max_open:
+                self._shards.popitem(last = False)
+
+            return result
+
+    @property
+    def paths(self) -> List[str]:
+        return self._paths
+
+    @property
+    def shard_boundaries(self) -> np.ndarray:
+        """Array of row offsets of shards, of shape (n_shards + 1, )
+
+        Rows of the k-th shard are [ shard_boundaries[k],
+        shard_boundaries[k+1] ).
+        """
+        return np.array(self._offsets, dtype = np.int64)
+
+    def locate(self, index : int) -> Tuple[int, int]:
+        """Find a shard and a row in that shard of the global row `index`"""
+        if (index < 0) or (index >= len(self)):
+            raise IndexError(f"Row index {index} is out of range")
+
+        shard = bisect.bisect_right(self._offsets, index) - 1
+        return (shard, index - self._offsets[shard])
+
+    def columns(self) -> List[str]:
+        return self._columns
+
+    def get_scalar(self, column : str, index : int) -> Any:
+        shard, local_index = self.locate(index)
+        return self.get_shard(shard).get_scalar(column, local_index)
+
+    def get_vlarr(self, column : str, index : int) -> np.ndarray:
+        shard, local_index = self.locate(index)
+        return self.get_shard(shard).get_vlarr(column, local_index)
+
+    def locate_batch(
+        self, indices : np.ndarray
+    ) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """Group global row `indices` by shard
+
+        Yields (shard, positions of the rows in `indices`, rows in that
+        shard) for each shard that holds any of the rows.
+        """
+        indices = np.asarray(indices, dtype = np.int64)
+
+        if np.any((indices < 0) | (indices >= len(self))):
+            raise IndexError("Row indices are out of range")
+
+        shards = np.searchsorted(self._offsets, indices, side = 'right') - 1
+
+        for shard in np.unique(shards):
+            positions = np.flatnonzero(shards == shard)
+            yield (
+                int(shard), positions,
+                indices[positions] - self._offsets[shard]
+            )
+
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        result = None
+
+        for (shard, positions, local) in self.locate_batch(indices):
+            values = self.get_shard(shard).get_scalar_batch(column, local)
+
+            if result is None:
+                result = np.empty(len(indices), dtype = values.dtype)
+
+            result[positions] = values
+
+        if result is None:
+            return np.empty((0, ), dtype = self._dtype)
+
+        return result
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        result : List[Any] = [ None ] * len(indices)
+
+        for (shard, positions, local) in self.locate_batch(indices):
+            values = self.get_shard(shard).get_vlarr_batch(column, local)
+
+            for (pos, value) in zip(positions, values):
+                result[pos] = value
+
+        return result
+
+    def fingerprint(self) -> Optional[str]:
+        shards = [ fingerprint_file(path) for path in self._paths ]
+
+        if any(x is None for x in shards):
+            return None
+
+        return hash_parts(self._frame, self._dtype, *shards)
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        return RaggedArray.concatenate([
+            self.get_shard(idx).get_ragged(column)
+                for idx in self._shard_ids()
+        ])
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def __getitem__(self, column : str) -> np.ndarray:
+        return np.concatenate([
+            np.asarray(self.get_shard(idx)[column])
+                for idx in self._shard_ids()
+        ])
@@ -0,0 +1,259 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .data_frame_base import DataFrameBase
+from .funcs           import hash_parts
+from .subframe        import SubFrame
+
+SplitSize = Optional[Union[int, float]]
+Bins      = Optional[Union[int, Sequence[float]]]
+
+def get_split_size(n_rows : int, size : SplitSize) -> int:
+    """Convert a fraction or a number of rows into a number of rows"""
+    if isinstance(size, float):
+        return int(n_rows * size)
+
+    return size or 0
+
+def get_strata(values : np.ndarray, bins : Bins = None) -> np.ndarray:
+    """Get stratum labels of rows with column `values`
+
+    If `bins` is None, each unique value is a separate stratum. If `bins` is
+    an int, the values are binned into `bins` quantile bins. Otherwise,
+    `bins` are the bin edges.
+    """
+    values = np.asarray(values)
+
+    if bins is None:
+        return np.unique(values, return_inverse = True)[1]
+
+    if isinstance(bins, int):
+        bins = np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1])
+
+    return np.digitize(values, bins)
+
+def get_row_positions(
+    strata : np.ndarray, prg : np.random.Generator
+) -> np.ndarray:
+    """Get random positions of rows in [0, 1) within their strata"""
+    n_rows = len(strata)
+    order  = prg.permutation(n_rows)
+    order  = order[np.argsort(strata[order], kind = 'stable')]
+
+    _, first, counts = np.unique(
+        strata[order], return_index = True, return_counts = True
+    )
+
+    rank   = np.arange(n_rows) - np.repeat(first, counts)
+    result = np.empty(n_rows, dtype = np.float64)
+    result[order] = (rank + 0.5) / np.repeat(counts, counts)
+
+    return result
+
+def get_group_positions(
+    groups : np.ndarray, prg : np.random.Generator
+) -> np.ndarray:
+    """Get positions of rows in [0, 1), shared by all rows of a group
+
+    The groups are put in a random order, and each group is positioned at
+    the fraction of rows that precede it.
+    """
+    _, inverse, counts = np.unique(
+        groups, return_inverse = True, return_counts = True
+    )
+
+    order  = prg.permutation(len(counts))
+    starts = np.empty(len(counts), dtype = np.float64)
+    starts[order] = np.cumsum(counts[order]) - counts[order]
+
+    return starts[inverse] / len(groups)
+
+def assign_parts(
+    n_rows  : int,
+    sizes   : Sequence[float],
+    strata  : Optional[np.ndarray] = None,
+    groups  : Optional[np.ndarray] = None,
+    shuffle : bool = False,
+    seed    : int  = 0,
+) -> np.ndarray:
+    """Assign each row to one of the parts of (approximately) `sizes` rows
+
+    By default, the rows are assigned to the parts contiguously. If
+    `shuffle` is True, they are assigned randomly. If `strata` are given,
+    each stratum is split among the parts in the same proportions. If
+    `groups` are given, all rows of a group are assigned to the same part.
+
+    Returns an array of part numbers of the rows.
+    """
+    if (strata is not None) and (groups is not None):
+        raise ValueError("Splits cannot be both stratified and grouped")
+
+    prg   = np.random.default_rng(seed)
+    edges = np.cumsum(sizes)[:-1] / max(1, n_rows)
+
+    if groups is not None:
+        positions = get_group_positions(np.asarray(groups), prg)
+    elif (strata is not None) or shuffle:
+        if strata is None:
+            strata = np.zeros(n_rows, dtype = np.int64)
+
+        positions = get_row_positions(np.asarray(strata), prg)
+    else:
+        positions = (np.arange(n_rows) + 0.5) / max(1, n_rows)
+
+    return np.searchsorted(edges, positions, side = 'right')
+
+def get_split_signature(frame : DataFrameBase, *params : Any) -> str:
+    """Get a signature of a split of `frame` with parameters `params`
+
+    Frames without a fingerprint (c.f. `DataFrameBase.fingerprint`) are
+    identified by their length only.
+    """
+    return hash_parts(frame.fingerprint(), len(frame), *params)
+
+def save_split_manifest(
+    path : str, signature : str, parts : Dict[str, np.ndarray]
+) -> None:
+    """Save index arrays `parts` of a split with `signature` into `path`"""
+    tmp_path = path + f'.tmp{os.getpid()}.npz'
+    np.savez(tmp_path, signature = np.array(signature), **parts)
+    os.replace(tmp_path, path)
+
+def load_split_manifest(
+    path : str, signature : str
+) -> Optional[Dict[str, np.ndarray]]:
+    """Load index arrays of a split saved by `save_split_manifest`
+
+    Returns None if the manifest does not exist, or if it was saved for
+    a split with a different `signature`.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as manifest:
+        if str(manifest['signature']) != signature:
+            return None
+
+        return {
+            name : manifest[name]
+                for name in manifest.files if name != 'signature'
+        }
+
+def get_stratify_groups(
+    frame    : DataFrameBase,
+    stratify : Optional[str],
+    bins     : Bins,
+    groups   : Optional[str],
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    # scalar columns of HDF5 files may have the shape (N, 1)
+    strata = None
+
+    if stratify is not None:
+        strata = get_strata(np.ravel(frame[stratify]), bins)
+
+    if groups is not None:
+        return (strata, np.ravel(frame[groups]))
+
+    return (strata, None)
+
+def split_frame(
+    frame     : DataFrameBase,
+    val_size  : SplitSize,
+    test_size : SplitSize,
+    stratify  : Optional[str] = None,
+    bins      : Bins          = None,
+    groups    : Optional[str] = None,
+    seed      : int           = 0,
+    manifest  : Optional[str] = None,
+) -> Tuple[SubFrame, SubFrame, SubFrame]:
+    """Split Data Frame into train/val/test parts
+
+    Please refer to `train_test_split` for the details.
+    """
+    n_rows    = len(frame)
+    val_size  = get_split_size(n_rows, val_size)
+    test_size = get_split_size(n_rows, test_size)
+    sizes     = [ max(0, n_rows - test_size - val_size), val_size, test_size ]
+    names     = [ 'train', 'val', 'test' ]
+
+    signature = get_split_signature(
+        frame, 'split', sizes, stratify, bins, groups, seed
+    )
+    parts = None
+
+    if manifest is not None:
+        parts = load_split_manifest(manifest, signature)
+
+    if parts is None:
+        strata, group_ids = get_stratify_groups(frame, stratify, bins, groups)
+        labels = assign_parts(
+            n_rows, sizes, strata, group_ids, seed = seed
+        )
+
+        parts = {
+            name : np.flatnonzero(labels == idx)
+                for (idx, name) in enumerate(names)
+        }
+
+        if manifest is not None:
+            save_split_manifest(manifest, signature, parts)
+
+    return tuple(SubFrame(frame, parts[name]) for name in names) # type: ignore
+
+def kfold_split(
+    frame    : DataFrameBase,
+    n_folds  : int,
+    stratify : Optional[str] = None,
+    bins     : Bins          = None,
+    groups   : Optional[str] = None,
+    seed     : int           = 0,
+    manifest : Optional[str] = None,
+) -> List[Tuple[SubFrame, SubFrame]]:
+    """Split Data Frame into `n_folds` folds for cross validation
+
+    The rows are assigned to the folds randomly. If `stratify` is given,
+    each stratum of the column `stratify` is spread evenly among the folds.
+    If `groups` is given, all rows with the same value of the column `groups`
+    are assigned to the same fold. C.f. `train_test_split` for the details
+    of `stratify`, `bins`, `groups` and `manifest`.
+
+    Returns
+    -------
+    List[(train_frame, val_frame)]
+        For each fold, a frame of the rows of all the other folds, and
+        a frame of the rows of that fold.
+    """
+    n_rows    = len(frame)
+    signature = get_split_signature(
+        frame, 'kfold', n_folds, stratify, bins, groups, seed
+    )
+    parts = None
+
+    if manifest is not None:
+        parts = load_split_manifest(manifest, signature)
+
+    if parts is None:
+        strata, group_ids = get_stratify_groups(frame, stratify, bins, groups)
+        labels = assign_parts(
+            n_rows, [ n_rows / n_folds ] * n_folds, strata, group_ids,
+            shuffle = True, seed = seed
+        )
+
+        parts = {}
+
+        for fold in range(n_folds):
+            parts[f'train_{fold}'] = np.flatnonzero(labels != fold)
+            parts[f'val_{fold}']   = np.flatnonzero(labels == fold)
+
+        if manifest is not None:
+            save_split_manifest(manifest, signature, parts)
+
+    return [
+        (
+            SubFrame(frame, parts[f'train_{fold}']),
+            SubFrame(frame, parts[f'val_{fold}']),
+        )
+            for fold in range(n_folds)
+    ]
@@ -1,16 +1,45 @@
-from typing import Any, List
+from typing import Any, List, Optional
 import numpy as np
 
 from .data_frame_base import DataFrameBase
+from .funcs           import hash_parts, scatter_sorted
+from .ragged          import RaggedArray
 
 class SubFrame(DataFrameBase):
-    """Data Frame decorator that select a subset of rows"""
+    """Data Frame decorator that select a subset of rows
+
+    Stacked subframes (e.g. a `ShuffleFrame` of a `SubFrame`) are collapsed
+    during the construction into a single subframe of the base frame with
+    a composed index array, so the depth of the stack has no per-row cost.
+
+    The batch accessors (c.f. `DataFrameBase.get_scalar_batch`) request the
+    rows of the base frame in the sorted order, and scatter the results back
+    into the requested order. Therefore, the base frames that read files in
+    row windows (e.g. `HDF5ReadAheadFrame`) read shuffled batches nearly
+    sequentially.
+    """
 
     def __init__(self, df : DataFrameBase, indices : np.ndarray):
-        super().__init__(df.dtype)
+        super().__init__(df.dtype, df.cast)
+        indices = np.asarray(indices, dtype = np.int64)
+
+        if isinstance(df, SubFrame):
+            indices = df._indices[indices]
+            df      = df._df
+
         self._df      = df
         self._indices = indices
 
+    @property
+    def base(self) -> DataFrameBase:
+        """Data Frame that the rows are selected from"""
+        return self._df
+
+    @property
+    def indices(self) -> np.ndarray:
+        """Row indices of the base frame"""
+        return self._indices
+
     def columns(self) -> List[str]:
         return self._df.columns()
 
@@ -20,9 +49,36 @@ class SubFrame(DataFrameBase):
     def get_vlarr(self, column : str, index : int) -> List[Any]:
         return self._df.get_vlarr(column, self._indices[index])
 
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        return scatter_sorted(
+            self._indices[indices],
+            lambda rows : self._df.get_scalar_batch(column, rows)
+        )
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        return scatter_sorted(
+            self._indices[indices],
+            lambda rows : self._df.get_vlarr_batch(column, rows)
+        )
+
+    def fingerprint(self) -> Optional[str]:
+        base = self._df.fingerprint()
+
+        if base is None:
+            return None
+
+        return hash_parts(base, np.asarray(self._indices))
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        return self._df.get_ragged(column).take(self._indices)
+
     def __len__(self):
         return len(self._indices)
 
     def __getitem__(self, column : str) -> np.ndarray:
-        return self._df[column][self._indices]
+        return np.asarray(self._df[column])[self._indices]
 
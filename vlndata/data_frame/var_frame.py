@@ -1,9 +1,132 @@
-from typing import Any, Dict, Callable, List
+import inspect
+import os
+import re
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Callable, List, Optional, Set, Union
 import numpy as np
 
 from .data_frame_base import DataFrameBase
+from .funcs           import hash_parts
+from .ragged          import RaggedArray
+
+VarFunc  = Callable[[DataFrameBase,], Union[np.ndarray, RaggedArray]]
+VarValue = Union[np.ndarray, RaggedArray]
+
+def get_code_parts(code : Any) -> List[Any]:
+    """Get the parts of a code object that do not depend on the process
+
+    Nested code objects (of comprehensions, generators or lambdas) are
+    expanded recursively, since their repr contains memory addresses.
+    """
+    result : List[Any] = [ code.co_code, code.co_names ]
+
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            result += get_code_parts(const)
+        else:
+            result.append(const)
+
+    return result
+
+def get_var_func_signature(func : VarFunc) -> str:
+    """Get a signature of a VarFunc that changes when its code changes
+
+    The signature is based on the name, source code and bytecode of `func`.
+    Note that it does not capture the values of closure variables.
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = None
+
+    code = getattr(func, '__code__', None)
+
+    return hash_parts(
+        getattr(func, '__module__', None),
+        getattr(func, '__qualname__', type(func).__qualname__),
+        source,
+        *(get_code_parts(code) if code is not None else [ None ]),
+    )
+
+def sort_var_dependencies(
+    names : List[str], depends : Dict[str, List[str]]
+) -> List[str]:
+    """Sort variables `names` such that each follows its dependencies
+
+    Raises ValueError if a dependency is unknown or circular.
+    """
+    result : List[str] = []
+    state  : Dict[str, bool] = {}
+
+    def visit(name : str, path : List[str]) -> None:
+        if name not in names:
+            raise ValueError(
+                f"Unknown dependency '{name}' of variable '{path[-1]}'"
+            )
+
+        if state.get(name) is False:
+            raise ValueError(
+                "Circular dependency of variables: "
+                + ' -> '.join(path + [ name, ])
+            )
+
+        if name in state:
+            return
+
+        state[name] = False
+
+        for dep in depends.get(name, []):
+            visit(dep, path + [ name, ])
 
-VarFunc = Callable[[DataFrameBase,], np.ndarray]
+        state[name] = True
+        result.append(name)
+
+    for name in names:
+        visit(name, [])
+
+    return result
+
+def save_cached_var(path : str, value : VarValue) -> bool:
+    """Save a computed variable to `path` to be loaded by `load_cached_var`
+
+    Returns False if the variable cannot be saved (e.g. an object array).
+    """
+    if isinstance(value, RaggedArray):
+        arrays = { 'offsets' : value.offsets, 'values' : value.values }
+    else:
+        value = np.asarray(value)
+
+        if value.dtype.kind == 'O':
+            return False
+
+        arrays = { 'values' : value }
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+
+    # `values` are written last, and their presence marks a complete entry
+    for (kind, array) in arrays.items():
+        tmp_path = f'{path}.{kind}.{os.getpid()}.tmp.npy'
+        np.save(tmp_path, array)
+        os.replace(tmp_path, f'{path}.{kind}.npy')
+
+    return True
+
+def load_cached_var(path : str) -> Optional[VarValue]:
+    """Memory map a variable saved by `save_cached_var`, if it exists"""
+    values_path  = f'{path}.values.npy'
+    offsets_path = f'{path}.offsets.npy'
+
+    if not os.path.exists(values_path):
+        return None
+
+    values = np.load(values_path, mmap_mode = 'r')
+
+    if os.path.exists(offsets_path):
+        return RaggedArray(values, np.load(offsets_path, mmap_mode = 'r'))
+
+    return values
 
 class VarFrame(DataFrameBase):
     """Decorator to augment original Data Frame with new columns
@@ -21,40 +144,192 @@ class VarFrame(DataFrameBase):
     variables : Dict[str, VarFunc]
         A map between a new column name and a function that will evaluate
         the corresponding values. This function receives the original
-        data frame `df` as input and should return an numpy array of shape
-        (N,) where N = len(df).
+        data frame `df` as input and should return a numpy array of shape
+        (N,) where N = len(df), or a `RaggedArray` of N rows for a vlarr
+        column.
+
+        The functions are expected to evaluate the whole column at once,
+        e.g. by taking ragged views of the vlarr columns with
+        `df.get_ragged` and reducing them with the segmented reductions of
+        `RaggedArray`. C.f. Examples section below.
     lazy : bool, optional
         If lazy is False, then the values of new columns will be evaluated
         during the construction of `VarFrame`. Otherwise, the new values
         will be evaluated during the first use. Default: False.
+    cache_dir : str, optional
+        If not None, the computed variables are saved into this directory,
+        and are memory mapped from there on the next use (e.g. in another
+        process, or by the data loader workers, which then share the same
+        physical memory). The cache entries are keyed by a hash of the
+        variable name, the source code of its function, and the fingerprint
+        of `df` (c.f. `DataFrameBase.fingerprint`). Therefore, they are
+        invalidated automatically whenever any of these change. Variables of
+        frames without a fingerprint are not cached. Default: None.
+    depends : Dict[str, List[str]], optional
+        A map between a new column name and a list of the other new columns
+        it depends on. The functions of the variables with dependencies
+        receive this `VarFrame` instead of the original data frame `df`, so
+        they can access the values of their dependencies, which are
+        evaluated first. Default: None.
+    n_workers : int, optional
+        Number of threads to evaluate independent variables concurrently
+        with, when `lazy` is False. Vectorized numpy operations release the
+        GIL, so the variables computed with whole column operations (e.g.
+        `df.get_ragged`) are evaluated in parallel. `get_ragged` is safe to
+        call concurrently; the frames that collect it row by row serialize
+        the collection (c.f. `DataFrameBase.get_ragged`). The functions
+        evaluated concurrently should not call row accessors directly, since
+        some frames cache rows internally (e.g. `HDF5ReadAheadFrame`).
+        Default: 1.
+
+    The evaluation time of each variable (in seconds) is recorded in
+    the `timings` property.
+
+    Examples
+    --------
+    Per row means and counts of a vlarr column can be computed in a single
+    vectorized pass as
+    >>> df = VarFrame(df, {
+    ...     'mean_energy' : lambda df : df.get_ragged('energy').mean(),
+    ...     'n_particles' : lambda df : df.get_ragged('energy').lengths,
+    ... })
     """
 
     def __init__(
         self,
         df        : DataFrameBase,
         variables : Dict[str, VarFunc],
-        lazy      : bool = False
+        lazy      : bool = False,
+        cache_dir : Optional[str] = None,
+        depends   : Optional[Dict[str, List[str]]] = None,
+        n_workers : int = 1,
     ):
-        super().__init__(df.dtype)
+        super().__init__(df.dtype, df.cast)
         self._df   = df
         self._lazy = lazy
 
         variables       = variables or {}
         self._var_specs = variables
 
-        self._vars : Dict[str, np.ndarray] = {}
+        self._vars : Dict[str, VarValue] = {}
         self._columns = self._df.columns() + list(sorted(variables.keys()))
 
+        self._cache_dir   = cache_dir
+        self._cache_paths : Dict[str, Optional[str]] = {}
+        self._cached_vars : Set[str] = set()
+
+        self._depends = depends or {}
+        self._order   = sort_var_dependencies(
+            list(self._var_specs), self._depends
+        )
+        self._timings : Dict[str, float] = {}
+
         if not lazy:
-            for vname in self._var_specs:
-                self.eval_var(vname)
+            self.eval_vars(n_workers)
 
-    def eval_var(self, name):
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Evaluation time of each variable (in seconds)
+
+        The load time is reported for the variables loaded from the cache.
+        """
+        return self._timings
+
+    def eval_vars(self, n_workers : int = 1) -> None:
+        """Evaluate all variables using `n_workers` threads"""
+        if n_workers <= 1:
+            for name in self._order:
+                self.eval_var(name)
+
+            return
+
+        pending = list(self._order)
+        running : Dict[Any, str] = {}
+
+        with ThreadPoolExecutor(n_workers) as executor:
+            while pending or running:
+                ready = [
+                    name for name in pending
+                        if all(
+                            dep in self._vars
+                                for dep in self._depends.get(name, [])
+                        )
+                ]
+
+                for name in ready:
+                    pending.remove(name)
+                    running[executor.submit(self.eval_var, name)] = name
+
+                done, _ = wait(running, return_when = FIRST_COMPLETED)
+
+                for future in done:
+                    running.pop(future)
+                    future.result()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+
+        # cached variables are memory mapped again by the unpickled copies
+        state['_vars'] = {
+            k : v for (k, v) in self._vars.items()
+                if k not in self._cached_vars
+        }
+
+        return state
+
+    def get_cache_path(self, name : str) -> Optional[str]:
+        """Get path prefix of the cache entry of variable `name`"""
+        if self._cache_dir is None:
+            return None
+
+        if name not in self._cache_paths:
+            base = self._df.fingerprint()
+            path = None
+
+            if base is not None:
+                key = hash_parts(base, self.get_var_signature(name))
+                path = os.path.join(
+                    self._cache_dir, re.sub(r'[^\w.-]', '_', name) + '-' + key
+                )
+
+            self._cache_paths[name] = path
+
+        return self._cache_paths[name]
+
+    def get_var_signature(self, name : str) -> str:
+        """Get a signature of variable `name` and of its dependencies"""
+        return hash_parts(
+            name, get_var_func_signature(self._var_specs[name]),
+            *( self.get_var_signature(x) for x in self._depends.get(name, []) )
+        )
+
+    def eval_var(self, name : str) -> VarValue:
         if name in self._vars:
             return self._vars[name]
 
-        result = self._var_specs[name](self._df)
-        self._vars[name] = result
+        deps = self._depends.get(name, [])
+
+        for dep in deps:
+            self.eval_var(dep)
+
+        time_start = time.perf_counter()
+
+        path   = self.get_cache_path(name)
+        result = None
+
+        if path is not None:
+            result = load_cached_var(path)
+
+        if result is None:
+            result = self._var_specs[name](self if deps else self._df)
+
+            if (path is not None) and save_cached_var(path, result):
+                self._cached_vars.add(name)
+        else:
+            self._cached_vars.add(name)
+
+        self._timings[name] = time.perf_counter() - time_start
+        self._vars[name]    = result
 
         return result
 
@@ -73,12 +348,55 @@ class VarFrame(DataFrameBase):
 
         return self._df.get_vlarr(column, index)
 
+    def get_scalar_batch(
+        self, column : str, indices : np.ndarray
+    ) -> np.ndarray:
+        if column in self._var_specs:
+            return np.asarray(self.eval_var(column))[indices]
+
+        return self._df.get_scalar_batch(column, indices)
+
+    def get_vlarr_batch(
+        self, column : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        if column in self._var_specs:
+            result = self.eval_var(column)
+            return [ result[idx] for idx in indices ]
+
+        return self._df.get_vlarr_batch(column, indices)
+
+    def fingerprint(self) -> Optional[str]:
+        base = self._df.fingerprint()
+
+        if base is None:
+            return None
+
+        return hash_parts(base, *(
+            self.get_var_signature(name) for name in sorted(self._var_specs)
+        ))
+
+    def get_ragged(self, column : str) -> RaggedArray:
+        if column not in self._var_specs:
+            return self._df.get_ragged(column)
+
+        result = self.eval_var(column)
+
+        if isinstance(result, RaggedArray):
+            return result
+
+        return super().get_ragged(column)
+
     def __len__(self):
         return len(self._df)
 
     def __getitem__(self, column : str) -> np.ndarray:
         if column in self._var_specs:
-            return self.eval_var(column)
+            result = self.eval_var(column)
+
+            if isinstance(result, RaggedArray):
+                return result.to_object_array()
+
+            return result
 
         return self._df[column]
 
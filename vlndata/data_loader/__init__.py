@@ -1,4 +1,14 @@
 from .funcs       import vldata_dict_collate
+from .sampler     import (
+    Sampler, BatchSamplerBase, SequentialSampler, RandomSampler,
+    SubsetRandomSampler, BlockShuffleSampler, BatchSampler, BucketBatchSampler,
+    DistributedSampler, DistributedBatchSampler, WeightedSampler
+)
 from .data_loader import DataLoader
 
-__all__ = [ 'DataLoader', 'vldata_dict_collate' ]
+__all__ = [
+    'DataLoader', 'vldata_dict_collate', 'Sampler', 'BatchSamplerBase',
+    'SequentialSampler', 'RandomSampler', 'SubsetRandomSampler',
+    'BlockShuffleSampler', 'BatchSampler', 'BucketBatchSampler',
+    'DistributedSampler', 'DistributedBatchSampler', 'WeightedSampler',
+]
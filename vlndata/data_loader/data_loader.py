@@ -1,83 +1,424 @@
-import math
-from typing import Any, Dict
+import collections
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 
-from vlndata.dataset import DatasetBase
-from .funcs import vldata_dict_collate
+from vlndata.dataset   import DatasetBase, IterableDatasetBase
+from vlndata.profiling import get_profiler, profiled
+from .funcs   import vldata_dict_collate
+from .sampler import (
+    BatchSampler, BatchSamplerBase, DistributedBatchSampler,
+    DistributedSampler, RandomSampler, Sampler, SequentialSampler
+)
+
+WEIGHT_KEY = 'weight'
 
 class DataLoader:
+    # pylint: disable=too-many-instance-attributes
     """A default vlarr data loader that implements pytorch-like interface
 
     This class extracts samples from a dataset and packs them into
     batches of fixed size numpy tensors.
 
+    The order of the samples is defined by a sampler (c.f. `Sampler` and
+    `BatchSamplerBase`), which generates the whole plan of batches of each
+    epoch from its seed and the epoch number. By default, the loader
+    samples the dataset sequentially, or randomly if `shuffle` is True.
+    The loader keeps track of a cursor (epoch, batch) of the next batch to
+    load. Each iteration over the loader starts a new epoch, unless the
+    cursor is set explicitly with `set_cursor`, in which case the
+    iteration resumes the epoch from that batch.
+
+    `iter(loader)` starts an epoch and returns the loader itself, and
+    `next(loader)` returns the next batch of that epoch (or starts an epoch,
+    if none has been started).
+    Indexing `loader[i]` returns batch `i` of the plan of the current epoch.
+    Before the first epoch starts, a loader with the default sampler returns
+    the batches in the order of the dataset, even if `shuffle` is True.
+
+    The cursor, together with the state of the dataset (e.g. the prgs of its
+    random transformations), can be saved with `state_dict` and restored with
+    `load_state_dict`. This allows a restarted training to resume an
+    interrupted epoch from the first batch it has not consumed, without
+    loading the consumed batches again.
+
+    If `prefetch` is positive, the upcoming batches of the plan are loaded
+    ahead by a background thread.
+
+    If profiling is enabled (c.f. `vlndata.profiling`), the loader records
+    the time of loading and collating the batches, and ends the profiler
+    epoch whenever it finishes an epoch.
+
+    If `world_size` is greater than 1, the loader only loads the part of
+    each epoch plan of rank `rank` (c.f. `DistributedSampler` and
+    `DistributedBatchSampler`). All ranks must use the same sampler
+    parameters and seed.
+
+    If the dataset is an `IterableDatasetBase` (e.g. `StreamDataset`), then
+    the loader only supports iteration, and the batches are formed from the
+    consecutive samples of the dataset. The length of such a loader is
+    unknown.
+
     Parameters
     ----------
-    dataset : DatasetBase
+    dataset : DatasetBase or IterableDatasetBase
         Dataset to extract samples from.
     batch_size : int
         Batch size.
     shuffle : bool, optional
-        Whether to shuffle dataset before the data extraction.
-        Default: True.
+        Whether to shuffle dataset before the data extraction. This option is
+        ignored for iterable datasets, which shuffle samples themselves, and
+        if `sampler` is specified. Default: True.
     pad : Any, optional
         Value to pad lengths of vl arrays.
         Default: 0.
     seed : int, optional
         Value to seed shuffle prg.
         Default: 0.
+    dtype : Any or Dict[str, Any], optional
+        Data type to cast the batches to, or a dictionary of data types per
+        group. If None, the batches keep the data type of the samples. This
+        allows frames to keep the source precision (c.f.
+        `DataFrameBase.cast`) and cast the values only once, at collate time.
+        Default: None.
+    sampler : Sampler or BatchSamplerBase, optional
+        Sampler of the dataset indices. A `Sampler` is split into batches of
+        `batch_size`. A `BatchSamplerBase` defines the batches itself.
+        Default: None.
+    drop_last : bool, optional
+        Whether to drop the last incomplete batch, and the samples (or
+        batches) that do not divide evenly among the ranks. Otherwise, the
+        plans of the ranks are padded to the same number of batches. The last
+        incomplete batch is not dropped if `sampler` is a `BatchSamplerBase`.
+        Default: False.
+    prefetch : int, optional
+        Number of batches to load ahead in a background thread. If 0, the
+        batches are loaded on demand. Default: 0.
+    weights : np.ndarray, optional
+        Weights of the dataset samples. If specified, each batch contains
+        the weights of its samples under the key `WEIGHT_KEY` (e.g.
+        `WeightedSampler.importance_weights`). Default: None.
+    rank : int, optional
+        Rank of the process in a distributed training. Default: 0.
+    world_size : int, optional
+        Number of ranks in a distributed training. Default: 1.
     """
 
     def __init__(
         self,
-        dataset    : DatasetBase,
+        dataset    : Union[DatasetBase, IterableDatasetBase],
         batch_size : int,
         shuffle    : bool = True,
         pad        : Any  = 0,
         seed       : int  = 0,
+        dtype      : Any  = None,
+        sampler    : Optional[Union[Sampler, BatchSamplerBase]] = None,
+        drop_last  : bool = False,
+        prefetch   : int  = 0,
+        weights    : Optional[np.ndarray] = None,
+        rank       : int  = 0,
+        world_size : int  = 1,
     ):
+        # pylint: disable=too-many-arguments
         self._batch_size = batch_size
         self._dataset    = dataset
-        self._rng        = np.random.default_rng(seed)
         self._pad        = pad
-        self._shuffle    = shuffle
-        self._indices    = np.arange(len(dataset))
-        self._index      = 0
+        self._dtype      = dtype
+        self._prefetch   = prefetch
+        self._weights    = weights
+        self._iterable   = isinstance(dataset, IterableDatasetBase)
+
+        self._epoch    = 0
+        self._batch    = 0
+        self._started  = False
+        self._resume   = False
+        self._plan     : Optional[Tuple[int, List[np.ndarray]]] = None
+        self._iterator : Optional[Iterator[Dict[str, np.ndarray]]] = None
+
+        # dataset state after the last consumed batch, while prefetching
+        self._dataset_state : Optional[Dict[str, Any]] = None
+
+        self._batch_sampler : Optional[BatchSamplerBase] = None
+
+        # batches in the dataset order, indexed before the first epoch
+        self._ordered_sampler : Optional[BatchSamplerBase]  = None
+        self._ordered_plan    : Optional[List[np.ndarray]] = None
+
+        if not self._iterable:
+            self._batch_sampler = self._construct_batch_sampler(
+                sampler, shuffle, seed, drop_last, rank, world_size
+            )
+
+            if (sampler is None) and shuffle:
+                self._ordered_sampler = self._construct_batch_sampler(
+                    None, False, seed, drop_last, rank, world_size
+                )
+
+    def _construct_batch_sampler(
+        self,
+        sampler    : Optional[Union[Sampler, BatchSamplerBase]],
+        shuffle    : bool,
+        seed       : int,
+        drop_last  : bool,
+        rank       : int,
+        world_size : int,
+    ) -> BatchSamplerBase:
+        # pylint: disable=too-many-arguments
+        if isinstance(sampler, BatchSamplerBase):
+            if world_size > 1:
+                return DistributedBatchSampler(
+                    sampler, rank, world_size, drop_last
+                )
+
+            return sampler
+
+        if sampler is None:
+            if shuffle:
+                sampler = RandomSampler(len(self._dataset), seed)
+            else:
+                sampler = SequentialSampler(len(self._dataset))
+
+        if world_size > 1:
+            sampler = DistributedSampler(sampler, rank, world_size, drop_last)
+
+        return BatchSampler(sampler, self._batch_size, drop_last)
 
     @property
     def batch_size(self) -> int:
         return self._batch_size
 
     @property
-    def dataset(self) -> DatasetBase:
+    def dataset(self) -> Union[DatasetBase, IterableDatasetBase]:
         return self._dataset
 
+    @property
+    def batch_sampler(self) -> Optional[BatchSamplerBase]:
+        return self._batch_sampler
+
+    @property
+    def cursor(self) -> Tuple[int, int]:
+        """Cursor (epoch, batch) of the next batch to load"""
+        return (self._epoch, self._batch)
+
+    def _close_iterator(self) -> None:
+        """Stop the epoch iteration of `next`, if there is one"""
+        if self._iterator is not None:
+            self._iterator.close()
+            self._iterator = None
+
+    def set_cursor(self, epoch : int, batch : int = 0) -> None:
+        """Make the next iteration resume epoch `epoch` from batch `batch`"""
+        self._close_iterator()
+
+        self._epoch   = epoch
+        self._batch   = batch
+        self._started = True
+        self._resume  = True
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Get the state of the loader and of its dataset
+
+        The state corresponds to the last consumed batch, even if the
+        following batches have already been prefetched. The dataset state is
+        rewound to the last consumed batch when an iteration with prefetch
+        is interrupted.
+        """
+        if self._iterable:
+            raise TypeError("Iterable dataset loader cannot be resumed")
+
+        dataset_state = self._dataset_state
+
+        if dataset_state is None:
+            dataset_state = self._dataset.state_dict()
+
+        return {
+            'epoch'   : self._epoch,
+            'batch'   : self._batch,
+            'started' : self._started,
+            'dataset' : dataset_state,
+        }
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        """Restore the state saved by `state_dict`
+
+        The next iteration over the loader resumes the saved epoch from the
+        first batch that has not been consumed.
+        """
+        if self._iterable:
+            raise TypeError("Iterable dataset loader cannot be resumed")
+
+        self._close_iterator()
+        self._dataset.load_state_dict(state['dataset'])
+        self._dataset_state = None
+
+        if state['started']:
+            self.set_cursor(state['epoch'], state['batch'])
+        else:
+            self._epoch   = state['epoch']
+            self._batch   = state['batch']
+            self._started = False
+            self._resume  = False
+
+    def get_plan(self, epoch : int) -> List[np.ndarray]:
+        """Get the batches of dataset indices of epoch `epoch`"""
+        if self._batch_sampler is None:
+            raise TypeError("Iterable dataset loader does not have a plan")
+
+        if (self._plan is None) or (self._plan[0] != epoch):
+            self._plan = (epoch, self._batch_sampler.get_batches(epoch))
+
+        return self._plan[1]
+
+    @property
+    def plan(self) -> List[np.ndarray]:
+        """Batches of dataset indices of the current epoch"""
+        return self.get_plan(self._epoch)
+
     def __len__(self):
-        return math.ceil(len(self._dataset) / self._batch_size)
+        if self._iterable:
+            raise TypeError("Length of an iterable dataset loader is unknown")
 
-    def __iter__(self):
-        if self._shuffle:
-            self._rng.shuffle(self._indices)
+        return len(self._batch_sampler)
 
-        self._index = 0
-        return self
+    def iter_stream(self) -> Iterator[Dict[str, np.ndarray]]:
+        """Iterate over batches of an iterable dataset"""
+        batch = []
+
+        for sample in self._dataset:
+            batch.append(sample)
+
+            if len(batch) == self._batch_size:
+                yield profiled(
+                    'collate', vldata_dict_collate, batch, self._pad,
+                    self._dtype
+                )
+                batch = []
 
-    def __next__(self):
-        if self._index >= len(self):
-            raise StopIteration
+        if len(batch) > 0:
+            yield profiled(
+                'collate', vldata_dict_collate, batch, self._pad, self._dtype
+            )
 
-        result = self[self._index]
-        self._index += 1
+    def load_batch(self, indices : np.ndarray) -> Dict[str, np.ndarray]:
+        """Load and collate samples at dataset `indices`"""
+        return profiled('loader.batch', self._load_batch, indices)
+
+    def _load_batch(self, indices : np.ndarray) -> Dict[str, np.ndarray]:
+        batch  = self._dataset.get_batch(indices)
+        result = profiled(
+            'collate', vldata_dict_collate, batch, self._pad, self._dtype
+        )
+
+        if self._weights is not None:
+            if WEIGHT_KEY in result:
+                raise ValueError(
+                    f"Batch group '{WEIGHT_KEY}' conflicts with the weights"
+                )
+
+            result[WEIGHT_KEY] = np.asarray(self._weights)[indices]
 
         return result
 
-    def __getitem__(self, index) -> Dict[str, np.ndarray]:
-        batch_start_idx = index * self._batch_size
-        batch_end_idx   = (index + 1) * self._batch_size
-        batch_indices   = self._indices[batch_start_idx:batch_end_idx]
+    def _load_batch_state(
+        self, indices : np.ndarray
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        result = self.load_batch(indices)
+        return (result, self._dataset.state_dict())
+
+    def _iter_loaded(
+        self, plan : List[np.ndarray], start : int
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        if self._prefetch <= 0:
+            for indices in plan[start:]:
+                yield self.load_batch(indices)
+
+            return
+
+        self._dataset_state = self._dataset.state_dict()
+
+        # a single thread loads all batches, since frames are not thread safe
+        with ThreadPoolExecutor(1) as executor:
+            queue : Deque[Future] = collections.deque()
+            index = start
 
-        batch = [ self._dataset[i] for i in batch_indices ]
+            try:
+                while (len(queue) > 0) or (index < len(plan)):
+                    while (
+                            (len(queue) <= self._prefetch)
+                        and (index < len(plan))
+                    ):
+                        queue.append(
+                            executor.submit(
+                                self._load_batch_state, plan[index]
+                            )
+                        )
+                        index += 1
+
+                    result, self._dataset_state = queue.popleft().result()
+                    yield result
+            finally:
+                for future in queue:
+                    future.cancel()
+
+                # rewind the dataset state of the unconsumed batches
+                executor.shutdown(wait = True)
+                self._dataset.load_state_dict(self._dataset_state)
+                self._dataset_state = None
+
+    def iter_epoch(self) -> Iterator[Dict[str, np.ndarray]]:
+        """Iterate over the batches of the epoch at the cursor
+
+        The cursor moves to the start of the epoch (or to the batch to
+        resume from) when this method is called.
+        """
+        if self._resume and (self._batch < len(self)):
+            epoch, start = self._epoch, self._batch
+        elif self._started:
+            epoch, start = self._epoch + 1, 0
+        else:
+            epoch, start = self._epoch, 0
+
+        self._epoch   = epoch
+        self._batch   = start
+        self._started = True
+        self._resume  = False
+
+        return self._iter_plan(epoch, start)
+
+    def _iter_plan(
+        self, epoch : int, start : int
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        for batch in self._iter_loaded(self.get_plan(epoch), start):
+            self._batch += 1
+            yield batch
+
+        profiler = get_profiler()
+
+        if profiler is not None:
+            profiler.end_epoch(epoch)
+
+    def __iter__(self) -> 'DataLoader':
+        self._close_iterator()
+
+        if self._iterable:
+            self._iterator = self.iter_stream()
+        else:
+            self._iterator = self.iter_epoch()
+
+        return self
+
+    def __next__(self) -> Dict[str, np.ndarray]:
+        if self._iterator is None:
+            self.__iter__()
+
+        return next(self._iterator)
+
+    def __getitem__(self, index) -> Dict[str, np.ndarray]:
+        if (not self._started) and (self._ordered_sampler is not None):
+            if self._ordered_plan is None:
+                self._ordered_plan = self._ordered_sampler.get_batches(0)
 
-        return vldata_dict_collate(batch, self._pad)
+            return self.load_batch(self._ordered_plan[index])
 
+        return self.load_batch(self.plan[index])
@@ -1,4 +1,4 @@
-from typing import Any, Iterable, List, Tuple, Union
+from typing import Any, Dict, Iterable, List, Tuple, Union
 import numpy as np
 
 from vlndata.dataset import VLDataDict
@@ -61,8 +61,17 @@ def infer_shape_dtype(it : Iterable[np.ndarray]) -> Tuple[ShapeUnion, Any]:
     result = (n, ) + tuple(result)      # type: ignore
     return result, dtype                # type: ignore
 
-def vldata_dict_collate(batch : List[VLDataDict], pad : Any = 0) -> VLDataDict:
-    """Collate a list of vl data objects into a single vl data batch"""
+def vldata_dict_collate(
+    batch : List[VLDataDict], pad : Any = 0,
+    dtype : Union[Any, Dict[str, Any]] = None
+) -> VLDataDict:
+    """Collate a list of vl data objects into a single vl data batch
+
+    If `dtype` is not None, the batch arrays are cast to `dtype` while they
+    are being collated. Otherwise, they keep the data type of the samples.
+    `dtype` can also be a dictionary of data types per group, in which case
+    the groups missing from the dictionary keep the data type of the samples.
+    """
     if len(batch) == 0:
         return {}
 
@@ -70,17 +79,23 @@ def vldata_dict_collate(batch : List[VLDataDict], pad : Any = 0) -> VLDataDict:
     result = {}
 
     for key in keys:
-        shape, dtype = infer_shape_dtype(
+        shape, key_dtype = infer_shape_dtype(
             (data_dict[key] for data_dict in batch)
         )
 
+        if isinstance(dtype, dict):
+            key_dtype = dtype.get(key, key_dtype)
+        elif dtype is not None:
+            key_dtype = dtype
+
         if len(shape) == 2:
             result[key] = scalar_collate(
-                (data_dict[key] for data_dict in batch), shape, dtype
+                (data_dict[key] for data_dict in batch), shape, key_dtype
             )
         else:
             result[key] = vlarr_collate(
-                (data_dict[key] for data_dict in batch), shape, dtype, pad
+                (data_dict[key] for data_dict in batch), shape, key_dtype,
+                pad
             )
 
     return result
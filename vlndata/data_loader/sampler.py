@@ -0,0 +1,556 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from vlndata.data_frame import DataFrameBase, VarFunc
+
+def get_epoch_rng(seed : int, epoch : int) -> np.random.Generator:
+    """Get a prg that depends only on `seed` and `epoch`"""
+    return np.random.default_rng([ seed, epoch ])
+
+class Sampler(ABC):
+    """Interface of a sampler of dataset indices
+
+    A sampler generates the order of dataset indices of each epoch. The order
+    depends only on the sampler parameters and the epoch number, so any
+    epoch can be regenerated (e.g. to resume an interrupted epoch).
+    """
+
+    @abstractmethod
+    def get_indices(self, epoch : int) -> np.ndarray:
+        """Get the dataset indices of epoch `epoch` in the order of sampling
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self):
+        """Number of samples per epoch"""
+        raise NotImplementedError
+
+class BatchSamplerBase(ABC):
+    """Interface of a sampler of batches of dataset indices
+
+    Similar to `Sampler`, but generates the whole plan of the epoch as
+    a list of batches of indices. This allows the data loader to look ahead
+    at the upcoming batches (e.g. to prefetch them).
+    """
+
+    @abstractmethod
+    def get_batches(self, epoch : int) -> List[np.ndarray]:
+        """Get batches of dataset indices of epoch `epoch`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self):
+        """Number of batches per epoch"""
+        raise NotImplementedError
+
+class SequentialSampler(Sampler):
+    """Sampler that returns indices in the order of the dataset"""
+
+    def __init__(self, n_samples : int):
+        self._n_samples = n_samples
+
+    def get_indices(self, epoch : int) -> np.ndarray:
+        return np.arange(self._n_samples)
+
+    def __len__(self):
+        return self._n_samples
+
+class RandomSampler(Sampler):
+    """Sampler that shuffles all indices of the dataset every epoch"""
+
+    def __init__(self, n_samples : int, seed : int = 0):
+        self._n_samples = n_samples
+        self._seed      = seed
+
+    def get_indices(self, epoch : int) -> np.ndarray:
+        return get_epoch_rng(self._seed, epoch).permutation(self._n_samples)
+
+    def __len__(self):
+        return self._n_samples
+
+class SubsetRandomSampler(Sampler):
+    """Sampler that shuffles a fixed subset of dataset `indices` every epoch
+    """
+
+    def __init__(self, indices : np.ndarray, seed : int = 0):
+        self._indices = np.asarray(indices, dtype = np.int64)
+        self._seed    = seed
+
+    def get_indices(self, epoch : int) -> np.ndarray:
+        prg = get_epoch_rng(self._seed, epoch)
+        return self._indices[prg.permutation(len(self._indices))]
+
+    def __len__(self):
+        return len(self._indices)
+
+class BlockShuffleSampler(Sampler):
+    """Sampler that shuffles blocks of contiguous indices
+
+    The dataset is divided into blocks of `block_size` contiguous indices,
+    or into blocks between `boundaries` (e.g. `ShardedFrame.shard_boundaries`).
+    Every epoch, the order of the blocks is shuffled, while the indices
+    within each block keep their order. This preserves the locality of
+    reads of the frames that read files sequentially (e.g.
+    `HDF5ReadAheadFrame` with `chunk_size` equal to `block_size`, or
+    a `ShardedFrame` with `max_open` shards) at the cost of a coarser
+    shuffle.
+
+    Parameters
+    ----------
+    n_samples : int
+        Number of samples in the dataset.
+    block_size : int
+        Number of indices per block. Ignored if `boundaries` are given.
+    seed : int, optional
+        Seed of the shuffle prg. Default: 0.
+    boundaries : np.ndarray, optional
+        Sorted indices of the block starts, followed by `n_samples`.
+        Default: None.
+    """
+
+    def __init__(
+        self,
+        n_samples  : int,
+        block_size : int,
+        seed       : int = 0,
+        boundaries : Optional[np.ndarray] = None,
+    ):
+        self._n_samples = n_samples
+        self._seed      = seed
+
+        if boundaries is None:
+            boundaries = np.append(
+                np.arange(0, n_samples, max(1, block_size)), n_samples
+            )
+
+        self._boundaries = np.asarray(boundaries, dtype = np.int64)
+
+    def get_indices(self, epoch : int) -> np.ndarray:
+        lengths = np.diff(self._boundaries)
+        blocks  = get_epoch_rng(self._seed, epoch).permutation(len(lengths))
+
+        starts  = self._boundaries[:-1][blocks]
+        lengths = lengths[blocks]
+        shifts  = starts - (np.cumsum(lengths) - lengths)
+
+        return np.repeat(shifts, lengths) + np.arange(np.sum(lengths))
+
+    def __len__(self):
+        return self._n_samples
+
+def get_rank_slice(
+    n_items    : int,
+    rank       : int,
+    world_size : int,
+    drop_last  : bool,
+) -> Tuple[int, int]:
+    """Get the number of items per rank and the padded number of items
+
+    Unless `drop_last` is True, the items are padded to a multiple of
+    `world_size`, so that every rank gets the same number of items.
+    """
+    if not 0 <= rank < world_size:
+        raise ValueError(f"Rank {rank} is out of range [0, {world_size})")
+
+    if drop_last:
+        n_rank = n_items // world_size
+    else:
+        n_rank = -(-n_items // world_size)
+
+    return (n_rank, n_rank * world_size)
+
+class DistributedSampler(Sampler):
+    """Sampler that partitions the indices of a sampler among ranks
+
+    Each rank of a distributed training constructs this sampler with the
+    same `sampler` (and seed) and its own `rank`. The ranks generate the same
+    plan of the epoch independently, and take disjoint parts of it, so no
+    coordination is needed.
+
+    Unless `drop_last` is True, the plan is padded by wrapping around its
+    start, so every rank gets the same number of indices (and batches).
+
+    By default, the ranks take interleaved indices of the plan. If
+    `contiguous` is True, each rank takes a contiguous part of the plan
+    instead. Combined with `BlockShuffleSampler`, this makes each rank read
+    whole blocks (e.g. shards or chunks) of the dataset.
+
+    Parameters
+    ----------
+    sampler : Sampler
+        Sampler of the whole dataset.
+    rank : int
+        Rank of the process, in [0, world_size).
+    world_size : int
+        Number of ranks.
+    drop_last : bool, optional
+        Whether to drop the tail of the plan instead of padding.
+        Default: False.
+    contiguous : bool, optional
+        Whether to take contiguous parts of the plan. Default: False.
+    """
+
+    def __init__(
+        self,
+        sampler    : Sampler,
+        rank       : int,
+        world_size : int,
+        drop_last  : bool = False,
+        contiguous : bool = False,
+    ):
+        # pylint: disable=too-many-arguments
+        self._sampler    = sampler
+        self._rank       = rank
+        self._world_size = world_size
+        self._drop_last  = drop_last
+        self._contiguous = contiguous
+
+        get_rank_slice(len(sampler), rank, world_size, drop_last)
+
+    def get_indices(self, epoch : int) -> np.ndarray:
+        n_rank, n_total = get_rank_slice(
+            len(self._sampler), self._rank, self._world_size, self._drop_last
+        )
+        indices = self._sampler.get_indices(epoch)
+
+        if len(indices) > 0:
+            indices = np.resize(indices, n_total)
+
+        if self._contiguous:
+            return indices[self._rank * n_rank:(self._rank + 1) * n_rank]
+
+        return indices[self._rank:n_total:self._world_size]
+
+    def __len__(self):
+        return get_rank_slice(
+            len(self._sampler), self._rank, self._world_size, self._drop_last
+        )[0]
+
+def get_sample_weights(
+    frame : DataFrameBase, weights : Union[str, VarFunc]
+) -> np.ndarray:
+    """Get weights of the rows of `frame`
+
+    The weights are the values of the column `weights`, or the values
+    computed by the `VarFunc` `weights` over the whole frame. Columns of
+    shape (N, 1) (e.g. scalar columns of HDF5 files) are flattened.
+    """
+    if isinstance(weights, str):
+        return np.ravel(np.asarray(frame[weights], dtype = np.float64))
+
+    return np.ravel(np.asarray(weights(frame), dtype = np.float64))
+
+def construct_alias_table(
+    weights : np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Construct an alias table of the distribution proportional to `weights`
+
+    C.f. M. D. Vose, "A linear algorithm for generating random numbers with
+    a given distribution", IEEE Trans. Softw. Eng. 17 (1991) 972.
+
+    Returns
+    -------
+    (prob, alias)
+        Row `k` is drawn with probability `prob[k]`, and row `alias[k]`
+        otherwise.
+    """
+    n_rows = len(weights)
+    scaled = weights * (n_rows / np.sum(weights))
+    prob   = np.ones(n_rows, dtype = np.float64)
+    alias  = np.arange(n_rows)
+
+    small = list(np.flatnonzero(scaled < 1))
+    large = list(np.flatnonzero(scaled >= 1))
+
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+
+        prob[less]    = scaled[less]
+        alias[less]   = more
+        scaled[more] -= 1 - scaled[less]
+
+        if scaled[more] < 1:
+            small.append(more)
+        else:
+            large.append(more)
+
+    return (prob, alias)
+
+class WeightedSampler(Sampler):
+    """Sampler that draws rows with probabilities proportional to weights
+
+    With replacement, the rows are drawn in O(1) per sample from an alias
+    table, which is constructed once over all the weights. Without
+    replacement, the rows are ordered by random exponential keys scaled by
+    the inverse weights, which is equivalent to drawing the rows one by one
+    without replacement.
+
+    The sampled rows are biased by the weights. The weights that correct
+    this bias (e.g. of an importance sampling) are available as
+    `importance_weights`, and can be added to the batches by the data
+    loader (c.f. `DataLoader` parameter `weights`).
+
+    Parameters
+    ----------
+    weights : np.ndarray
+        Non-negative weights of the rows.
+    n_samples : int, optional
+        Number of samples per epoch. If None, the number of rows.
+        Default: None.
+    replacement : bool, optional
+        Whether to draw the rows with replacement. Default: True.
+    seed : int, optional
+        Seed of the sampling prg. Default: 0.
+    """
+
+    def __init__(
+        self,
+        weights     : np.ndarray,
+        n_samples   : Optional[int] = None,
+        replacement : bool = True,
+        seed        : int  = 0,
+    ):
+        weights = np.asarray(weights, dtype = np.float64)
+
+        if weights.ndim != 1:
+            raise ValueError(
+                f"Weights must be one-dimensional, got shape {weights.shape}"
+            )
+
+        if (
+               (not np.all(np.isfinite(weights)))
+            or np.any(weights < 0)
+            or (np.sum(weights) <= 0)
+        ):
+            raise ValueError(
+                "Weights must be non-negative, finite and not all zero"
+            )
+
+        if n_samples is None:
+            n_samples = len(weights)
+
+        if (not replacement) and (n_samples > np.count_nonzero(weights)):
+            raise ValueError(
+                f"Cannot draw {n_samples} samples without replacement from"
+                f" {np.count_nonzero(weights)} rows of non-zero weight"
+            )
+
+        self._weights     = weights
+        self._n_samples   = n_samples
+        self._replacement = replacement
+        self._seed        = seed
+        self._alias_table : Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        if replacement:
+            self._alias_table = construct_alias_table(weights)
+
+    @staticmethod
+    def from_frame(
+        frame       : DataFrameBase,
+        weights     : Union[str, VarFunc],
+        n_samples   : Optional[int] = None,
+        replacement : bool = True,
+        seed        : int  = 0,
+    ) -> 'WeightedSampler':
+        """Construct sampler with weights of a column or VarFunc of `frame`"""
+        return WeightedSampler(
+            get_sample_weights(frame, weights), n_samples, replacement, seed
+        )
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights
+
+    @property
+    def importance_weights(self) -> np.ndarray:
+        """Weights of the rows that correct the sampling bias
+
+        The weights are inversely proportional to the sampling weights and
+        are normalized to 1 for the rows of the mean sampling weight.
+        """
+        with np.errstate(divide = 'ignore'):
+            return np.mean(self._weights) / self._weights
+
+    def get_indices(self, epoch : int) -> np.ndarray:
+        prg = get_epoch_rng(self._seed, epoch)
+
+        if self._alias_table is not None:
+            prob, alias = self._alias_table
+            rows = prg.integers(0, len(self._weights), size = self._n_samples)
+
+            return np.where(
+                prg.random(size = self._n_samples) < prob[rows],
+                rows, alias[rows]
+            )
+
+        with np.errstate(divide = 'ignore'):
+            keys = prg.exponential(size = len(self._weights)) / self._weights
+
+        result = np.argpartition(keys, self._n_samples - 1)[:self._n_samples]
+        return result[np.argsort(keys[result], kind = 'stable')]
+
+    def __len__(self):
+        return self._n_samples
+
+class BatchSampler(BatchSamplerBase):
+    """Batch sampler that splits indices of a `Sampler` into batches
+
+    Parameters
+    ----------
+    sampler : Sampler
+        Sampler of dataset indices.
+    batch_size : int
+        Batch size.
+    drop_last : bool, optional
+        Whether to drop the last incomplete batch. Default: False.
+    """
+
+    def __init__(
+        self, sampler : Sampler, batch_size : int, drop_last : bool = False
+    ):
+        self._sampler    = sampler
+        self._batch_size = batch_size
+        self._drop_last  = drop_last
+
+    @property
+    def sampler(self) -> Sampler:
+        return self._sampler
+
+    def get_batches(self, epoch : int) -> List[np.ndarray]:
+        indices = self._sampler.get_indices(epoch)
+
+        return [
+            indices[idx * self._batch_size:(idx + 1) * self._batch_size]
+                for idx in range(len(self))
+        ]
+
+    def __len__(self):
+        if self._drop_last:
+            return len(self._sampler) // self._batch_size
+
+        return -(-len(self._sampler) // self._batch_size)
+
+class BucketBatchSampler(BatchSamplerBase):
+    """Batch sampler that groups samples of similar lengths into batches
+
+    Padding vlarrs of a batch to the longest vlarr wastes memory and compute
+    when the lengths vary a lot. This sampler shuffles the dataset, splits
+    it into pools of `pool_batches` batches, sorts each pool by `lengths`,
+    cuts the pools into batches, and shuffles the order of the batches.
+    Therefore, the batches hold samples of similar lengths, while their
+    contents and order are still random.
+
+    Parameters
+    ----------
+    lengths : np.ndarray
+        Lengths of the samples, e.g. `df.get_ragged(column).lengths`.
+    batch_size : int
+        Batch size.
+    pool_batches : int, optional
+        Number of batches per sorting pool. Default: 100.
+    seed : int, optional
+        Seed of the shuffle prg. Default: 0.
+    drop_last : bool, optional
+        Whether to drop the incomplete batches. Default: False.
+    """
+
+    def __init__(
+        self,
+        lengths      : np.ndarray,
+        batch_size   : int,
+        pool_batches : int  = 100,
+        seed         : int  = 0,
+        drop_last    : bool = False,
+    ):
+        self._lengths    = np.asarray(lengths)
+        self._batch_size = batch_size
+        self._pool_size  = max(1, pool_batches) * batch_size
+        self._seed       = seed
+        self._drop_last  = drop_last
+
+    def get_batches(self, epoch : int) -> List[np.ndarray]:
+        prg     = get_epoch_rng(self._seed, epoch)
+        indices = prg.permutation(len(self._lengths))
+        result  = []
+
+        for start in range(0, len(indices), self._pool_size):
+            pool = indices[start:start + self._pool_size]
+            pool = pool[np.argsort(self._lengths[pool], kind = 'stable')]
+
+            for batch_start in range(0, len(pool), self._batch_size):
+                batch = pool[batch_start:batch_start + self._batch_size]
+
+                if self._drop_last and (len(batch) < self._batch_size):
+                    continue
+
+                result.append(batch)
+
+        return [ result[idx] for idx in prg.permutation(len(result)) ]
+
+    def __len__(self):
+        n_samples = len(self._lengths)
+        pools     = [ self._pool_size ] * (n_samples // self._pool_size)
+
+        if n_samples % self._pool_size > 0:
+            pools.append(n_samples % self._pool_size)
+
+        if self._drop_last:
+            return sum(pool // self._batch_size for pool in pools)
+
+        return sum(-(-pool // self._batch_size) for pool in pools)
+
+class DistributedBatchSampler(BatchSamplerBase):
+    """Batch sampler that partitions the batches of a batch sampler
+
+    Similar to `DistributedSampler`, but distributes whole batches of
+    `batch_sampler` (e.g. `BucketBatchSampler`) among the ranks. Unless
+    `drop_last` is True, the batches are padded by wrapping around, so every
+    rank gets the same number of batches.
+
+    Parameters
+    ----------
+    batch_sampler : BatchSamplerBase
+        Batch sampler of the whole dataset.
+    rank : int
+        Rank of the process, in [0, world_size).
+    world_size : int
+        Number of ranks.
+    drop_last : bool, optional
+        Whether to drop the last batches instead of padding. Default: False.
+    """
+
+    def __init__(
+        self,
+        batch_sampler : BatchSamplerBase,
+        rank          : int,
+        world_size    : int,
+        drop_last     : bool = False,
+    ):
+        self._batch_sampler = batch_sampler
+        self._rank          = rank
+        self._world_size    = world_size
+        self._drop_last     = drop_last
+
+        get_rank_slice(len(batch_sampler), rank, world_size, drop_last)
+
+    def get_batches(self, epoch : int) -> List[np.ndarray]:
+        _n_rank, n_total = get_rank_slice(
+            len(self._batch_sampler), self._rank, self._world_size,
+            self._drop_last
+        )
+        batches = self._batch_sampler.get_batches(epoch)
+
+        return [
+            batches[idx % len(batches)]
+                for idx in range(self._rank, n_total, self._world_size)
+        ]
+
+    def __len__(self):
+        return get_rank_slice(
+            len(self._batch_sampler), self._rank, self._world_size,
+            self._drop_last
+        )[0]
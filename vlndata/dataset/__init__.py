@@ -1,12 +1,15 @@
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from vlndata.consts     import SPLIT_TRAIN, SPLIT_VAL, SPLIT_TEST
 from vlndata.data_frame import DataFrameBase, construct_data_frame
 from vlndata.funcs      import Spec, unpack_name_args
 
-from .dataset_base      import DatasetBase, ColumnGroups, VLDataDict
+from .dataset_base      import (
+    DatasetBase, IterableDatasetBase, ColumnGroups, VLDataDict
+)
 from .dataset_cache     import DatasetCache
 from .dataset_transform import DatasetTransform
+from .stream_dataset    import StreamDataset
 from .vldataset         import VLDataset
 from .transform         import construct_transforms, Transform
 
@@ -27,13 +30,14 @@ def construct_dataset_from_data_frame(
     vlarr_limits    : Optional[Dict[str, int]] = None,
     transform_train : Optional[List[Union[Spec, Transform]]] = None,
     transform_test  : Optional[List[Union[Spec, Transform]]] = None,
+    dtypes          : Optional[Dict[str, Any]] = None,
 ) -> DatasetBase:
 
     if isinstance(df, (tuple, list)):
         df = df[SPLIT_INDEX[split]]
 
     result : DatasetBase \
-        = VLDataset(df, scalar_groups, vlarr_groups, vlarr_limits)
+        = VLDataset(df, scalar_groups, vlarr_groups, vlarr_limits, dtypes)
 
     if cache:
         result = DatasetCache(result)
@@ -62,13 +66,35 @@ def construct_dataset(
     extra_vars      : Optional[List[Spec]]        = None,
     transform_train : Optional[List[Union[Spec, Transform]]] = None,
     transform_test  : Optional[List[Union[Spec, Transform]]] = None,
+    dtypes          : Optional[Dict[str, Any]]    = None,
+    split_args      : Optional[Dict[str, Any]]    = None,
 ) -> DatasetBase:
     df = construct_data_frame(
-        frame, shuffle, val_size, test_size, extra_vars, seed
+        frame, shuffle, val_size, test_size, extra_vars, seed,
+        split_args = split_args
     )
 
     return construct_dataset_from_data_frame(
         df, cache, split, scalar_groups, vlarr_groups, vlarr_limits,
-        transform_train, transform_test
+        transform_train, transform_test, dtypes
     )
 
+
+def construct_stream_dataset(
+    stream          : Spec,
+    shuffle_buffer  : int = 0,
+    seed            : int = 0,
+    scalar_groups   : Optional[ColumnGroups]   = None,
+    vlarr_groups    : Optional[ColumnGroups]   = None,
+    vlarr_limits    : Optional[Dict[str, int]] = None,
+    transform       : Optional[List[Union[Spec, Transform]]] = None,
+    dtypes          : Optional[Dict[str, Any]] = None,
+) -> IterableDatasetBase:
+    """Construct a streaming dataset for inputs that do not fit into memory
+
+    C.f. `StreamDataset` for the details.
+    """
+    return StreamDataset(
+        stream, scalar_groups, vlarr_groups, vlarr_limits,
+        construct_transforms(transform), shuffle_buffer, seed, dtypes
+    )
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 
-from typing import Dict, List
+from typing import Any, Dict, Iterator, List
 import numpy as np
 
 from vlndata.data_frame import DataFrameBase
@@ -50,3 +50,45 @@ class DatasetBase(ABC):
     def __getitem__(self, index : int) -> VLDataDict:
         raise NotImplementedError
 
+    def get_batch(self, indices : np.ndarray) -> List[VLDataDict]:
+        """Get samples at `indices`
+
+        This default implementation extracts the samples one by one.
+        Subclasses may override it to extract the whole batch at once
+        (c.f. `DataFrameBase.get_scalar_batch`).
+        """
+        return [ self[index] for index in indices ]
+
+    def state_dict(self) -> Dict[str, Any]:
+        """Get the state of the dataset (e.g. of its random transformations)
+
+        The default implementation returns an empty dictionary of
+        a stateless dataset.
+        """
+        return {}
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        """Restore the state of the dataset saved by `state_dict`"""
+
+
+class IterableDatasetBase(ABC):
+    """Interface for a vlndata dataset that can only be iterated over
+
+    Unlike `DatasetBase`, an iterable dataset does not support random access
+    to its samples and does not know its length in advance. It is meant for
+    streaming data that does not fit into memory.
+    """
+
+    @property
+    @abstractmethod
+    def scalar_groups(self) -> ColumnGroups:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def vlarr_groups(self) -> ColumnGroups:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[VLDataDict]:
+        raise NotImplementedError
@@ -1,5 +1,5 @@
 from copy import deepcopy
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from vlndata.data_frame import DataFrameBase
 from .dataset_base      import DatasetBase, ColumnGroups, VLDataDict
@@ -37,3 +37,8 @@ class DatasetCache(DatasetBase):
 
         return deepcopy(self._cache[index]) # type: ignore
 
+    def state_dict(self) -> Dict[str, Any]:
+        return self._dset.state_dict()
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        self._dset.load_state_dict(state)
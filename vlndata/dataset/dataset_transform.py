@@ -1,6 +1,9 @@
-from typing import List
+from typing import Any, Dict, List
+
+import numpy as np
 
 from vlndata.data_frame   import DataFrameBase
+from vlndata.profiling    import profiled
 from .dataset_base        import DatasetBase, ColumnGroups, VLDataDict
 from .transform.transform import Transform
 
@@ -31,6 +34,9 @@ class DatasetTransform(DatasetBase):
     ):
         self._dset       = dset
         self._transforms = transforms
+        self._stages     = [
+            f'transform.{type(t).__name__}' for t in transforms
+        ]
 
         for transform in self._transforms:
             transform.set_parent(self)
@@ -57,8 +63,36 @@ class DatasetTransform(DatasetBase):
     def __getitem__(self, index : int) -> VLDataDict:
         result = self._dset[index]
 
-        for transform in self._transforms:
-            result = transform(result, index)
+        for (stage, transform) in zip(self._stages, self._transforms):
+            result = profiled(stage, transform, result, index)
 
         return result
 
+    def get_batch(self, indices : np.ndarray) -> List[VLDataDict]:
+        batch = self._dset.get_batch(indices)
+
+        for (idx, index) in enumerate(indices):
+            for (stage, transform) in zip(self._stages, self._transforms):
+                batch[idx] = profiled(stage, transform, batch[idx], index)
+
+        return batch
+
+    def state_dict(self) -> Dict[str, Any]:
+        return {
+            'dset'       : self._dset.state_dict(),
+            'transforms' : [ t.state_dict() for t in self._transforms ],
+        }
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        if len(state['transforms']) != len(self._transforms):
+            raise ValueError(
+                f"State of {len(state['transforms'])} transforms cannot be"
+                f" loaded into {len(self._transforms)} transforms"
+            )
+
+        self._dset.load_state_dict(state['dset'])
+
+        for (transform, transform_state) in zip(
+            self._transforms, state['transforms']
+        ):
+            transform.load_state_dict(transform_state)
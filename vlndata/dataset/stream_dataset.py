@@ -0,0 +1,126 @@
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from vlndata.data_frame.frame_stream import FrameStream, select_frame_stream
+from vlndata.funcs import Spec
+
+from .dataset_base        import IterableDatasetBase, ColumnGroups, VLDataDict
+from .dataset_transform   import DatasetTransform
+from .transform.transform import Transform
+from .vldataset           import VLDataset
+
+def get_group_columns(groups : ColumnGroups) -> List[str]:
+    """Get a list of unique columns used by `groups` preserving their order"""
+    result : Dict[str, None] = {}
+
+    for columns in groups.values():
+        result.update({ column : None for column in columns })
+
+    return list(result)
+
+class StreamDataset(IterableDatasetBase):
+    """Iterable dataset that streams samples from a file in chunks
+
+    This dataset is a streaming counterpart of the `VLDataset`. Instead of
+    a data frame, it takes a `FrameStream` that reads the input file
+    sequentially in chunks. Each chunk is converted into samples with the
+    `VLDataset` grouping (c.f. `VLDataset` for the details of
+    `scalar_groups`, `vlarr_groups`, `vlarr_limits` and `dtypes`), and
+    transformed by `transforms` on the fly.
+
+    Since the input file is read sequentially, the samples can only be
+    shuffled approximately, by passing them through a shuffle buffer of size
+    `shuffle_buffer`. The memory usage of this dataset is bounded by the size
+    of a single chunk of the stream and the size of the shuffle buffer.
+
+    Parameters
+    ----------
+    stream : Spec or FrameStream
+        A stream of data frame chunks, or its specification.
+        C.f. `select_frame_stream`.
+    scalar_groups : ColumnGroups, optional
+        A dictionary specifying groups of scalar variables. Default: None.
+    vlarr_groups  : ColumnGroups, optional
+        A dictionary specifying groups of vlarr variables. Default: None.
+    vlarr_limits  : Dict[str, int], optional
+        A dictionary of vlarr group length limits. Default: None.
+    transforms : List[Transform], optional
+        A list of transformations to apply to the samples. Default: None.
+    shuffle_buffer : int, optional
+        Size of the shuffle buffer. If it is less than 2, the samples are
+        returned in the order of the input file. Default: 0.
+    seed : int, optional
+        Seed of the shuffle buffer prg. Default: 0.
+    dtypes : Dict[str, Any], optional
+        A dictionary of data types of the groups. Default: None.
+    """
+
+    def __init__(
+        self,
+        stream         : Union[Spec, FrameStream],
+        scalar_groups  : Optional[ColumnGroups]    = None,
+        vlarr_groups   : Optional[ColumnGroups]    = None,
+        vlarr_limits   : Optional[Dict[str, int]]  = None,
+        transforms     : Optional[List[Transform]] = None,
+        shuffle_buffer : int = 0,
+        seed           : int = 0,
+        dtypes         : Optional[Dict[str, Any]]  = None,
+    ):
+        if not isinstance(stream, FrameStream):
+            stream = select_frame_stream(stream)
+
+        self._stream         = stream
+        self._scalar_groups  = scalar_groups or {}
+        self._vlarr_groups   = vlarr_groups  or {}
+        self._vlarr_limits   = vlarr_limits
+        self._transforms     = transforms
+        self._shuffle_buffer = shuffle_buffer
+        self._prg            = np.random.default_rng(seed)
+        self._dtypes         = dtypes
+
+    @property
+    def scalar_groups(self) -> ColumnGroups:
+        return self._scalar_groups
+
+    @property
+    def vlarr_groups(self) -> ColumnGroups:
+        return self._vlarr_groups
+
+    def iter_samples(self) -> Iterator[VLDataDict]:
+        """Iterate over samples in the order of the input file"""
+        chunks = self._stream.iter_chunks(
+            get_group_columns(self._scalar_groups),
+            get_group_columns(self._vlarr_groups),
+        )
+
+        for df in chunks:
+            dset = VLDataset(
+                df, self._scalar_groups, self._vlarr_groups,
+                self._vlarr_limits, self._dtypes
+            )
+
+            if self._transforms is not None:
+                dset = DatasetTransform(dset, self._transforms)
+
+            for index in range(len(dset)):
+                yield dset[index]
+
+    def __iter__(self) -> Iterator[VLDataDict]:
+        if self._shuffle_buffer < 2:
+            yield from self.iter_samples()
+            return
+
+        buffer : List[VLDataDict] = []
+
+        for sample in self.iter_samples():
+            if len(buffer) < self._shuffle_buffer:
+                buffer.append(sample)
+                continue
+
+            index = self._prg.integers(len(buffer))
+            yield buffer[index]
+            buffer[index] = sample
+
+        self._prg.shuffle(buffer)
+        yield from buffer
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict
 import numpy as np
 
 from vlndata.funcs import Spec, unpack_name_args
@@ -8,6 +9,14 @@ class Noise(ABC):
     def __init__(self, seed):
         self._prg = np.random.default_rng(seed)
 
+    def state_dict(self) -> Dict[str, Any]:
+        """Get the state of the noise prg"""
+        return { 'prg' : self._prg.bit_generator.state }
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        """Restore the state of the noise prg saved by `state_dict`"""
+        self._prg.bit_generator.state = state['prg']
+
     @abstractmethod
     def generate(self, shape):
         raise NotImplementedError
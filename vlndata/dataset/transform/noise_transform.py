@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Any, Dict, List, Tuple, Optional, Union
 
 import numpy as np
 
@@ -129,10 +129,15 @@ class NoiseTransform(Transform):
         if weight_map is None:
             weight_map = 1
 
+        # compute in the noise precision, then cast back to the data type
+        values = data[..., index_map]
+
         if self._relative:
-            data[..., index_map] *= (1 + weight_map * noise)
+            values = values * (1 + weight_map * noise)
         else:
-            data[..., index_map] += weight_map * noise
+            values = values + weight_map * noise
+
+        data[..., index_map] = values
 
     def apply_correlated_noise(self, data : VLDataDict) -> None:
         noise = self._noise.generate(shape = (1,))
@@ -171,6 +176,12 @@ class NoiseTransform(Transform):
             self._index_map[name]  = index_map
             self._weight_map[name] = weight_map
 
+    def state_dict(self) -> Dict[str, Any]:
+        return { 'noise' : self._noise.state_dict() }
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        self._noise.load_state_dict(state['noise'])
+
     def __call__(self, data : VLDataDict, _index : int) -> VLDataDict:
         if self._corr:
             self.apply_correlated_noise(data)
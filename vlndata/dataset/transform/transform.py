@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict
 from vlndata.dataset.dataset_base import DatasetBase, VLDataDict
 
 class Transform(ABC):
@@ -15,6 +16,18 @@ class Transform(ABC):
     def _reset_parent(self) -> None:
         raise NotImplementedError
 
+    def state_dict(self) -> Dict[str, Any]:
+        """Get the state of the transformation (e.g. of its prg)
+
+        The state allows an interrupted training to resume with the same
+        random transformations. Stateless transformations return an empty
+        dictionary.
+        """
+        return {}
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        """Restore the state of the transformation saved by `state_dict`"""
+
     @abstractmethod
     def __call__(self, data : VLDataDict, index : int) -> VLDataDict:
         raise NotImplementedError
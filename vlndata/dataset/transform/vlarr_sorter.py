@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 import numpy as np
 
 from .transform import Transform, VLDataDict
@@ -16,6 +16,12 @@ class VLArrShuffleTransform(Transform):
     def _reset_parent(self):
         pass
 
+    def state_dict(self) -> Dict[str, Any]:
+        return { 'prg' : self._prg.bit_generator.state }
+
+    def load_state_dict(self, state : Dict[str, Any]) -> None:
+        self._prg.bit_generator.state = state['prg']
+
     def __call__(self, data : VLDataDict, _index : int) -> VLDataDict:
         shuffle_vlarr(data[self._group], self._prg)
         return data
@@ -1,9 +1,17 @@
-from typing import Dict, Optional
+import functools
+from typing import Any, Dict, List, Optional
 import numpy as np
 
 from vlndata.data_frame import DataFrameBase
+from vlndata.profiling  import profiled
 from .dataset_base import DatasetBase, ColumnGroups, VLDataDict
 
+def promote_dtypes(arrays : List[np.ndarray]) -> np.dtype:
+    """Find the data type that can hold the values of all `arrays`"""
+    return functools.reduce(
+        np.promote_types, ( np.asarray(x).dtype for x in arrays )
+    )
+
 class VLDataset(DatasetBase):
     """Default implementation of the vlndata dataset.
 
@@ -21,6 +29,12 @@ class VLDataset(DatasetBase):
     Similar to `scalar_groups`, `vlarr_groups` specifies the vl arrays
     to be extracted from the Data Frame.
 
+    By default, the extracted values have the data type of the Data Frame.
+    If the Data Frame does not cast its values (c.f. `DataFrameBase.cast`),
+    then the values keep their source precision and can be cast at collate
+    time. The data type can also be overridden per group with `dtypes`,
+    e.g. to extract integer IDs as int64 and features as float16.
+
     Parameters
     ----------
     df : DataFrameBase
@@ -36,6 +50,12 @@ class VLDataset(DatasetBase):
         if present in `vlarr_limits`, then the lengths of all vlarrays in that
         vlarr group will be limited by the corresponding value from the
         `vlarr_limits`. Default: None.
+    dtypes : Dict[str, Any], optional
+        A dictionary of data types of the groups. Groups missing from this
+        dictionary have the default data type. Any numpy compatible data type
+        can be used (e.g. 'float16', 'int8', or `ml_dtypes.bfloat16`).
+        To avoid the loss of precision of integer columns, the Data Frame
+        should be constructed with `cast = False`. Default: None.
 
     Examples
     --------
@@ -61,12 +81,22 @@ class VLDataset(DatasetBase):
         df            : DataFrameBase,
         scalar_groups : Optional[ColumnGroups] = None,
         vlarr_groups  : Optional[ColumnGroups] = None,
-        vlarr_limits  : Optional[Dict[str, int]] = None
+        vlarr_limits  : Optional[Dict[str, int]] = None,
+        dtypes        : Optional[Dict[str, Any]] = None,
     ):
         self._df = df
         self._scalar_groups = scalar_groups or {}
         self._vlarr_groups  = vlarr_groups or {}
         self._vlarr_limits  = vlarr_limits or {}
+        self._dtypes        = {
+            name : np.dtype(dtype) for (name, dtype) in (dtypes or {}).items()
+        }
+
+        frame_stage = f'frame.{type(df).__name__}'
+
+        self._stage        = f'dataset.{type(self).__name__}'
+        self._scalar_stage = f'{frame_stage}.scalar'
+        self._vlarr_stage  = f'{frame_stage}.vlarr'
 
     @property
     def dtype(self):
@@ -76,6 +106,11 @@ class VLDataset(DatasetBase):
     def df(self) -> DataFrameBase:
         return self._df
 
+    @property
+    def dtypes(self) -> Dict[str, np.dtype]:
+        """Data types of the groups that override the default data type"""
+        return self._dtypes
+
     @property
     def scalar_groups(self) -> ColumnGroups:
         return self._scalar_groups
@@ -88,38 +123,77 @@ class VLDataset(DatasetBase):
         return len(self._df)
 
     def extract_scalar_group(self, name : str, index : int) -> np.ndarray:
+        return profiled(
+            self._scalar_stage, self.read_scalar_group, name, index
+        )
+
+    def read_scalar_group(self, name : str, index : int) -> np.ndarray:
         columns = self._scalar_groups[name]
+        dtype   = self._dtypes.get(name, None)
+
+        if (dtype is None) and (not self._df.cast):
+            return np.array(
+                [ self._df.get_scalar(column, index) for column in columns ]
+            ).reshape(len(columns))
+
+        if dtype is None:
+            dtype = self._df.dtype
 
         return np.fromiter(
             ( self._df.get_scalar(column, index) for column in columns ),
-            dtype = self._df.dtype,
+            dtype = dtype,
             count = len(columns)
         )
 
-    def extract_vlarr_group(self, name : str, index : int) -> np.ndarray:
-        columns = self._vlarr_groups[name]
-
-        if len(columns) == 0:
-            return np.empty((0, 0), dtype = self._df.dtype)
-
-        first_vlarr   = self._df.get_vlarr(columns[0], index)
+    def stack_vlarr_group(
+        self, name : str, vlarrs : List[np.ndarray]
+    ) -> np.ndarray:
+        """Stack vlarrays `vlarrs` of a single row into group `name` array"""
+        first_vlarr   = vlarrs[0]
         ref_vl_length = len(first_vlarr)
 
         vl_length = self._vlarr_limits.get(name, ref_vl_length)
         vl_length = min(vl_length, ref_vl_length)
 
-        result = np.empty((vl_length, len(columns)), dtype = self._df.dtype)
-        result[:, 0] = first_vlarr[:vl_length]
+        dtype = self._dtypes.get(name, None)
 
-        for column_idx, column in enumerate(columns[1:], start = 1):
-            vlarr = self._df.get_vlarr(column, index)
-            assert len(vlarr) == ref_vl_length
+        if dtype is None:
+            if self._df.cast:
+                dtype = self._df.dtype
+            else:
+                dtype = promote_dtypes(vlarrs)
 
+        result = np.empty((vl_length, len(vlarrs)), dtype = dtype)
+
+        for (column_idx, vlarr) in enumerate(vlarrs):
+            assert len(vlarr) == ref_vl_length
             result[:, column_idx] = vlarr[:vl_length]
 
         return result
 
+    def extract_vlarr_group(self, name : str, index : int) -> np.ndarray:
+        columns = self._vlarr_groups[name]
+
+        dtype   = self._dtypes.get(name, None)
+
+        if len(columns) == 0:
+            return np.empty(
+                (0, 0), dtype = self._df.dtype if dtype is None else dtype
+            )
+
+        vlarrs = profiled(self._vlarr_stage, self.read_vlarrs, columns, index)
+        return self.stack_vlarr_group(name, vlarrs)
+
+    def read_vlarrs(
+        self, columns : List[str], index : int
+    ) -> List[np.ndarray]:
+        return [ self._df.get_vlarr(column, index) for column in columns ]
+
     def __getitem__(self, index : int) -> VLDataDict:
+        return profiled(self._stage, self.extract_sample, index)
+
+    def extract_sample(self, index : int) -> VLDataDict:
+        """Extract groups of row `index`"""
         result = { }
 
         for name in self._scalar_groups:
@@ -130,3 +204,73 @@ class VLDataset(DatasetBase):
 
         return result
 
+    def extract_scalar_group_batch(
+        self, name : str, indices : np.ndarray
+    ) -> np.ndarray:
+        """Extract scalar group `name` of rows `indices` as a 2D array"""
+        columns = self._scalar_groups[name]
+        dtype   = self._dtypes.get(name, None)
+        values  = [
+            profiled(
+                self._scalar_stage, self._df.get_scalar_batch, column, indices
+            )
+                for column in columns
+        ]
+
+        if dtype is None:
+            if self._df.cast:
+                dtype = self._df.dtype
+            elif len(values) > 0:
+                dtype = promote_dtypes(values)
+            else:
+                dtype = np.float64
+
+        result = np.empty((len(indices), len(columns)), dtype = dtype)
+
+        for (column_idx, value) in enumerate(values):
+            result[:, column_idx] = value
+
+        return result
+
+    def extract_vlarr_group_batch(
+        self, name : str, indices : np.ndarray
+    ) -> List[np.ndarray]:
+        """Extract vlarr group `name` of rows `indices`"""
+        columns = self._vlarr_groups[name]
+
+        if len(columns) == 0:
+            return [ self.extract_vlarr_group(name, idx) for idx in indices ]
+
+        values = [
+            profiled(
+                self._vlarr_stage, self._df.get_vlarr_batch, column, indices
+            )
+                for column in columns
+        ]
+
+        return [
+            self.stack_vlarr_group(name, list(vlarrs))
+                for vlarrs in zip(*values)
+        ]
+
+    def get_batch(self, indices : np.ndarray) -> List[VLDataDict]:
+        return profiled(self._stage, self.extract_batch, indices)
+
+    def extract_batch(self, indices : np.ndarray) -> List[VLDataDict]:
+        """Extract groups of rows `indices`"""
+        indices = np.asarray(indices, dtype = np.int64)
+        result  : List[VLDataDict] = [ {} for _ in range(len(indices)) ]
+
+        for name in self._scalar_groups:
+            values = self.extract_scalar_group_batch(name, indices)
+
+            for (sample, value) in zip(result, values):
+                sample[name] = value
+
+        for name in self._vlarr_groups:
+            values = self.extract_vlarr_group_batch(name, indices)
+
+            for (sample, value) in zip(result, values):
+                sample[name] = value
+
+        return result
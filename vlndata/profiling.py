@@ -0,0 +1,273 @@
+"""Opt-in profiling of the data loading stages
+
+The data loading pipeline records the time spent in each of its stages:
+
+- `frame.<FrameType>.scalar`, `frame.<FrameType>.vlarr` : reads of the
+  column values from a data frame by `VLDataset`.
+- `dataset.<DatasetType>` : extraction of samples by a dataset, including
+  the frame reads and the grouping of columns.
+- `transform.<TransformType>` : a transformation of `DatasetTransform`.
+- `collate` : collation of samples into a batch by `DataLoader`.
+- `loader.batch` : loading of a whole batch by `DataLoader`.
+
+The stages nest, e.g. `dataset.VLDataset` includes the frame reads. Each
+stage reports both its total time and its self time, which excludes the
+nested stages (e.g. the self time of `dataset.VLDataset` is the time of the
+grouping of columns).
+
+Profiling is disabled by default, in which case each instrumented call
+costs a single global lookup. It is enabled with `enable_profiling`, or
+within the `profile` context. `DataLoader` saves a summary of the stages
+at the end of each epoch (c.f. `Profiler.end_epoch`).
+
+Examples
+--------
+>>> with profile() as profiler:
+...     for epoch in range(n_epochs):
+...         for batch in loader:
+...             train(batch)
+...         print(profiler.report(profiler.epochs[-1]['stages']))
+>>> profiler.save('profile.json')
+"""
+
+import contextlib
+import json
+import random
+import threading
+import time
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+
+PROFILER : Optional['Profiler'] = None
+
+PERCENTILES = [ 50, 90, 99 ]
+
+# number of durations kept per stage to estimate the percentiles
+RESERVOIR_SIZE = 1024
+
+def get_nbytes(value : Any) -> int:
+    """Get the size of arrays in `value` (an array, a list or a dict)"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+
+    if isinstance(value, dict):
+        return sum(get_nbytes(x) for x in value.values())
+
+    if isinstance(value, (list, tuple)):
+        return sum(get_nbytes(x) for x in value)
+
+    return 0
+
+class StageStats:
+    # pylint: disable=too-many-instance-attributes
+    """Statistics of calls of a single stage
+
+    The totals, the minimum and the maximum are exact. The percentiles are
+    estimated from a uniform sample of at most `reservoir_size` durations
+    (reservoir sampling), so that the statistics of a stage take constant
+    memory regardless of the number of its calls.
+    """
+
+    def __init__(self, reservoir_size : int = RESERVOIR_SIZE, seed : int = 0):
+        self.count      = 0
+        self.total_time = 0.0
+        self.self_time  = 0.0
+        self.min_time   = float('inf')
+        self.max_time   = 0.0
+        self.nbytes     = 0
+        self.reservoir  : List[float] = []
+
+        self._reservoir_size = reservoir_size
+        self._prg            = random.Random(seed)
+
+    def add(self, duration : float, self_time : float, nbytes : int) -> None:
+        self.count      += 1
+        self.total_time += duration
+        self.self_time  += self_time
+        self.min_time    = min(self.min_time, duration)
+        self.max_time    = max(self.max_time, duration)
+        self.nbytes     += nbytes
+
+        if len(self.reservoir) < self._reservoir_size:
+            self.reservoir.append(duration)
+        else:
+            idx = self._prg.randrange(self.count)
+
+            if idx < self._reservoir_size:
+                self.reservoir[idx] = duration
+
+    def summary(self) -> Dict[str, float]:
+        result = {
+            'count'      : self.count,
+            'total_time' : self.total_time,
+            'self_time'  : self.self_time,
+            'mean_time'  : self.total_time / max(1, self.count),
+            'min_time'   : self.min_time if self.count > 0 else 0.0,
+            'max_time'   : self.max_time,
+            'bytes'      : self.nbytes,
+        }
+
+        percentiles = np.percentile(self.reservoir or [ 0.0 ], PERCENTILES)
+
+        for (percentile, value) in zip(PERCENTILES, percentiles):
+            result[f'p{percentile}_time'] = float(value)
+
+        return result
+
+class Profiler:
+    """Recorder of the call counts, latencies and bytes of the stages
+
+    The profiler is thread safe, e.g. it records the stages of the batches
+    prefetched by `DataLoader` in a background thread.
+    """
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._local  = threading.local()
+        self._stats  : Dict[str, StageStats]  = {}
+        self._epochs : List[Dict[str, Any]]   = []
+
+    def call(self, stage : str, func : Callable, *args : Any) -> Any:
+        """Call `func(*args)` and record it as a call of `stage`"""
+        stack = getattr(self._local, 'stack', None)
+
+        if stack is None:
+            stack = self._local.stack = []
+
+        # time spent in the nested stages
+        stack.append(0.0)
+        time_start = time.perf_counter()
+
+        try:
+            result = func(*args)
+        finally:
+            duration = time.perf_counter() - time_start
+            nested   = stack.pop()
+
+            if len(stack) > 0:
+                stack[-1] += duration
+
+        nbytes = get_nbytes(result)
+
+        with self._lock:
+            stats = self._stats.get(stage)
+
+            if stats is None:
+                stats = self._stats[stage] = StageStats()
+
+            stats.add(duration, duration - nested, nbytes)
+
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Get statistics of the stages recorded since the last epoch end
+
+        The stages are sorted by their total time in the descending order.
+        """
+        with self._lock:
+            stats = list(self._stats.items())
+
+        stats.sort(key = lambda item : -item[1].total_time)
+        return { stage : x.summary() for (stage, x) in stats }
+
+    @property
+    def epochs(self) -> List[Dict[str, Any]]:
+        """Summaries of the finished epochs (c.f. `end_epoch`)"""
+        return self._epochs
+
+    def end_epoch(self, epoch : Optional[int] = None) -> Dict[str, Any]:
+        """Save the summary of the current epoch and reset the statistics
+
+        `DataLoader` ends the epochs automatically when it finishes them.
+        """
+        if epoch is None:
+            epoch = len(self._epochs)
+
+        result = { 'epoch' : epoch, 'stages' : self.summary() }
+
+        with self._lock:
+            self._epochs.append(result)
+            self._stats = {}
+
+        return result
+
+    def reset(self) -> None:
+        """Discard all recorded statistics and epoch summaries"""
+        with self._lock:
+            self._stats  = {}
+            self._epochs = []
+
+    def report(
+        self, summary : Optional[Dict[str, Dict[str, float]]] = None
+    ) -> str:
+        """Format `summary` (by default, of the current epoch) as a table"""
+        if summary is None:
+            summary = self.summary()
+
+        header = (
+            f"{'stage':<40} {'count':>8} {'total, s':>10} {'self, s':>10}"
+            f" {'p50, ms':>9} {'p99, ms':>9} {'MB':>9}"
+        )
+        lines = [ header, '-' * len(header) ]
+
+        for (stage, x) in summary.items():
+            lines.append(
+                f"{stage:<40} {x['count']:>8d} {x['total_time']:>10.3f}"
+                f" {x['self_time']:>10.3f} {1e3 * x['p50_time']:>9.3f}"
+                f" {1e3 * x['p99_time']:>9.3f} {x['bytes'] / 2**20:>9.2f}"
+            )
+
+        return '\n'.join(lines)
+
+    def save(self, path : str) -> None:
+        """Save the epoch summaries and the current summary into json `path`
+        """
+        with open(path, 'wt', encoding = 'utf-8') as f:
+            json.dump(
+                { 'epochs' : self._epochs, 'current' : self.summary() },
+                f, indent = 4
+            )
+
+def get_profiler() -> Optional[Profiler]:
+    """Get the enabled profiler, or None if profiling is disabled"""
+    return PROFILER
+
+def enable_profiling(profiler : Optional[Profiler] = None) -> Profiler:
+    """Enable profiling with `profiler` (or a new profiler)"""
+    # pylint: disable=global-statement
+    global PROFILER
+
+    if profiler is None:
+        profiler = Profiler()
+
+    PROFILER = profiler
+    return profiler
+
+def disable_profiling() -> None:
+    # pylint: disable=global-statement
+    global PROFILER
+    PROFILER = None
+
+@contextlib.contextmanager
+def profile(profiler : Optional[Profiler] = None) -> Iterator[Profiler]:
+    """Enable profiling within the context"""
+    previous = PROFILER
+
+    try:
+        yield enable_profiling(profiler)
+    finally:
+        if previous is None:
+            disable_profiling()
+        else:
+            enable_profiling(previous)
+
+def profiled(stage : str, func : Callable, *args : Any) -> Any:
+    """Call `func(*args)` and record it as `stage`, if profiling is enabled
+    """
+    profiler = PROFILER
+
+    if profiler is None:
+        return func(*args)
+
+    return profiler.call(stage, func, *args)